@@ -0,0 +1,199 @@
+"""
+Analyse des textes pour la recherche lexicale (BM25).
+
+Un `Analyzer` transforme un texte en termes, avec le même traitement à
+l'indexation et à la requête:
+1. minuscules et suppression des accents (même repliement que les IDs
+   d'entités du graphe, voir `fold_accents`);
+2. découpage sur tout ce qui n'est pas lettre ou chiffre (ponctuation,
+   apostrophes, tirets): "Lutéris," et "luteris" donnent le même terme;
+3. suppression des mots vides français;
+4. racinisation légère (pluriels, féminins, quelques terminaisons):
+   "personnages" et "personnage" se rejoignent.
+
+Le terme de chaque mot distinct (repliement, mot vide, racine) est
+mémorisé: analyser un texte revient à le découper puis à consulter un
+dictionnaire. Les requêtes récentes sont gardées en cache. Les chunks ne
+sont analysés qu'à l'indexation, l'index BM25 stocke leurs termes.
+
+Analyseurs disponibles (`ANALYZERS`):
+- "french": la chaîne complète ci-dessus (défaut des nouveaux index);
+- "whitespace": minuscules + découpage sur les espaces, le découpage
+  historique (celui du BM25Retriever de LangChain), gardé pour les index
+  construits avant l'analyseur.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# Analyseur des nouveaux index
+DEFAULT_ANALYZER = "french"
+
+# Mots vides (repliés à la construction de l'analyseur)
+FRENCH_STOPWORDS = frozenset("""
+    a à au aux avec c ce ces cet cette ceux d dans de des du elle elles en et
+    étaient était été être eux il ils j je l la le les leur leurs lui m ma mais
+    me mes moi mon n ne ni nos notre nous on ont ou où par pas pour qu que qui
+    s sa sans se ses si son sont sur t ta te tes toi ton tu un une vos votre
+    vous y
+""".split())
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Mots mémorisés par analyseur avant de vider le cache des termes
+_TERM_CACHE_SIZE = 200_000
+
+
+def fold_accents(text: str) -> str:
+    """
+    Supprime les accents (décomposition NFKD, marques combinantes retirées).
+
+    Args:
+        text: Texte à replier
+
+    Returns:
+        Texte sans accents ("Lutéris" -> "Luteris")
+    """
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def light_stem_fr(word: str) -> str:
+    """
+    Racinisation légère du français (mot déjà replié, en minuscules).
+
+    Inspirée du "minimal stemmer" de Savoy (Lucene): retire les marques
+    de pluriel, de féminin et quelques terminaisons, sans chercher à
+    ramener les formes verbales à l'infinitif.
+
+    Args:
+        word: Mot à raciniser
+
+    Returns:
+        Racine du mot
+
+    Exemples:
+        >>> light_stem_fr("chevaux"), light_stem_fr("cheval")
+        ('cheval', 'cheval')
+        >>> light_stem_fr("bateaux"), light_stem_fr("bateau")
+        ('bateau', 'bateau')
+        >>> light_stem_fr(fold_accents("châteaux")), light_stem_fr(fold_accents("château"))
+        ('chateau', 'chateau')
+    """
+    if len(word) > 3 and word.endswith("x"):
+        # chevaux -> cheval, mais bateaux -> bateau et lieux -> lieu
+        if word.endswith("aux") and word[-4] != "e":
+            return word[:-3] + "al"
+        return word[:-1]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    if len(word) < 6:
+        return word
+    if word.endswith("r"):
+        word = word[:-1]
+    if word.endswith("e"):
+        word = word[:-1]
+    if len(word) > 2 and word[-1] == word[-2] and word[-1].isalpha():
+        word = word[:-1]
+    return word
+
+
+class Analyzer:
+    """Chaîne d'analyse configurable (repliement, découpage, mots vides, racines)."""
+
+    def __init__(
+        self,
+        name: str,
+        fold: bool = True,
+        strip_punctuation: bool = True,
+        stopwords: Iterable[str] = (),
+        stemmer: Optional[Callable[[str], str]] = None,
+        query_cache_size: int = 4096
+    ):
+        """
+        Args:
+            name: Nom enregistré dans l'index (pour ré-analyser les requêtes pareil)
+            fold: Supprimer les accents
+            strip_punctuation: Découper sur la ponctuation (sinon sur les espaces)
+            stopwords: Mots ignorés (repliés comme le texte)
+            stemmer: Racinisation appliquée à chaque terme
+            query_cache_size: Requêtes gardées en cache par analyze_query
+        """
+        self.name = name
+        self.fold = fold
+        self.strip_punctuation = strip_punctuation
+        self.stopwords = frozenset(self._fold(word.lower()) for word in stopwords)
+        self.stemmer = stemmer
+        # Mot en minuscules -> terme ("" pour un mot vide)
+        self._terms: Dict[str, str] = {}
+        self._cached_query = lru_cache(maxsize=query_cache_size)(self._analyze_tuple)
+
+    def _fold(self, word: str) -> str:
+        """Repliement des accents si activé."""
+        return fold_accents(word) if self.fold and not word.isascii() else word
+
+    def _term(self, word: str) -> str:
+        """Terme d'un mot en minuscules (mémorisé)."""
+        term = self._terms.get(word)
+        if term is None:
+            if len(self._terms) >= _TERM_CACHE_SIZE:
+                self._terms.clear()
+            term = self._fold(word)
+            if term in self.stopwords:
+                term = ""
+            elif self.stemmer is not None:
+                term = self.stemmer(term)
+            self._terms[word] = term
+        return term
+
+    def analyze(self, text: str) -> List[str]:
+        """
+        Termes d'un texte.
+
+        Args:
+            text: Texte à analyser
+
+        Returns:
+            Liste de termes, dans l'ordre du texte
+        """
+        text = text.lower()
+        if not self.strip_punctuation:
+            words = text.split()
+        else:
+            # NFC: les lettres accentuées décomposées restent dans leur mot
+            words = _WORD_PATTERN.findall(unicodedata.normalize("NFC", text))
+        if not (self.fold or self.stopwords or self.stemmer):
+            return words
+
+        terms = [self._term(word) for word in words]
+        return [term for term in terms if term]
+
+    def _analyze_tuple(self, text: str) -> Tuple[str, ...]:
+        return tuple(self.analyze(text))
+
+    def analyze_query(self, text: str) -> Tuple[str, ...]:
+        """Termes d'une requête (résultat en cache pour les requêtes répétées)."""
+        return self._cached_query(text)
+
+
+ANALYZERS: Dict[str, Analyzer] = {
+    "french": Analyzer("french", stopwords=FRENCH_STOPWORDS, stemmer=light_stem_fr),
+    "whitespace": Analyzer("whitespace", fold=False, strip_punctuation=False),
+}
+
+
+def get_analyzer(name: str = DEFAULT_ANALYZER) -> Analyzer:
+    """
+    Analyseur enregistré.
+
+    Args:
+        name: Nom de l'analyseur ("french", "whitespace")
+
+    Returns:
+        Analyzer partagé par le processus
+    """
+    if name not in ANALYZERS:
+        raise ValueError(f"Analyseur inconnu: {name} (choix: {', '.join(ANALYZERS)})")
+    return ANALYZERS[name]
@@ -0,0 +1,302 @@
+"""
+Banc d'essai du stockage des vecteurs: rappel, latence et mémoire.
+
+Compare sur les vecteurs d'un projet indexé:
+- la recherche exacte float32 (référence) et celle de la base de l'index
+  (ChromaDB/HNSW, ou matrice numpy mappée en mémoire);
+- les copies float16 et int8, avec ou sans rescoring exact des candidats
+  (voir src/vector_quantization.py);
+- des embeddings raccourcis (troncature Matryoshka + renormalisation),
+  seuls ou quantifiés en int8;
+- des graphes HNSW (hnswlib, si installé) pour plusieurs valeurs de `M`
+  et de `ef_search`: la courbe rappel / latence qui guide le réglage du
+  backend "hnsw".
+
+Les requêtes sont par défaut des chunks du projet tirés au hasard (le
+chunk lui-même est exclu des résultats), ou des questions réelles lues
+dans un fichier (une par ligne, embeddées avec le backend de l'index).
+
+Le rappel@k est la part des k voisins exacts (float32, dimensions
+complètes) retrouvés. La troncature n'a de sens que pour les modèles
+entraînés en Matryoshka (text-embedding-3-*): pour ada-002 ou MiniLM,
+le rappel chute fortement.
+
+Usage:
+    python -m src.benchmark_vectors anomalie2084
+    python -m src.benchmark_vectors anomalie2084 --queries 500 --k 10 --dimensions 512,256
+    python -m src.benchmark_vectors anomalie2084 --questions questions.txt
+    python -m src.benchmark_vectors anomalie2084 --hnsw-m 16,32 --ef 16,64,256
+"""
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.vector_quantization import QuantizedVectors, rescore
+from src.vector_store import (
+    DEFAULT_HNSW_EF_CONSTRUCTION,
+    HnswCollection,
+    NumpyCollection,
+    open_vector_store
+)
+
+
+def load_collection_vectors(project: str) -> Tuple[object, List[str], np.ndarray]:
+    """
+    Charge tous les vecteurs de la version d'index active d'un projet.
+
+    Args:
+        project: Nom du projet
+
+    Returns:
+        Tuple (collection ChromaDB ou NumpyCollection, IDs, matrice float32 n x d)
+    """
+    from src.utils.index_versions import get_active_index_path
+
+    index_path = get_active_index_path(Path("db") / project)
+    collection = open_vector_store(index_path, project, read_only=True)._collection
+    results = collection.get(include=["embeddings"])
+    return collection, list(results["ids"]), np.asarray(results["embeddings"], dtype=np.float32)
+
+
+def exact_top_k(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    sq_norms: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Voisins exacts (distance L2) de plusieurs requêtes en un produit matriciel.
+
+    Args:
+        matrix: Vecteurs n x d
+        queries: Requêtes q x d
+        k: Nombre de voisins
+        sq_norms: Normes au carré des vecteurs (calculées si absentes)
+
+    Returns:
+        Indices q x k triés du plus proche au plus lointain
+    """
+    if sq_norms is None:
+        sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+    scores = sq_norms[None, :] - 2 * queries @ matrix.T
+    k = min(k, matrix.shape[0])
+    top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+def truncate(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    """Troncature Matryoshka: premières dimensions, renormalisées."""
+    short = vectors[:, :dimensions]
+    norms = np.linalg.norm(short, axis=1, keepdims=True)
+    return short / np.maximum(norms, 1e-12)
+
+
+def _evaluate(
+    search: Callable[[int], List[str]],
+    query_ids: Sequence[Optional[str]],
+    truth: List[Set[str]],
+    k: int
+) -> Tuple[float, float]:
+    """
+    Mesure le rappel@k et la latence moyenne d'une méthode de recherche.
+
+    Args:
+        search: Fonction (indice de requête) -> IDs classés (k + 1 au moins)
+        query_ids: ID du chunk utilisé comme requête (exclu des résultats), ou None
+        truth: Voisins exacts de chaque requête
+        k: Nombre de résultats évalués
+
+    Returns:
+        Tuple (rappel moyen, latence moyenne en ms)
+    """
+    found = 0
+    start = time.perf_counter()
+    results = [search(i) for i in range(len(truth))]
+    elapsed = time.perf_counter() - start
+
+    for query_id, ids, expected in zip(query_ids, results, truth):
+        ids = [chunk_id for chunk_id in ids if chunk_id != query_id][:k]
+        found += len(expected.intersection(ids))
+
+    total = sum(len(expected) for expected in truth)
+    return found / max(total, 1), elapsed / len(truth) * 1000
+
+
+def benchmark_vectors(
+    project: str,
+    n_queries: int = 200,
+    k: int = 10,
+    dimensions: Sequence[int] = (512, 256),
+    rescore_factors: Sequence[int] = (1, 4),
+    questions: Optional[List[str]] = None,
+    hnsw_m: Sequence[int] = (16, 32),
+    hnsw_ef: Sequence[int] = (16, 32, 64, 128, 256)
+) -> List[Dict[str, object]]:
+    """
+    Mesure le compromis rappel / latence / mémoire des options de stockage.
+
+    Args:
+        project: Nom du projet indexé
+        n_queries: Nombre de chunks tirés comme requêtes
+        k: Nombre de résultats évalués (rappel@k)
+        dimensions: Tailles d'embeddings raccourcis à évaluer
+        rescore_factors: Candidats rescorés par résultat (1 = sans rescoring)
+        questions: Questions réelles à utiliser comme requêtes
+        hnsw_m: Valeurs de M des graphes HNSW évalués
+        hnsw_ef: Valeurs de ef_search évaluées pour chaque graphe
+
+    Returns:
+        Liste de dicts (method, recall, latency_ms, memory_mb)
+    """
+    collection, ids, matrix = load_collection_vectors(project)
+    if not ids:
+        raise ValueError(f"Aucun vecteur dans l'index de '{project}'")
+
+    n, dim = matrix.shape
+    if questions:
+        from src.llm_providers import create_backend_embeddings, resolve_index_embeddings
+
+        embeddings = create_backend_embeddings(*resolve_index_embeddings(project))
+        queries = np.asarray(embeddings.embed_documents(questions), dtype=np.float32)
+        query_ids = [None] * len(queries)
+    else:
+        rng = np.random.RandomState(0)
+        rows = rng.choice(n, size=min(n_queries, n), replace=False)
+        queries = matrix[rows]
+        query_ids = [ids[row] for row in rows]
+
+    # Un voisin de plus: le chunk requête se trouve lui-même
+    fetch = k + 1
+    truth_rows = exact_top_k(matrix, queries, fetch)
+    truth = [
+        set([ids[row] for row in rows_ if ids[row] != query_id][:k])
+        for rows_, query_id in zip(truth_rows, query_ids)
+    ]
+
+    print(f"\n📐 {n} vecteurs de {dim} dimensions, {len(queries)} requêtes, rappel@{k}")
+    report = []
+
+    def record(method: str, search: Callable[[int], List[str]], memory: int):
+        recall, latency = _evaluate(search, query_ids, truth, k)
+        report.append({
+            "method": method,
+            "recall": recall,
+            "latency_ms": latency,
+            "memory_mb": memory / 1024 / 1024
+        })
+        print(f"  {method:32s} rappel {recall:6.1%}  {latency:7.2f} ms  {memory / 1024 / 1024:8.1f} Mo")
+
+    sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+    record(
+        "float32 exact",
+        lambda i: [ids[row] for row in exact_top_k(matrix, queries[i:i + 1], fetch, sq_norms)[0]],
+        matrix.nbytes
+    )
+    if isinstance(collection, HnswCollection):
+        store_name = f"index hnsw (ef={collection.ef_search})"
+    elif isinstance(collection, NumpyCollection):
+        store_name = "numpy (mmap)"
+    else:
+        store_name = "ChromaDB (HNSW)"
+    record(
+        store_name,
+        lambda i: collection.query(query_embeddings=[queries[i].tolist()], n_results=fetch, include=[])["ids"][0],
+        matrix.nbytes
+    )
+
+    row_of = {chunk_id: row for row, chunk_id in enumerate(ids)}
+    for quantization in ("float16", "int8"):
+        quantized = QuantizedVectors(quantization)
+        quantized.add(ids, matrix)
+        for factor in rescore_factors:
+            if factor <= 1:
+                record(quantization, lambda i: quantized.candidates(queries[i], fetch), quantized.nbytes)
+                continue
+
+            def search(i: int, factor: int = factor) -> List[str]:
+                # Chemin du store numpy quantifié: relecture des lignes candidates de la matrice
+                candidates = quantized.candidates(queries[i], fetch * factor)
+                ranked = rescore(queries[i], {chunk_id: matrix[row_of[chunk_id]] for chunk_id in candidates}, fetch)
+                return [chunk_id for chunk_id, _ in ranked]
+
+            record(f"{quantization} + rescoring x{factor}", search, quantized.nbytes)
+
+    for size in dimensions:
+        if size >= dim:
+            continue
+        short_matrix = truncate(matrix, size)
+        short_queries = truncate(queries, size)
+        short_norms = np.einsum("ij,ij->i", short_matrix, short_matrix)
+        record(
+            f"{size} dimensions",
+            lambda i: [
+                ids[row] for row in exact_top_k(short_matrix, short_queries[i:i + 1], fetch, short_norms)[0]
+            ],
+            short_matrix.nbytes
+        )
+        quantized = QuantizedVectors("int8")
+        quantized.add(ids, short_matrix)
+        record(
+            f"{size} dimensions int8",
+            lambda i: quantized.candidates(short_queries[i], fetch),
+            quantized.nbytes
+        )
+
+    if hnsw_m and hnsw_ef:
+        try:
+            import hnswlib
+        except ImportError:
+            print("  (hnswlib non installé: graphes HNSW ignorés)")
+            hnsw_m = ()
+
+    for m in hnsw_m:
+        graph = hnswlib.Index(space="l2", dim=dim)
+        graph.init_index(max_elements=n, ef_construction=DEFAULT_HNSW_EF_CONSTRUCTION, M=m)
+        start = time.perf_counter()
+        graph.add_items(matrix, np.arange(n))
+        print(f"  (graphe HNSW M={m} construit en {time.perf_counter() - start:.1f} s)")
+        # Vecteurs + liens du niveau 0 (2M voisins de 4 octets par nœud)
+        memory = matrix.nbytes + n * 2 * m * 4
+        for ef in hnsw_ef:
+            graph.set_ef(max(ef, fetch))
+            record(
+                f"HNSW M={m} ef={ef}",
+                lambda i: [ids[row] for row in graph.knn_query(queries[i], k=min(fetch, n))[0][0]],
+                memory
+            )
+
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.benchmark_vectors <nom_projet> [--queries N] [--k K] "
+              "[--dimensions 512,256] [--questions fichier.txt] [--hnsw-m 16,32] [--ef 16,64,256]")
+        sys.exit(1)
+
+    project = sys.argv[1]
+
+    def option_value(flag: str) -> Optional[str]:
+        """Valeur d'une option `--flag valeur` (None si absente)."""
+        if flag in sys.argv[2:]:
+            return sys.argv[sys.argv.index(flag) + 1]
+        return None
+
+    questions = None
+    if option_value("--questions"):
+        lines = Path(option_value("--questions")).read_text(encoding="utf-8").splitlines()
+        questions = [line.strip() for line in lines if line.strip()]
+
+    benchmark_vectors(
+        project,
+        n_queries=int(option_value("--queries") or 200),
+        k=int(option_value("--k") or 10),
+        dimensions=[int(size) for size in (option_value("--dimensions") or "512,256").split(",")],
+        questions=questions,
+        hnsw_m=[int(m) for m in (option_value("--hnsw-m") or "16,32").split(",")],
+        hnsw_ef=[int(ef) for ef in (option_value("--ef") or "16,32,64,128,256").split(",")]
+    )
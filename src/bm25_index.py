@@ -0,0 +1,933 @@
+"""
+Index BM25 persistant pour la recherche lexicale.
+
+L'index est construit par `ProjectIndexer` et sauvegardé à côté de la
+collection ChromaDB (db/<projet>/bm25_index.bin). Il est chargé une seule
+fois par processus, puis patché fichier par fichier lors des mises à jour
+incrémentales : les requêtes ne font que du scoring, sans re-tokeniser
+le corpus.
+
+Le fichier est un ChunkStore (src/chunk_store.py): textes, métadonnées
+et fréquences des termes (CSR par document) en colonnes, mappés en
+mémoire. Un index chargé sert les recherches directement depuis le
+fichier; seuls les chunks modifiés (indexeur) sont recopiés en entrées
+Python. Les anciens bm25_index.json restent lisibles.
+
+Un fichier mappé n'est jamais remplacé (impossible sous Windows tant
+qu'un lecteur le garde ouvert): chaque sauvegarde incrémentale écrit une
+nouvelle génération (bm25_index.1.bin, bm25_index.2.bin...), les
+lecteurs ouvrent la plus récente et les anciennes sont supprimées dès
+qu'elles ne sont plus ouvertes (voir `save_bm25_index`). Une génération
+incrémentale ne contient que les modifications depuis une génération
+complète (corpus de base), réécrite quand elles dépassent
+`DELTA_COMPACTION_RATIO` du corpus.
+
+Les textes sont découpés par un analyseur (src/analyzer.py: accents,
+ponctuation, mots vides, racines), une seule fois par chunk. Son nom est
+enregistré dans l'index: les requêtes sont analysées de la même façon
+que le corpus (les index antérieurs gardent le découpage sur les
+espaces jusqu'à leur reconstruction).
+
+Le scoring est assuré par `SparseBM25`: le corpus est stocké sous forme de
+matrice creuse termes x documents (CSR) contenant les poids BM25
+précalculés. Scorer une requête revient à sommer les lignes de ses
+termes, et plusieurs requêtes se scorent en un seul produit matriciel.
+"""
+import json
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.analyzer import DEFAULT_ANALYZER, get_analyzer
+from src.chunk_store import ChunkStore
+
+
+# Nom du fichier d'index dans db/<projet>/ (première génération)
+BM25_INDEX_FILENAME = "bm25_index.bin"
+
+# Générations suivantes: bm25_index.<n>.bin
+_GENERATION_PATTERN = re.compile(r"^bm25_index(?:\.(\d+))?\.bin$")
+
+# Part du corpus de base modifiée au-delà de laquelle une sauvegarde
+# réécrit l'index complet plutôt que les seules modifications
+DELTA_COMPACTION_RATIO = 0.25
+
+# Ancien format JSON (lu, plus écrit)
+LEGACY_BM25_INDEX_FILENAME = "bm25_index.json"
+
+# Version du format de sérialisation (1 = JSON, 2 = ChunkStore)
+BM25_INDEX_VERSION = 2
+
+
+def tokenize(text: str, analyzer: str = DEFAULT_ANALYZER) -> List[str]:
+    """
+    Découpe un texte en termes pour BM25.
+
+    Args:
+        text: Texte à découper
+        analyzer: Nom de l'analyseur (voir src/analyzer.py)
+
+    Returns:
+        Liste de termes
+    """
+    return get_analyzer(analyzer).analyze(text)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices des k meilleurs scores strictement positifs, triés.
+
+    Utilise argpartition (O(n)) puis ne trie que les k candidats.
+
+    Args:
+        scores: Scores de tous les documents
+        k: Nombre d'indices à retourner
+
+    Returns:
+        Indices triés par score décroissant
+    """
+    positive = np.flatnonzero(scores > 0)
+    if len(positive) > k:
+        part = np.argpartition(-scores[positive], k - 1)[:k]
+        positive = positive[part]
+    return positive[np.argsort(-scores[positive], kind="stable")]
+
+
+class SparseBM25:
+    """
+    Moteur BM25 vectorisé sur une matrice creuse termes x documents.
+
+    Les poids BM25 de chaque couple (terme, document) sont calculés une
+    fois à la construction. Le score d'une requête est le produit
+    creux de son vecteur de termes avec la matrice : seules les lignes
+    des termes de la requête sont lues.
+    """
+
+    def __init__(
+        self,
+        corpus_term_freqs: Sequence[Dict[str, int]],
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """
+        Construit la matrice BM25.
+
+        Args:
+            corpus_term_freqs: Fréquences des termes de chaque document
+            k1: Saturation de la fréquence des termes
+            b: Normalisation par la longueur du document
+        """
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+
+        indptr: List[int] = [0]
+        terms: List[int] = []
+        freqs: List[int] = []
+        for term_freqs in corpus_term_freqs:
+            for term, freq in term_freqs.items():
+                terms.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                freqs.append(freq)
+            indptr.append(len(terms))
+
+        self._set_weights(
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(terms, dtype=np.int32),
+            np.asarray(freqs, dtype=np.float32)
+        )
+
+    def _set_weights(self, indptr: np.ndarray, terms: np.ndarray, tf: np.ndarray):
+        """
+        Calcule la matrice des poids depuis les fréquences en CSR par document.
+
+        Args:
+            indptr: Début des termes de chaque document (num_docs + 1)
+            terms: Indice dans le vocabulaire de chaque (document, terme)
+            tf: Fréquence de chaque (document, terme)
+        """
+        k1, b = self.k1, self.b
+        self.num_docs = len(indptr) - 1
+        cols_arr = np.repeat(np.arange(self.num_docs, dtype=np.int32), np.diff(indptr))
+
+        doc_lengths = np.bincount(cols_arr, weights=tf, minlength=self.num_docs)
+        avgdl = doc_lengths.mean() if self.num_docs and doc_lengths.mean() > 0 else 1.0
+        doc_freqs = np.bincount(terms, minlength=len(self.vocabulary))
+
+        # IDF variante Lucene: toujours positive, même pour les termes fréquents
+        idf = np.log1p((self.num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        norm = k1 * (1 - b + b * doc_lengths[cols_arr] / avgdl)
+        weights = idf[terms] * tf * (k1 + 1) / (tf + norm)
+
+        # Les documents sont déjà les colonnes: CSC sans tri, puis CSR par terme
+        self.matrix = sparse.csc_matrix(
+            (weights.astype(np.float32), terms, indptr),
+            shape=(len(self.vocabulary), self.num_docs)
+        ).tocsr()
+
+    @classmethod
+    def from_tokenized(
+        cls,
+        corpus: Sequence[Sequence[str]],
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> "SparseBM25":
+        """Construit le moteur depuis des documents déjà tokenisés."""
+        return cls([Counter(tokens) for tokens in corpus], k1=k1, b=b)
+
+    @classmethod
+    def from_csr(
+        cls,
+        vocabulary: Sequence[str],
+        indptr: np.ndarray,
+        terms: np.ndarray,
+        counts: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75
+    ) -> "SparseBM25":
+        """
+        Construit le moteur depuis des fréquences déjà rangées par document
+        (format du ChunkStore), sans dictionnaire par document.
+
+        Args:
+            vocabulary: Termes, dans l'ordre des indices de `terms`
+            indptr: Début des termes de chaque document (num_docs + 1)
+            terms: Indice du terme de chaque (document, terme)
+            counts: Fréquence de chaque (document, terme)
+            k1: Saturation de la fréquence des termes
+            b: Normalisation par la longueur du document
+        """
+        engine = cls([], k1=k1, b=b)
+        engine.vocabulary = {term: idx for idx, term in enumerate(vocabulary)}
+        engine._set_weights(
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(terms, dtype=np.int32),
+            np.asarray(counts, dtype=np.float32)
+        )
+        return engine
+
+    def _query_matrix(self, queries: Sequence[Sequence[str]]) -> sparse.csr_matrix:
+        """Encode des requêtes en matrice creuse requêtes x termes."""
+        rows: List[int] = []
+        cols: List[int] = []
+        for query_idx, tokens in enumerate(queries):
+            for token in tokens:
+                term_idx = self.vocabulary.get(token)
+                if term_idx is not None:
+                    rows.append(query_idx)
+                    cols.append(term_idx)
+
+        # Les doublons (row, col) sont sommés: un terme répété compte plusieurs fois
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(queries), len(self.vocabulary))
+        )
+
+    def get_scores(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """
+        Scores BM25 de tous les documents pour une requête.
+
+        Args:
+            query_tokens: Termes de la requête
+
+        Returns:
+            Tableau (num_docs,) des scores
+        """
+        return self.get_scores_batch([query_tokens]).toarray().ravel()
+
+    def get_scores_batch(self, queries: Sequence[Sequence[str]]) -> sparse.csr_matrix:
+        """
+        Scores BM25 de plusieurs requêtes en un seul produit matriciel.
+
+        Args:
+            queries: Liste de requêtes tokenisées
+
+        Returns:
+            Matrice creuse (nb_requêtes, num_docs) des scores
+        """
+        return (self._query_matrix(queries) @ self.matrix).tocsr()
+
+    def top_k(self, query_tokens: Sequence[str], k: int) -> List[Tuple[int, float]]:
+        """
+        Les k documents les mieux notés pour une requête.
+
+        Args:
+            query_tokens: Termes de la requête
+            k: Nombre de résultats
+
+        Returns:
+            Liste de tuples (index document, score), score décroissant
+        """
+        return self.top_k_batch([query_tokens], k)[0]
+
+    def top_k_batch(
+        self,
+        queries: Sequence[Sequence[str]],
+        k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Les k meilleurs documents de chaque requête.
+
+        Seuls les scores non nuls de chaque ligne sont départagés.
+
+        Args:
+            queries: Liste de requêtes tokenisées
+            k: Nombre de résultats par requête
+
+        Returns:
+            Une liste de tuples (index document, score) par requête
+        """
+        scores = self.get_scores_batch(queries)
+        results = []
+        for query_idx in range(scores.shape[0]):
+            start, end = scores.indptr[query_idx], scores.indptr[query_idx + 1]
+            doc_indices = scores.indices[start:end]
+            row_scores = scores.data[start:end]
+            best = top_k_indices(row_scores, k)
+            results.append([(int(doc_indices[i]), float(row_scores[i])) for i in best])
+        return results
+
+
+def _read_entry(store: ChunkStore, row: int) -> Tuple[str, Dict[str, Any], Dict[str, int]]:
+    """Texte, métadonnées et fréquences des termes d'une ligne d'un ChunkStore."""
+    vocabulary = store.attributes["vocabulary"]
+    indptr = store.array("tf_indptr")
+    start, end = indptr[row], indptr[row + 1]
+    term_freqs = {
+        vocabulary[term]: count
+        for term, count in zip(
+            store.array("tf_terms")[start:end].tolist(),
+            store.array("tf_counts")[start:end].tolist()
+        )
+    }
+    return store.text(row), store.metadata(row), term_freqs
+
+
+class BM25Index:
+    """
+    Index inversé BM25 modifiable.
+
+    Chaque chunk est identifié par son ID ChromaDB. Les fréquences de
+    termes sont calculées une seule fois à l'ajout et persistées : le
+    rechargement reconstruit la matrice de scoring sans re-tokeniser.
+
+    Un index chargé depuis un ChunkStore lit textes, métadonnées et
+    fréquences dans le fichier mappé (corpus de base, jamais modifié).
+    Les chunks ajoutés ou modifiés sont gardés à part en entrées Python,
+    les chunks supprimés du corpus de base dans un ensemble d'IDs: une
+    modification ne coûte que la taille des chunks touchés.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, analyzer: str = DEFAULT_ANALYZER):
+        """
+        Initialise un index vide.
+
+        Args:
+            k1: Saturation de la fréquence des termes
+            b: Normalisation par la longueur du document
+            analyzer: Analyseur des chunks et des requêtes
+        """
+        self.k1 = k1
+        self.b = b
+        self.analyzer = get_analyzer(analyzer)
+
+        # chunk_id -> (texte, métadonnées, fréquences des termes), hors corpus de base
+        self._entries: Dict[str, Tuple[str, Dict[str, Any], Dict[str, int]]] = {}
+        # relative_path -> IDs des entrées du fichier (hors corpus de base)
+        self._ids_by_path: Dict[str, Set[str]] = {}
+        # Corpus de base chargé depuis le disque
+        self._store: Optional[ChunkStore] = None
+        # IDs du corpus de base supprimés ou remplacés par une entrée
+        self._removed: Set[str] = set()
+        # Fichier dont l'index est le contenu exact (None après une modification)
+        self._saved_path: Optional[Path] = None
+        
+        # Moteur de scoring, reconstruit paresseusement après modification
+        self._engine: Optional[SparseBM25] = None
+        self._engine_ids: List[str] = []
+
+    def __len__(self) -> int:
+        base = len(self._store) - len(self._removed) if self._store is not None else 0
+        return base + len(self._entries)
+
+    @property
+    def pending_changes(self) -> int:
+        """Chunks ajoutés, modifiés ou supprimés depuis le corpus de base."""
+        return len(self._entries) + len(self._removed)
+
+    def _modified(self):
+        """Invalide le moteur de scoring et l'état sauvegardé."""
+        self._engine = None
+        self._saved_path = None
+
+    def _base_row(self, chunk_id: str) -> Optional[int]:
+        """Ligne d'un chunk encore présent dans le corpus de base."""
+        if self._store is None or chunk_id in self._removed:
+            return None
+        return self._store.row(chunk_id)
+
+    def _add_entry(
+        self,
+        chunk_id: str,
+        text: str,
+        metadata: Dict[str, Any],
+        term_freqs: Dict[str, int]
+    ):
+        """Ajoute une entrée déjà tokenisée à l'index."""
+        if chunk_id in self._entries:
+            self.remove_ids([chunk_id])
+        elif self._base_row(chunk_id) is not None:
+            # Remplace la version du corpus de base
+            self._removed.add(chunk_id)
+
+        self._entries[chunk_id] = (text, metadata, term_freqs)
+        self._modified()
+
+        rel_path = metadata.get("relative_path")
+        if rel_path:
+            self._ids_by_path.setdefault(rel_path, set()).add(chunk_id)
+
+    def add_documents(self, documents: List[Document], ids: List[str]):
+        """
+        Ajoute des chunks à l'index.
+
+        Args:
+            documents: Chunks à indexer
+            ids: IDs ChromaDB correspondants
+        """
+        for chunk_id, doc in zip(ids, documents):
+            term_freqs = dict(Counter(self.analyzer.analyze(doc.page_content)))
+            self._add_entry(chunk_id, doc.page_content, dict(doc.metadata), term_freqs)
+
+    def remove_ids(self, ids: Iterable[str]):
+        """
+        Supprime des chunks de l'index.
+
+        Args:
+            ids: IDs des chunks à supprimer
+        """
+        removed_by_path: Dict[str, Set[str]] = {}
+        for chunk_id in ids:
+            entry = self._entries.pop(chunk_id, None)
+            if entry is not None:
+                rel_path = entry[1].get("relative_path")
+                if rel_path in self._ids_by_path:
+                    removed_by_path.setdefault(rel_path, set()).add(chunk_id)
+            elif self._base_row(chunk_id) is not None:
+                self._removed.add(chunk_id)
+            else:
+                continue
+            self._modified()
+
+        # Une seule différence d'ensembles par fichier
+        for rel_path, removed in removed_by_path.items():
+            remaining = self._ids_by_path[rel_path] - removed
+            if remaining:
+                self._ids_by_path[rel_path] = remaining
+            else:
+                del self._ids_by_path[rel_path]
+
+    def update_metadata(self, metadatas: Dict[str, Dict[str, Any]]):
+        """
+        Complète les métadonnées de chunks déjà indexés (sans re-tokeniser).
+
+        Args:
+            metadatas: Dict chunk_id -> métadonnées à fusionner
+        """
+        for chunk_id, metadata in metadatas.items():
+            entry = self._entries.get(chunk_id)
+            if entry is not None:
+                text, current, term_freqs = entry
+                self._entries[chunk_id] = (text, {**current, **metadata}, term_freqs)
+                self._modified()
+                continue
+
+            row = self._base_row(chunk_id)
+            if row is not None:
+                # Recopie du seul chunk modifié depuis le corpus de base
+                text, current, term_freqs = _read_entry(self._store, row)
+                self._add_entry(chunk_id, text, {**current, **metadata}, term_freqs)
+
+    def remove_file(self, relative_path: str) -> int:
+        """
+        Supprime tous les chunks d'un fichier.
+
+        Args:
+            relative_path: Chemin relatif du fichier
+
+        Returns:
+            Nombre de chunks supprimés
+        """
+        ids = self._ids_by_path.pop(relative_path, set())
+        if self._store is not None:
+            ids = ids | {
+                chunk_id for chunk_id in self._store.ids_where("relative_path", relative_path)
+                if chunk_id not in self._removed
+            }
+        self.remove_ids(ids)
+        return len(ids)
+
+    def get_document(self, chunk_id: str) -> Optional[Document]:
+        """
+        Retourne un chunk par son ID (accès direct, sans parcours).
+
+        Args:
+            chunk_id: ID du chunk
+
+        Returns:
+            Document ou None si le chunk n'est pas indexé
+        """
+        entry = self._entries.get(chunk_id)
+        if entry is not None:
+            return Document(page_content=entry[0], metadata=dict(entry[1]))
+
+        row = self._base_row(chunk_id)
+        if row is None:
+            return None
+        return self._store.record(row).to_document()
+
+    def _entries_csr(
+        self,
+        vocabulary: Dict[str, int]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fréquences des entrées en CSR par document.
+
+        Args:
+            vocabulary: Terme -> indice, complété avec les nouveaux termes
+
+        Returns:
+            Tuple (nombre de termes par entrée, termes, fréquences)
+        """
+        lengths: List[int] = []
+        terms: List[int] = []
+        counts: List[int] = []
+        for _, _, term_freqs in self._entries.values():
+            for term, count in term_freqs.items():
+                terms.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+            lengths.append(len(term_freqs))
+        return (
+            np.asarray(lengths, dtype=np.int64),
+            np.asarray(terms, dtype=np.int32),
+            np.asarray(counts, dtype=np.int32)
+        )
+
+    def _merged_csr(self) -> Tuple[List[str], List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fréquences du corpus courant en CSR par document.
+
+        Lignes encore présentes du corpus de base (tableaux du fichier
+        filtrés en bloc), puis entrées.
+
+        Returns:
+            Tuple (vocabulaire, IDs, indptr, termes, fréquences)
+        """
+        vocabulary: Dict[str, int] = {}
+        ids: List[str] = []
+        lengths, terms, counts = [], [], []
+        if self._store is not None:
+            store = self._store
+            vocabulary = {term: idx for idx, term in enumerate(store.attributes["vocabulary"])}
+            keep = np.ones(len(store), dtype=bool)
+            keep[np.asarray([store.row(chunk_id) for chunk_id in self._removed], dtype=np.int64)] = False
+            row_lengths = np.diff(store.array("tf_indptr"))
+            kept_terms = np.repeat(keep, row_lengths)
+            lengths.append(row_lengths[keep])
+            terms.append(store.array("tf_terms")[kept_terms])
+            counts.append(store.array("tf_counts")[kept_terms])
+            ids = [store.ids[row] for row in np.flatnonzero(keep).tolist()]
+
+        entry_lengths, entry_terms, entry_counts = self._entries_csr(vocabulary)
+        lengths.append(entry_lengths)
+        terms.append(entry_terms)
+        counts.append(entry_counts)
+        ids.extend(self._entries)
+
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.concatenate(lengths))
+        return (
+            list(vocabulary),
+            ids,
+            indptr,
+            np.concatenate(terms).astype(np.int32),
+            np.concatenate(counts).astype(np.int32)
+        )
+
+    def _get_engine(self) -> SparseBM25:
+        """Construit (si nécessaire) la matrice de scoring."""
+        if self._engine is None and self._store is not None and not self.pending_changes:
+            self._engine_ids = self._store.ids
+            self._engine = SparseBM25.from_csr(
+                self._store.attributes["vocabulary"],
+                self._store.array("tf_indptr"),
+                self._store.array("tf_terms"),
+                self._store.array("tf_counts"),
+                k1=self.k1,
+                b=self.b
+            )
+        elif self._engine is None:
+            vocabulary, self._engine_ids, indptr, terms, counts = self._merged_csr()
+            self._engine = SparseBM25.from_csr(vocabulary, indptr, terms, counts, k1=self.k1, b=self.b)
+        return self._engine
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+        """
+        Retourne les k chunks les mieux notés.
+
+        Args:
+            query: Requête de recherche
+            k: Nombre de résultats
+
+        Returns:
+            Liste de tuples (Document, score) triés par score décroissant
+        """
+        return self.search_batch([query], k)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 5
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Recherche plusieurs requêtes en un seul appel matriciel.
+
+        Args:
+            queries: Requêtes de recherche
+            k: Nombre de résultats par requête
+
+        Returns:
+            Une liste de tuples (Document, score) par requête
+        """
+        return [
+            [(self.get_document(chunk_id), score) for chunk_id, score in query_hits]
+            for query_hits in self.search_ids_batch(queries, k)
+        ]
+
+    def search_ids_batch(
+        self,
+        queries: List[str],
+        k: int = 5
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Comme search_batch, mais retourne les IDs des chunks (sans copie).
+
+        Args:
+            queries: Requêtes de recherche
+            k: Nombre de résultats par requête
+
+        Returns:
+            Une liste de tuples (chunk_id, score) par requête
+        """
+        if not len(self):
+            return [[] for _ in queries]
+
+        engine = self._get_engine()
+        hits = engine.top_k_batch([self.analyzer.analyze_query(query) for query in queries], k)
+        return [
+            [(self._engine_ids[doc_idx], score) for doc_idx, score in query_hits]
+            for query_hits in hits
+        ]
+
+    def _attributes(self, vocabulary: List[str], **extra: Any) -> Dict[str, Any]:
+        """En-tête d'un fichier d'index."""
+        return {
+            "bm25_version": BM25_INDEX_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "analyzer": self.analyzer.name,
+            "vocabulary": vocabulary,
+            **extra
+        }
+
+    def save(self, path: Path):
+        """
+        Sauvegarde l'index complet sur disque (ChunkStore, écriture atomique).
+
+        Args:
+            path: Chemin du fichier
+        """
+        vocabulary, ids, indptr, terms, counts = self._merged_csr()
+        # Vocabulaire réduit aux termes encore présents
+        used, terms = np.unique(terms, return_inverse=True)
+
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for chunk_id in ids:
+            entry = self._entries.get(chunk_id)
+            if entry is None:
+                row = self._store.row(chunk_id)
+                entry = (self._store.text(row), self._store.metadata(row))
+            texts.append(entry[0])
+            metadatas.append(entry[1])
+
+        ChunkStore.write(
+            path,
+            ids=ids,
+            texts=texts,
+            metadatas=metadatas,
+            arrays={
+                "tf_indptr": indptr,
+                "tf_terms": terms.astype(np.int32),
+                "tf_counts": counts
+            },
+            attributes=self._attributes([vocabulary[term] for term in used.tolist()])
+        )
+        self._saved_path = Path(path)
+
+    def save_delta(self, path: Path):
+        """
+        Sauvegarde les seules modifications depuis le corpus de base.
+
+        Le fichier écrit désigne le fichier du corpus de base (même
+        dossier) et contient les entrées et les IDs supprimés.
+
+        Args:
+            path: Chemin du fichier
+        """
+        if self._store is None:
+            raise ValueError("Index sans corpus de base: utiliser save()")
+
+        vocabulary: Dict[str, int] = {}
+        lengths, terms, counts = self._entries_csr(vocabulary)
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(lengths)
+
+        ChunkStore.write(
+            path,
+            ids=list(self._entries),
+            texts=[text for text, _, _ in self._entries.values()],
+            metadatas=[metadata for _, metadata, _ in self._entries.values()],
+            arrays={"tf_indptr": indptr, "tf_terms": terms, "tf_counts": counts},
+            attributes=self._attributes(
+                list(vocabulary),
+                base=self._store.path.name,
+                removed=sorted(self._removed)
+            )
+        )
+        self._saved_path = Path(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        """
+        Charge un index sauvegardé.
+
+        Args:
+            path: Chemin du fichier (ChunkStore, ou ancien fichier JSON)
+
+        Returns:
+            BM25Index prêt pour le scoring
+        """
+        if Path(path).suffix == ".json":
+            return cls._load_json(path)
+
+        store = ChunkStore(path)
+        if store.attributes.get("bm25_version") != BM25_INDEX_VERSION:
+            raise ValueError(f"Version d'index BM25 non supportée: {store.attributes.get('bm25_version')}")
+
+        index = cls(
+            k1=store.attributes.get("k1", 1.5),
+            b=store.attributes.get("b", 0.75),
+            analyzer=store.attributes.get("analyzer", "whitespace")
+        )
+        base = store.attributes.get("base")
+        if base is None:
+            index._store = store
+        else:
+            # Fichier de modifications: corpus de base + entrées
+            index._store = ChunkStore(Path(path).parent / base)
+            index._removed = set(store.attributes["removed"])
+            for row in range(len(store)):
+                index._add_entry(store.ids[row], *_read_entry(store, row))
+        index._saved_path = Path(path)
+        return index
+
+    @classmethod
+    def _load_json(cls, path: Path) -> "BM25Index":
+        """Charge un index au format JSON (version 1)."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != 1:
+            raise ValueError(f"Version d'index BM25 non supportée: {data.get('version')}")
+
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75), analyzer="whitespace")
+        for entry in data["documents"]:
+            index._add_entry(entry["id"], entry["text"], entry["metadata"], entry["tf"])
+        return index
+
+    @classmethod
+    def from_collection(cls, collection) -> "BM25Index":
+        """
+        Construit l'index depuis une collection ChromaDB existante.
+
+        Utilisé pour migrer les index créés avant l'introduction
+        de l'index BM25 persistant.
+
+        Args:
+            collection: Collection ChromaDB
+
+        Returns:
+            BM25Index construit
+        """
+        results = collection.get(include=["documents", "metadatas"])
+
+        index = cls()
+        documents = []
+        ids = []
+        for chunk_id, text, metadata in zip(
+            results.get("ids", []),
+            results.get("documents", []),
+            results.get("metadatas", [])
+        ):
+            if text:
+                documents.append(Document(page_content=text, metadata=metadata or {}))
+                ids.append(chunk_id)
+        index.add_documents(documents, ids)
+        return index
+
+
+def _index_generations(db_path: Path) -> List[Tuple[int, Path]]:
+    """Fichiers d'index d'un dossier, du plus ancien au plus récent."""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        return []
+    generations = []
+    for entry in db_path.iterdir():
+        match = _GENERATION_PATTERN.match(entry.name)
+        if match:
+            generations.append((int(match.group(1) or 0), entry))
+    return sorted(generations)
+
+
+def bm25_index_path(db_path: Path) -> Optional[Path]:
+    """
+    Fichier de l'index BM25 courant d'un dossier d'index.
+
+    Args:
+        db_path: Dossier de l'index
+
+    Returns:
+        Dernière génération, ancien fichier JSON, ou None si aucun index
+    """
+    generations = _index_generations(db_path)
+    if generations:
+        return generations[-1][1]
+    legacy_path = Path(db_path) / LEGACY_BM25_INDEX_FILENAME
+    return legacy_path if legacy_path.exists() else None
+
+
+def save_bm25_index(index: BM25Index, db_path: Path) -> Path:
+    """
+    Sauvegarde un index BM25 dans une nouvelle génération.
+
+    Le fichier courant peut être mappé par des lecteurs: il n'est pas
+    réécrit. Un index chargé depuis ce dossier et peu modifié n'écrit que
+    ses modifications (le corpus de base est gardé), un index inchangé
+    n'écrit rien. Les générations précédentes (et l'ancien fichier JSON)
+    sont supprimées; celles encore ouvertes (Windows) le seront à la
+    prochaine sauvegarde.
+
+    Args:
+        index: Index à sauvegarder
+        db_path: Dossier de l'index
+
+    Returns:
+        Chemin du fichier écrit
+    """
+    db_path = Path(db_path)
+    previous = _index_generations(db_path)
+    if previous and index._saved_path is not None and index._saved_path.resolve() == previous[-1][1].resolve():
+        return previous[-1][1]
+
+    generation = previous[-1][0] + 1 if previous else 0
+    filename = BM25_INDEX_FILENAME if generation == 0 else f"bm25_index.{generation}.bin"
+    path = db_path / filename
+
+    base = index._store.path if index._store is not None else None
+    if (
+        base is not None
+        and base.parent.resolve() == db_path.resolve()
+        and base.exists()
+        and index.pending_changes <= DELTA_COMPACTION_RATIO * len(index._store)
+    ):
+        index.save_delta(path)
+    else:
+        index.save(path)
+        base = None
+
+    for _, old_path in previous:
+        if base is not None and old_path.resolve() == base.resolve():
+            continue  # Corpus de base de la nouvelle génération
+        try:
+            old_path.unlink()
+        except OSError:
+            pass  # Encore mappé par un lecteur (Windows)
+    (db_path / LEGACY_BM25_INDEX_FILENAME).unlink(missing_ok=True)
+    return path
+
+
+# Cache des index chargés: dossier -> (fichier, mtime, index)
+_loaded_indexes: Dict[str, Tuple[Path, int, BM25Index]] = {}
+_loaded_lock = threading.Lock()
+
+
+def load_bm25_index(db_path: Path) -> Optional[BM25Index]:
+    """
+    Charge l'index BM25 d'un projet (une seule fois par processus).
+
+    L'index est rechargé uniquement si une nouvelle génération a été
+    écrite depuis le dernier chargement (ex: après une réindexation).
+    L'index remplacé n'est plus référencé par le cache: son fichier est
+    libéré avec les derniers rechercheurs qui l'utilisent.
+
+    Args:
+        db_path: Dossier de l'index (db/<projet>)
+
+    Returns:
+        BM25Index ou None si aucun index n'a été construit
+    """
+    key = str(Path(db_path).resolve())
+
+    # Une génération peut être supprimée entre la liste et l'ouverture
+    for _ in range(3):
+        path = bm25_index_path(db_path)
+        if path is None:
+            return None
+
+        try:
+            mtime = path.stat().st_mtime_ns
+            with _loaded_lock:
+                cached = _loaded_indexes.get(key)
+                if cached and cached[0] == path and cached[1] == mtime:
+                    return cached[2]
+
+                index = BM25Index.load(path)
+                _loaded_indexes[key] = (path, mtime, index)
+                return index
+        except FileNotFoundError:
+            continue
+    return None
+
+
+class PersistentBM25Retriever(BaseRetriever):
+    """Retriever LangChain adossé à un BM25Index déjà construit."""
+
+    index: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in self.index.search(query, k=self.k)]
@@ -0,0 +1,266 @@
+"""
+Stockage compact et colonnaire des chunks d'un index (textes + métadonnées).
+
+Un seul fichier binaire, mappé en mémoire à l'ouverture:
+- les textes sont concaténés dans un tampon UTF-8 contigu, repérés par
+  un tableau d'offsets (un chunk = une tranche du tampon, décodée à la
+  demande);
+- les métadonnées sont rangées par colonnes internées: chaque clé a sa
+  table de valeurs distinctes et chaque chunk un code (int32) par clé,
+  -1 si la clé est absente. Les valeurs répétées (fichier source, type,
+  catégorie...) ne sont stockées qu'une fois;
+- d'autres tableaux numpy nommés peuvent être ajoutés (ex: fréquences
+  des termes de l'index BM25, voir src/bm25_index.py).
+
+Ouvrir un fichier ne lit que l'en-tête (IDs, tables de valeurs): les
+tableaux sont des vues sur le fichier mappé, partagées par le cache de
+pages entre les workers. Aucun objet n'est créé par chunk avant d'y
+accéder.
+
+Format: `MAGIC`, longueur de l'en-tête (uint64), en-tête JSON, puis les
+tableaux alignés sur 8 octets (positions décrites dans l'en-tête).
+"""
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from langchain_core.documents import Document
+
+
+# Signature et version du format
+CHUNK_STORE_MAGIC = b"ECRCHNK1"
+CHUNK_STORE_VERSION = 1
+
+_ALIGNMENT = 8
+
+
+class ChunkRecord:
+    """Chunk lu dans un ChunkStore."""
+
+    __slots__ = ("id", "text", "metadata")
+
+    def __init__(self, chunk_id: str, text: str, metadata: Dict[str, Any]):
+        self.id = chunk_id
+        self.text = text
+        self.metadata = metadata
+
+    def to_document(self) -> Document:
+        """Convertit le chunk en Document LangChain."""
+        return Document(page_content=self.text, metadata=self.metadata)
+
+
+def _padding(size: int) -> int:
+    """Octets à ajouter pour aligner une position."""
+    return -size % _ALIGNMENT
+
+
+class ChunkStore:
+    """
+    Corpus en lecture seule, mappé en mémoire.
+
+    Accès direct par ligne ou par ID (dictionnaire ID -> ligne), sans
+    parcours. Les textes et métadonnées sont reconstruits à la demande.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Ouvre un fichier écrit par ChunkStore.write.
+
+        Args:
+            path: Chemin du fichier
+        """
+        self.path = Path(path)
+
+        with open(self.path, "rb") as f:
+            if f.read(len(CHUNK_STORE_MAGIC)) != CHUNK_STORE_MAGIC:
+                raise ValueError(f"Fichier de chunks invalide: {self.path}")
+            (header_size,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_size).decode("utf-8"))
+            if header.get("version") != CHUNK_STORE_VERSION:
+                raise ValueError(f"Version de fichier de chunks non supportée: {header.get('version')}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._data_start = len(CHUNK_STORE_MAGIC) + 8 + header_size + _padding(header_size)
+        self._arrays_info: Dict[str, Dict[str, Any]] = header["arrays"]
+
+        self.ids: List[str] = header["ids"]
+        self.metadata_keys: List[str] = header["metadata_keys"]
+        self._metadata_values: List[List[Any]] = header["metadata_values"]
+        self.attributes: Dict[str, Any] = header.get("attributes", {})
+
+        self._offsets = self.array("offsets")
+        self._codes = self.array("metadata_codes")
+        self._text_start = self._data_start + self._arrays_info["text"]["offset"]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[ChunkRecord]:
+        for row in range(len(self.ids)):
+            yield self.record(row)
+
+    def array(self, name: str) -> np.ndarray:
+        """
+        Tableau nommé du fichier (vue en lecture seule, sans copie).
+
+        Args:
+            name: Nom du tableau
+
+        Returns:
+            Tableau numpy adossé au fichier mappé
+        """
+        info = self._arrays_info[name]
+        shape = tuple(info["shape"])
+        return np.frombuffer(
+            self._mmap,
+            dtype=np.dtype(info["dtype"]),
+            count=int(np.prod(shape)),
+            offset=self._data_start + info["offset"]
+        ).reshape(shape)
+
+    def has_array(self, name: str) -> bool:
+        """Indique si le fichier contient un tableau."""
+        return name in self._arrays_info
+
+    def row(self, chunk_id: str) -> Optional[int]:
+        """Ligne d'un chunk (None s'il est absent)."""
+        return self._rows.get(chunk_id)
+
+    def text(self, row: int) -> str:
+        """Texte d'un chunk."""
+        start = self._text_start + int(self._offsets[row])
+        end = self._text_start + int(self._offsets[row + 1])
+        return self._mmap[start:end].decode("utf-8")
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        """Métadonnées d'un chunk (nouveau dict, valeurs internées partagées)."""
+        return {
+            key: values[code]
+            for key, values, code in zip(self.metadata_keys, self._metadata_values, self._codes[row].tolist())
+            if code >= 0
+        }
+
+    def ids_where(self, key: str, value: Any) -> List[str]:
+        """
+        IDs des chunks dont une métadonnée vaut une valeur donnée.
+
+        Compare les codes internés de la colonne, sans décoder les
+        métadonnées des chunks.
+
+        Args:
+            key: Clé de métadonnée
+            value: Valeur recherchée
+
+        Returns:
+            IDs des chunks, dans l'ordre des lignes
+        """
+        if key not in self.metadata_keys:
+            return []
+        column = self.metadata_keys.index(key)
+        try:
+            code = self._metadata_values[column].index(value)
+        except ValueError:
+            return []
+        return [self.ids[row] for row in np.flatnonzero(self._codes[:, column] == code).tolist()]
+
+    def record(self, row: int) -> ChunkRecord:
+        """Chunk complet d'une ligne."""
+        return ChunkRecord(self.ids[row], self.text(row), self.metadata(row))
+
+    def get(self, chunk_id: str) -> Optional[ChunkRecord]:
+        """
+        Chunk par son ID.
+
+        Args:
+            chunk_id: ID du chunk
+
+        Returns:
+            ChunkRecord ou None si absent
+        """
+        row = self._rows.get(chunk_id)
+        return None if row is None else self.record(row)
+
+    @staticmethod
+    def write(
+        path: Path,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        arrays: Optional[Dict[str, np.ndarray]] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Écrit un corpus (écriture atomique).
+
+        Args:
+            path: Chemin du fichier
+            ids: IDs des chunks
+            texts: Textes, dans le même ordre
+            metadatas: Métadonnées (valeurs JSON), dans le même ordre
+            arrays: Tableaux supplémentaires à stocker
+            attributes: Données JSON libres gardées dans l'en-tête
+        """
+        encoded = [text.encode("utf-8") for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+
+        # Colonnes internées: clé -> (valeur JSON -> code)
+        columns: Dict[str, Dict[str, int]] = {}
+        values: Dict[str, List[Any]] = {}
+        for metadata in metadatas:
+            for key in metadata:
+                if key not in columns:
+                    columns[key] = {}
+                    values[key] = []
+        keys = list(columns)
+        key_index = {key: j for j, key in enumerate(keys)}
+
+        codes = np.full((len(ids), len(keys)), -1, dtype=np.int32)
+        for row, metadata in enumerate(metadatas):
+            for key, value in metadata.items():
+                interned = columns[key]
+                token = json.dumps(value, sort_keys=True, ensure_ascii=False)
+                code = interned.get(token)
+                if code is None:
+                    code = interned[token] = len(values[key])
+                    values[key].append(value)
+                codes[row, key_index[key]] = code
+
+        blocks = {
+            "offsets": offsets,
+            "metadata_codes": codes,
+            "text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            **{name: np.ascontiguousarray(array) for name, array in (arrays or {}).items()}
+        }
+        layout = {}
+        position = 0
+        for name, array in blocks.items():
+            layout[name] = {"offset": position, "dtype": array.dtype.str, "shape": list(array.shape)}
+            position += array.nbytes + _padding(array.nbytes)
+
+        header = json.dumps({
+            "version": CHUNK_STORE_VERSION,
+            "ids": list(ids),
+            "metadata_keys": keys,
+            "metadata_values": [values[key] for key in keys],
+            "arrays": layout,
+            "attributes": attributes or {}
+        }, ensure_ascii=False).encode("utf-8")
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(CHUNK_STORE_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header + b"\0" * _padding(len(header)))
+            for array in blocks.values():
+                f.write(array.tobytes())
+                f.write(b"\0" * _padding(array.nbytes))
+        os.replace(tmp_path, path)
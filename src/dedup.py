@@ -0,0 +1,415 @@
+"""
+Élimination des chunks quasi identiques avant l'embedding (MinHash/LSH).
+
+Les notes copiées, les modèles Obsidian et les blocs répétés des fiches
+de personnages produisent des chunks presque identiques. Chaque chunk
+reçoit une signature MinHash de ses 5-grammes de mots; les signatures
+sont rangées par bandes (LSH) pour ne comparer un chunk qu'aux chunks
+susceptibles de lui ressembler. Un chunk dont la similarité estimée
+(Jaccard) avec un chunk déjà indexé dépasse le seuil n'est ni embeddé
+ni stocké: le chunk conservé liste les fichiers de ses doublons dans la
+métadonnée `duplicate_sources`.
+
+L'index est sauvegardé avec la version d'index
+(db/<projet>/<version>/near_duplicates.npz) et patché lors des mises à
+jour incrémentales, comme l'index BM25.
+"""
+import json
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from langchain_core.documents import Document
+
+
+# Nom du fichier d'index dans le dossier de la version
+DEDUP_INDEX_FILENAME = "near_duplicates.npz"
+
+# Version du format de sérialisation
+DEDUP_INDEX_VERSION = 1
+
+# Similarité de Jaccard estimée au-delà de laquelle deux chunks sont fusionnés
+DEFAULT_DEDUP_THRESHOLD = 0.9
+
+# Séparateur des chemins dans la métadonnée duplicate_sources
+SOURCES_SEPARATOR = "; "
+
+_SHIFT = np.uint64(32)
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """
+    Hash stables (CRC32) des n-grammes de mots d'un texte.
+
+    Args:
+        text: Texte du chunk
+        size: Nombre de mots par n-gramme
+
+    Returns:
+        Tableau uint64 des hash distincts
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        shingles = {" ".join(words) or text.strip()}
+    else:
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+class NearDuplicateIndex:
+    """
+    Index LSH des signatures MinHash des chunks stockés.
+
+    Chaque chunk conservé (représentant) garde la liste des fichiers
+    dont un chunk lui a été fusionné.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_DEDUP_THRESHOLD,
+        num_perm: int = 128,
+        bands: int = 16
+    ):
+        """
+        Initialise un index vide.
+
+        Args:
+            threshold: Similarité minimale pour fusionner deux chunks
+            num_perm: Nombre de permutations MinHash (taille des signatures)
+            bands: Nombre de bandes LSH (num_perm doit en être un multiple)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # Fonctions de hachage fixes (multiplication-décalage): les
+        # signatures restent comparables entre exécutions
+        rng = np.random.RandomState(1)
+        max_uint64 = np.iinfo(np.uint64).max
+        self._a = rng.randint(0, max_uint64, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.randint(0, max_uint64, size=num_perm, dtype=np.uint64)
+
+        # chunk_id -> (signature, relative_path)
+        self._entries: Dict[str, tuple] = {}
+        # clé de bande -> IDs des chunks
+        self._buckets: Dict[int, List[str]] = {}
+        # chunk_id -> chemins des doublons fusionnés
+        self._duplicates: Dict[str, List[str]] = {}
+
+        # Représentants dont la liste de doublons doit être réécrite
+        self._dirty: Set[str] = set()
+        # Chunks fusionnés depuis la création de l'index
+        self.collapsed = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Signature MinHash d'un texte.
+
+        Args:
+            text: Texte du chunk
+
+        Returns:
+            Tableau uint32 de num_perm valeurs
+        """
+        hashes = shingle_hashes(text)
+        # Produits modulo 2^64, 32 bits de poids fort
+        permuted = (np.outer(hashes, self._a) + self._b) >> _SHIFT
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        """Clés LSH d'une signature (une par bande)."""
+        return [
+            hash((band, signature[band * self.rows:(band + 1) * self.rows].tobytes()))
+            for band in range(self.bands)
+        ]
+
+    def _add_entry(self, chunk_id: str, signature: np.ndarray, relative_path: str):
+        """Ajoute un représentant à l'index."""
+        if chunk_id in self._entries:
+            self.remove_ids([chunk_id])
+
+        self._entries[chunk_id] = (signature, relative_path)
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(chunk_id)
+
+    def find(self, signature: np.ndarray) -> Optional[str]:
+        """
+        Cherche le représentant le plus proche d'une signature.
+
+        Args:
+            signature: Signature MinHash du chunk
+
+        Returns:
+            ID du représentant dont la similarité estimée atteint le
+            seuil, ou None
+        """
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best_id, best_score = None, self.threshold
+        for chunk_id in candidates:
+            score = float(np.mean(self._entries[chunk_id][0] == signature))
+            if score >= best_score:
+                best_id, best_score = chunk_id, score
+        return best_id
+
+    def collapse(self, chunk_id: str, chunk: Document) -> bool:
+        """
+        Enregistre un chunk: nouveau représentant ou doublon.
+
+        Args:
+            chunk_id: ID ChromaDB du chunk
+            chunk: Chunk avec la métadonnée relative_path
+
+        Returns:
+            True si le chunk est un doublon (à ne pas embedder ni stocker)
+        """
+        relative_path = chunk.metadata.get("relative_path", "")
+        signature = self.signature(chunk.page_content)
+
+        representative = self.find(signature)
+        if representative is None or representative == chunk_id:
+            self._add_entry(chunk_id, signature, relative_path)
+            return False
+
+        self._duplicates.setdefault(representative, []).append(relative_path)
+        self._dirty.add(representative)
+        self.collapsed += 1
+        return True
+
+    def remove_ids(self, ids: Iterable[str]):
+        """
+        Supprime des représentants (chunks supprimés de la collection).
+
+        Args:
+            ids: IDs des chunks supprimés
+        """
+        for chunk_id in ids:
+            entry = self._entries.pop(chunk_id, None)
+            if entry is None:
+                continue
+
+            for key in self._band_keys(entry[0]):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.remove(chunk_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+            self._duplicates.pop(chunk_id, None)
+            self._dirty.discard(chunk_id)
+
+    def remove_files(self, relative_paths: Iterable[str]):
+        """
+        Oublie des fichiers supprimés: leurs représentants et leurs doublons.
+
+        Args:
+            relative_paths: Chemins relatifs des fichiers
+        """
+        paths = set(relative_paths)
+        self.remove_ids([
+            chunk_id for chunk_id, (_, path) in self._entries.items() if path in paths
+        ])
+        self.forget_duplicates(paths)
+
+    def forget_duplicates(self, relative_paths: Iterable[str]):
+        """
+        Retire des fichiers des listes de doublons (avant leur réindexation).
+
+        Args:
+            relative_paths: Chemins relatifs des fichiers
+        """
+        paths = set(relative_paths)
+        for chunk_id, sources in list(self._duplicates.items()):
+            remaining = [path for path in sources if path not in paths]
+            if len(remaining) == len(sources):
+                continue
+            if remaining:
+                self._duplicates[chunk_id] = remaining
+            else:
+                del self._duplicates[chunk_id]
+            self._dirty.add(chunk_id)
+
+    def dependent_files(self, relative_paths: Iterable[str]) -> Set[str]:
+        """
+        Fichiers dont des chunks ont été fusionnés dans ceux de `relative_paths`.
+
+        Si ces représentants disparaissent, ces fichiers doivent être
+        réindexés pour que leur contenu reste présent dans l'index.
+
+        Args:
+            relative_paths: Chemins relatifs des fichiers modifiés ou supprimés
+
+        Returns:
+            Chemins relatifs des fichiers dépendants
+        """
+        paths = set(relative_paths)
+        dependents = set()
+        for chunk_id, sources in self._duplicates.items():
+            if self._entries[chunk_id][1] in paths:
+                dependents.update(sources)
+        return dependents - paths
+
+    def duplicate_metadata(self, chunk_id: str) -> Dict[str, object]:
+        """
+        Métadonnées de doublons d'un représentant.
+
+        Args:
+            chunk_id: ID du représentant
+
+        Returns:
+            Dict avec duplicate_sources (chemins séparés par "; ") et
+            duplicate_count
+        """
+        sources = self._duplicates.get(chunk_id, [])
+        return {
+            "duplicate_sources": SOURCES_SEPARATOR.join(dict.fromkeys(sources)),
+            "duplicate_count": len(sources)
+        }
+
+    def representative_metadata(self, ids: Iterable[str]) -> Dict[str, Dict[str, object]]:
+        """
+        Métadonnées de doublons des représentants parmi `ids`.
+
+        Args:
+            ids: IDs de chunks
+
+        Returns:
+            Dict chunk_id -> métadonnées, pour les chunks ayant des doublons
+        """
+        return {
+            chunk_id: self.duplicate_metadata(chunk_id)
+            for chunk_id in ids if chunk_id in self._duplicates
+        }
+
+    def take_dirty(self) -> Dict[str, Dict[str, object]]:
+        """
+        Représentants dont les doublons ont changé depuis le dernier appel.
+
+        Returns:
+            Dict chunk_id -> métadonnées de doublons à écrire
+        """
+        dirty = {
+            chunk_id: self.duplicate_metadata(chunk_id)
+            for chunk_id in self._dirty if chunk_id in self._entries
+        }
+        self._dirty.clear()
+        return dirty
+
+    def save(self, path: Path):
+        """
+        Sauvegarde l'index sur disque (écriture atomique).
+
+        Args:
+            path: Chemin du fichier .npz
+        """
+        ids = list(self._entries)
+        signatures = (
+            np.stack([self._entries[chunk_id][0] for chunk_id in ids])
+            if ids else np.zeros((0, self.num_perm), dtype=np.uint32)
+        )
+        header = {
+            "version": DEDUP_INDEX_VERSION,
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "paths": [self._entries[chunk_id][1] for chunk_id in ids],
+            "duplicates": self._duplicates
+        }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.array(ids, dtype=str),
+                signatures=signatures,
+                header=np.array(json.dumps(header, ensure_ascii=False))
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "NearDuplicateIndex":
+        """
+        Charge un index sauvegardé.
+
+        Args:
+            path: Chemin du fichier .npz
+
+        Returns:
+            NearDuplicateIndex
+        """
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            if header.get("version") != DEDUP_INDEX_VERSION:
+                raise ValueError(f"Version d'index de doublons non supportée: {header.get('version')}")
+
+            index = cls(header["threshold"], header["num_perm"], header["bands"])
+            for chunk_id, signature, path_ in zip(data["ids"], data["signatures"], header["paths"]):
+                index._add_entry(str(chunk_id), signature, path_)
+
+        index._duplicates = {
+            chunk_id: sources
+            for chunk_id, sources in header["duplicates"].items()
+            if chunk_id in index._entries
+        }
+        return index
+
+    @classmethod
+    def from_collection(
+        cls,
+        collection,
+        threshold: float = DEFAULT_DEDUP_THRESHOLD,
+        keep_sources: Optional[Set[str]] = None
+    ) -> "NearDuplicateIndex":
+        """
+        Reconstruit l'index depuis une collection ChromaDB.
+
+        Utilisé pour les index créés sans déduplication et pour la
+        reprise d'une construction interrompue.
+
+        Args:
+            collection: Collection ChromaDB
+            threshold: Similarité minimale pour fusionner deux chunks
+            keep_sources: Si fourni, seuls ces fichiers sont conservés
+                dans les listes de doublons (les autres seront réindexés)
+
+        Returns:
+            NearDuplicateIndex construit
+        """
+        results = collection.get(include=["documents", "metadatas"])
+
+        index = cls(threshold)
+        for chunk_id, text, metadata in zip(
+            results.get("ids", []),
+            results.get("documents", []),
+            results.get("metadatas", [])
+        ):
+            metadata = metadata or {}
+            index._add_entry(chunk_id, index.signature(text or ""), metadata.get("relative_path", ""))
+
+            listed = [p for p in (metadata.get("duplicate_sources") or "").split(SOURCES_SEPARATOR) if p]
+            sources = [p for p in listed if keep_sources is None or p in keep_sources]
+            if sources:
+                index._duplicates[chunk_id] = sources
+            if len(sources) != len(listed):
+                index._dirty.add(chunk_id)
+        return index
@@ -38,24 +38,16 @@ def diagnose_performance(project: str = "anomalie2084", query: str = "Qui est Al
     # 1. Test index loading
     print("📦 1. Chargement de l'index...")
     try:
-        from langchain_community.vectorstores import Chroma
-        from langchain_openai import OpenAIEmbeddings
+        from src.llm_providers import create_query_embeddings, resolve_index_embeddings
+        from src.utils.index_versions import get_active_index_path
+        from src.vector_store import open_vector_store
         
         db_path = Path("db") / project
         
         def load_index():
-            embeddings = OpenAIEmbeddings(
-                base_url="https://openrouter.ai/api/v1",
-                default_headers={
-                    "HTTP-Referer": "https://github.com/fiction-assistant",
-                    "X-Title": "Fiction Assistant"
-                }
-            )
-            return Chroma(
-                embedding_function=embeddings,
-                persist_directory=str(db_path),
-                collection_name=project
-            )
+            embeddings = create_query_embeddings(*resolve_index_embeddings(project))
+            index_path = get_active_index_path(db_path)
+            return open_vector_store(index_path, project, embeddings, read_only=True)
         
         vectordb, load_time = measure_time(load_index)
         results['index_load'] = load_time
@@ -0,0 +1,257 @@
+"""
+Pipeline d'embedding par lots pour l'indexation.
+
+Les chunks de nombreux fichiers sont regroupés en lots limités en tokens,
+envoyés au provider avec une concurrence bornée (retry avec backoff
+exponentiel sur les limites de débit), puis écrits dans ChromaDB en
+écritures groupées. Le débit d'indexation est alors limité par le quota
+du provider, pas par la latence d'un appel par fichier.
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.utils.embedding_cache import CachedEmbeddings
+
+
+# Taille d'écriture ChromaDB par défaut si le client ne la fournit pas
+DEFAULT_WRITE_BATCH_SIZE = 5000
+
+# Nombre de chunks en vol (chargés, pas encore écrits) en mode flux
+DEFAULT_STREAM_WINDOW = 2000
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimation prudente du nombre de tokens d'un texte.
+
+    Environ 3 caractères par token pour du français: surestime
+    légèrement, ce qui garde les lots sous la limite du provider.
+    """
+    return len(text) // 3 + 1
+
+
+@dataclass
+class EmbeddingBatch:
+    """Lot de textes envoyé en un seul appel d'embeddings."""
+    indices: List[int] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    tokens: int = 0
+
+
+def pack_batches(
+    texts: Sequence[str],
+    max_tokens: int = 50000,
+    max_size: int = 256
+) -> List[EmbeddingBatch]:
+    """
+    Regroupe des textes en lots bornés en tokens et en nombre.
+
+    Args:
+        texts: Textes à embedder
+        max_tokens: Budget de tokens par lot
+        max_size: Nombre maximum de textes par lot
+
+    Returns:
+        Liste de lots (les indices renvoient aux positions dans `texts`)
+    """
+    batches = []
+    current = EmbeddingBatch()
+
+    for idx, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current.texts and (
+            current.tokens + tokens > max_tokens or len(current.texts) >= max_size
+        ):
+            batches.append(current)
+            current = EmbeddingBatch()
+
+        current.indices.append(idx)
+        current.texts.append(text)
+        current.tokens += tokens
+
+    if current.texts:
+        batches.append(current)
+
+    return batches
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Détecte une limite de débit (429) ou une erreur serveur transitoire."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+
+    if status == 429 or (isinstance(status, int) and status >= 500):
+        return True
+
+    message = str(error).lower()
+    return type(error).__name__ == "RateLimitError" or "rate limit" in message
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Délai demandé par le provider (en-tête Retry-After), si présent."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingPipeline:
+    """
+    Calcule les embeddings par lots concurrents et écrit dans ChromaDB.
+
+    Si le client est un `CachedEmbeddings`, le cache est consulté pour
+    tous les textes avant de former les lots: seuls les textes inconnus
+    sont envoyés au provider.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = 50000,
+        max_batch_size: int = 256,
+        max_workers: int = 4,
+        max_retries: int = 6,
+        base_delay: float = 1.0
+    ):
+        """
+        Args:
+            embeddings: Client d'embeddings (éventuellement avec cache)
+            max_batch_tokens: Budget de tokens par appel
+            max_batch_size: Nombre maximum de textes par appel
+            max_workers: Nombre d'appels simultanés au provider
+            max_retries: Nombre de nouvelles tentatives sur limite de débit
+            base_delay: Délai initial du backoff exponentiel (secondes)
+        """
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+    def _embed_batch(self, client: Embeddings, batch: EmbeddingBatch) -> List[List[float]]:
+        """Embedde un lot, avec retry et backoff exponentiel."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return client.embed_documents(batch.texts)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = self.base_delay * (2 ** attempt) * (1 + random.random())
+                print(f"   ⏳ Limite du provider, nouvel essai dans {delay:.1f}s...")
+                time.sleep(delay)
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Calcule les embeddings d'une liste de textes.
+
+        Args:
+            texts: Textes à embedder
+
+        Returns:
+            Vecteurs dans l'ordre des textes
+        """
+        if isinstance(self.embeddings, CachedEmbeddings):
+            vectors = self.embeddings.lookup(texts)
+            client = self.embeddings.embeddings
+        else:
+            vectors = [None] * len(texts)
+            client = self.embeddings
+
+        # Textes à calculer, dédupliqués
+        pending = {}
+        for idx, (text, vector) in enumerate(zip(texts, vectors)):
+            if vector is None:
+                pending.setdefault(text, []).append(idx)
+
+        if pending:
+            unique_texts = list(pending.keys())
+            batches = pack_batches(unique_texts, self.max_batch_tokens, self.max_batch_size)
+            print(f"   🔮 {len(unique_texts)} embeddings à calculer en {len(batches)} lots")
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = executor.map(lambda b: self._embed_batch(client, b), batches)
+
+                for batch, batch_vectors in zip(batches, results):
+                    if isinstance(self.embeddings, CachedEmbeddings):
+                        self.embeddings.store(batch.texts, batch_vectors)
+                    for text, vector in zip(batch.texts, batch_vectors):
+                        for idx in pending[text]:
+                            vectors[idx] = vector
+
+        return vectors
+
+    def upsert(self, collection, items: List[Tuple[str, Document]]):
+        """
+        Embedde des chunks et les écrit dans ChromaDB par écritures groupées.
+
+        Args:
+            collection: Collection ChromaDB
+            items: Liste de tuples (chunk_id, chunk)
+        """
+        if not items:
+            return
+
+        ids = [chunk_id for chunk_id, _ in items]
+        texts = [chunk.page_content for _, chunk in items]
+        metadatas = [chunk.metadata for _, chunk in items]
+        vectors = self.embed_texts(texts)
+
+        try:
+            write_size = collection._client.get_max_batch_size()
+        except Exception:
+            write_size = DEFAULT_WRITE_BATCH_SIZE
+
+        for start in range(0, len(ids), write_size):
+            end = start + write_size
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=vectors[start:end],
+                documents=texts[start:end],
+                metadatas=metadatas[start:end]
+            )
+
+    def upsert_stream(
+        self,
+        collection,
+        items: Iterable[Tuple[str, Document]],
+        window: int = DEFAULT_STREAM_WINDOW
+    ) -> Iterator[List[Tuple[str, Document]]]:
+        """
+        Embedde et écrit un flux de chunks par fenêtres (générateur).
+
+        Au plus `window` chunks sont retenus en mémoire: dès qu'une
+        fenêtre est pleine, elle est embeddée (lots concurrents) puis
+        écrite, et le flux amont n'est relu qu'ensuite. La mémoire reste
+        bornée quelle que soit la taille du corpus.
+
+        Args:
+            collection: Collection ChromaDB
+            items: Flux de tuples (chunk_id, chunk)
+            window: Nombre maximum de chunks en vol
+
+        Yields:
+            Chaque fenêtre une fois écrite (pour les étapes suivantes)
+        """
+        pending = []
+        for item in items:
+            pending.append(item)
+            if len(pending) >= window:
+                self.upsert(collection, pending)
+                yield pending
+                pending = []
+
+        if pending:
+            self.upsert(collection, pending)
+            yield pending
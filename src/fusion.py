@@ -0,0 +1,147 @@
+"""
+Fusion des résultats lexicaux (BM25) et vectoriels de la recherche hybride.
+
+Deux méthodes, pondérées par les poids de chaque recherche:
+- "rrf" (Reciprocal Rank Fusion): score = Σ poids / (c + rang). Ne
+  dépend que des rangs, robuste aux échelles de scores différentes; même
+  classement que l'EnsembleRetriever de LangChain (c = 60).
+- "minmax": scores de chaque recherche ramenés à [0, 1] sur les
+  candidats (min-max), puis moyenne pondérée. Garde l'écart entre un
+  résultat très pertinent et le suivant, utile pour les seuils.
+
+Chaque résultat expose son score fusionné et ses scores / rangs d'origine:
+les appelants peuvent appliquer des seuils, couper adaptativement la
+liste et ne reranker que les candidats utiles.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+
+# Méthodes de fusion disponibles
+FUSION_METHODS = ("rrf", "minmax")
+
+# Constante de lissage du RRF (valeur de l'article d'origine et de LangChain)
+DEFAULT_RRF_K = 60
+
+
+@dataclass
+class FusedResult:
+    """Résultat de recherche hybride avec le détail des scores."""
+    document: Document
+    score: float  # Score fusionné (plus grand = plus pertinent)
+    bm25_score: Optional[float] = None  # Score BM25 brut (None = absent de la recherche BM25)
+    vector_score: Optional[float] = None  # Similarité cosinus (1 - distance L2² / 2)
+    bm25_rank: Optional[int] = None  # Rang dans la recherche BM25 (1 = premier)
+    vector_rank: Optional[int] = None  # Rang dans la recherche vectorielle
+
+
+def document_key(doc: Document) -> Tuple[str, str]:
+    """Identité d'un chunk commune aux deux recherches (source + texte)."""
+    return doc.metadata.get("source", ""), doc.page_content
+
+
+def distance_to_similarity(distance: float) -> float:
+    """Distance L2² (ChromaDB, numpy) en similarité cosinus pour des vecteurs normalisés."""
+    return 1.0 - distance / 2.0
+
+
+def _min_max(scores: Dict[Tuple[str, str], float]) -> Dict[Tuple[str, str], float]:
+    """Ramène des scores à [0, 1] (tous à 1 s'ils sont égaux)."""
+    if not scores:
+        return {}
+    low, high = min(scores.values()), max(scores.values())
+    if high == low:
+        return {key: 1.0 for key in scores}
+    return {key: (score - low) / (high - low) for key, score in scores.items()}
+
+
+def fuse_results(
+    bm25_hits: Sequence[Tuple[Document, float]],
+    vector_hits: Sequence[Tuple[Document, float]],
+    bm25_weight: float = 0.4,
+    vector_weight: float = 0.6,
+    method: str = "rrf",
+    rrf_k: int = DEFAULT_RRF_K
+) -> List[FusedResult]:
+    """
+    Fusionne les résultats des deux recherches.
+
+    Args:
+        bm25_hits: Tuples (document, score BM25) triés par pertinence
+        vector_hits: Tuples (document, distance L2²) triés par pertinence
+        bm25_weight: Poids de la recherche BM25
+        vector_weight: Poids de la recherche vectorielle
+        method: "rrf" ou "minmax"
+        rrf_k: Constante de lissage du RRF
+
+    Returns:
+        Liste de FusedResult triée par score fusionné décroissant
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Méthode de fusion inconnue: {method} (choix: {', '.join(FUSION_METHODS)})")
+
+    results: Dict[Tuple[str, str], FusedResult] = {}
+    for rank, (doc, score) in enumerate(bm25_hits, 1):
+        key = document_key(doc)
+        if key not in results:
+            results[key] = FusedResult(document=doc, score=0.0, bm25_score=score, bm25_rank=rank)
+    for rank, (doc, distance) in enumerate(vector_hits, 1):
+        key = document_key(doc)
+        result = results.setdefault(key, FusedResult(document=doc, score=0.0))
+        if result.vector_rank is None:
+            result.vector_score = distance_to_similarity(distance)
+            result.vector_rank = rank
+
+    if method == "rrf":
+        for result in results.values():
+            if result.bm25_rank is not None:
+                result.score += bm25_weight / (rrf_k + result.bm25_rank)
+            if result.vector_rank is not None:
+                result.score += vector_weight / (rrf_k + result.vector_rank)
+    else:
+        bm25_norm = _min_max({
+            key: result.bm25_score for key, result in results.items() if result.bm25_score is not None
+        })
+        vector_norm = _min_max({
+            key: result.vector_score for key, result in results.items() if result.vector_score is not None
+        })
+        for key, result in results.items():
+            result.score = bm25_weight * bm25_norm.get(key, 0.0) + vector_weight * vector_norm.get(key, 0.0)
+
+    # Tri stable: à score égal, l'ordre BM25 puis vectoriel est conservé
+    return sorted(results.values(), key=lambda result: result.score, reverse=True)
+
+
+def select_candidates(
+    results: Sequence[FusedResult],
+    max_results: int,
+    min_results: int = 1,
+    min_score: Optional[float] = None,
+    relative_score: Optional[float] = None
+) -> List[FusedResult]:
+    """
+    Coupe adaptative d'une liste fusionnée (avant reranking ou génération).
+
+    Args:
+        results: Résultats triés par score décroissant
+        max_results: Nombre maximum de candidats gardés
+        min_results: Nombre minimum gardé quels que soient les seuils
+        min_score: Score fusionné minimum
+        relative_score: Part minimum du meilleur score (ex. 0.5 = la
+            moitié du score du premier résultat)
+
+    Returns:
+        Les candidats retenus, dans l'ordre
+    """
+    selected = []
+    best = results[0].score if results else 0.0
+    for result in results[:max_results]:
+        below = (min_score is not None and result.score < min_score) or (
+            relative_score is not None and result.score < relative_score * best
+        )
+        if below and len(selected) >= min_results:
+            break
+        selected.append(result)
+    return selected
@@ -19,6 +19,8 @@ from langchain_core.documents import Document
 import os
 from dotenv import load_dotenv
 
+from src.analyzer import fold_accents
+
 load_dotenv()
 
 
@@ -125,11 +127,8 @@ def normalize_entity_id(name: str) -> str:
     Returns:
         ID normalisé (snake_case, sans accents)
     """
-    import unicodedata
-    
-    # Supprimer les accents
-    normalized = unicodedata.normalize('NFKD', name)
-    normalized = ''.join(c for c in normalized if not unicodedata.combining(c))
+    # Supprimer les accents (même repliement que l'analyseur BM25)
+    normalized = fold_accents(name)
     
     # Convertir en snake_case
     normalized = normalized.lower()
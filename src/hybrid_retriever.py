@@ -1,14 +1,23 @@
 """
 Hybrid Retrieval: BM25 + Vector Similarity
 Combine lexical (exact match) and semantic (meaning) search for better retrieval
+
+Lightweight adapter returning RetrievalResult objects. The corpus and the
+BM25 scoring are those of src.bm25_index.BM25Index (O(1) lookup by chunk ID),
+so a retriever built with `from_project` shares the corpus already loaded by
+the application's hybrid engine (src.hybrid_search.get_hybrid_searcher).
 """
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-import numpy as np
-from rank_bm25 import BM25Okapi
+from typing import List, Dict, Any, Optional, Tuple
 from chromadb import Collection
 from dataclasses import dataclass
 
+from langchain_core.embeddings import Embeddings
+
+from src.bm25_index import BM25Index
+from src.fusion import distance_to_similarity
+from src.hybrid_search import search_executor
+
 
 @dataclass
 class RetrievalResult:
@@ -32,45 +41,82 @@ class HybridRetriever:
         self, 
         chroma_collection: Collection,
         bm25_weight: float = 0.5,
-        vector_weight: float = 0.5
+        vector_weight: float = 0.5,
+        corpus: Optional[BM25Index] = None,
+        embeddings: Optional[Embeddings] = None
     ):
         """
         Args:
             chroma_collection: ChromaDB collection with embedded documents
             bm25_weight: Weight for BM25 scores (0-1)
             vector_weight: Weight for vector scores (0-1)
+            corpus: Already loaded BM25 index of the collection (shared,
+                not copied); built from the collection when omitted
+            embeddings: Query embeddings client (default: the collection's
+                own embedding function, through query_texts)
         """
         self.collection = chroma_collection
         self.bm25_weight = bm25_weight
         self.vector_weight = vector_weight
+        self.embeddings = embeddings
+        self.corpus = corpus
         
         # Build BM25 index from collection
-        self._build_bm25_index()
+        if self.corpus is None:
+            self._build_bm25_index()
+    
+    @classmethod
+    def from_project(
+        cls,
+        project_name: str,
+        bm25_weight: float = 0.5,
+        vector_weight: float = 0.5
+    ) -> "HybridRetriever":
+        """
+        Retriever over a project's active index, sharing the hybrid engine's
+        vector store, BM25 corpus and query embeddings
+        
+        Args:
+            project_name: Project name (folder in db/)
+            bm25_weight: Weight for BM25 scores (0-1)
+            vector_weight: Weight for vector scores (0-1)
+        """
+        from src.hybrid_search import get_hybrid_searcher
+        
+        searcher = get_hybrid_searcher(project_name)
+        return cls(
+            searcher.vectordb._collection,
+            bm25_weight=bm25_weight,
+            vector_weight=vector_weight,
+            corpus=searcher._load_bm25_index(),
+            embeddings=searcher.embeddings
+        )
     
     def _build_bm25_index(self):
         """Build BM25 index from ChromaDB documents"""
         print("🔧 Building BM25 index...")
         
-        # Get all documents from ChromaDB
-        results = self.collection.get(include=['documents', 'metadatas'])
+        # Documents are tokenized once and kept by chunk ID
+        self.corpus = BM25Index.from_collection(self.collection)
         
-        if not results['documents']:
+        if not len(self.corpus):
             print("⚠️  No documents found in collection")
-            self.bm25 = None
-            self.doc_ids = []
-            self.documents = []
-            self.metadatas = []
             return
         
-        self.documents = results['documents']
-        self.metadatas = results['metadatas']
-        self.doc_ids = results['ids']
-        
-        # Tokenize documents for BM25
-        tokenized_corpus = [doc.lower().split() for doc in self.documents]
-        self.bm25 = BM25Okapi(tokenized_corpus)
-        
-        print(f"✅ BM25 index built with {len(self.documents)} documents")
+        print(f"✅ BM25 index built with {len(self.corpus)} documents")
+    
+    def _result(self, doc_id: str, score: float, method: str) -> Optional[RetrievalResult]:
+        """Build a RetrievalResult from the corpus (direct lookup by chunk ID)"""
+        doc = self.corpus.get_document(doc_id)
+        if doc is None:
+            return None
+        return RetrievalResult(
+            content=doc.page_content,
+            source=doc.metadata.get('source', 'unknown'),
+            score=score,
+            method=method,
+            metadata=doc.metadata
+        )
     
     def retrieve(
         self, 
@@ -89,15 +135,15 @@ class HybridRetriever:
         Returns:
             List of RetrievalResult sorted by score
         """
-        if not self.bm25:
+        if not len(self.corpus):
             # Fallback to vector-only if BM25 not available
             return self._vector_only_retrieve(query, k, min_score)
         
-        # 1. BM25 retrieval
+        # 1-2. Vector retrieval (query embedding, network-bound) in a worker
+        # thread while BM25 runs here: latency is the slower leg, not the sum
+        vector_future = search_executor.submit(self._vector_retrieve, query, k * 2)
         bm25_scores = self._bm25_retrieve(query, k * 2)  # Get more candidates
-        
-        # 2. Vector retrieval
-        vector_scores = self._vector_retrieve(query, k * 2)
+        vector_scores = vector_future.result()
         
         # 3. Combine scores
         hybrid_scores = self._combine_scores(bm25_scores, vector_scores)
@@ -106,14 +152,9 @@ class HybridRetriever:
         results = []
         for doc_id, score in hybrid_scores.items():
             if score >= min_score:
-                idx = self.doc_ids.index(doc_id)
-                results.append(RetrievalResult(
-                    content=self.documents[idx],
-                    source=self.metadatas[idx].get('source', 'unknown'),
-                    score=score,
-                    method='hybrid',
-                    metadata=self.metadatas[idx]
-                ))
+                result = self._result(doc_id, score, 'hybrid')
+                if result is not None:
+                    results.append(result)
         
         # Sort by score and return top-k
         results.sort(key=lambda x: x.score, reverse=True)
@@ -121,36 +162,59 @@ class HybridRetriever:
     
     def _bm25_retrieve(self, query: str, k: int) -> Dict[str, float]:
         """Retrieve using BM25"""
-        tokenized_query = query.lower().split()
-        scores = self.bm25.get_scores(tokenized_query)
-        
-        # Get top-k indices
-        top_indices = np.argsort(scores)[::-1][:k]
+        return self._bm25_retrieve_batch([query], k)[0]
+    
+    def _bm25_retrieve_batch(self, queries: List[str], k: int) -> List[Dict[str, float]]:
+        """Retrieve using BM25 for several queries in one sparse matrix product"""
+        hits = self.corpus.search_ids_batch(queries, k)
         
-        # Normalize scores to 0-1
-        max_score = scores[top_indices[0]] if len(top_indices) > 0 and scores[top_indices[0]] > 0 else 1.0
+        results = []
+        for query_hits in hits:
+            # Normalize scores to 0-1 (hits are sorted, best first)
+            max_score = query_hits[0][1] if query_hits else 1.0
+            results.append({
+                doc_id: score / max_score
+                for doc_id, score in query_hits
+            })
+        return results
+    
+    def bm25_search_batch(self, queries: List[str], k: int = 5) -> List[List[RetrievalResult]]:
+        """
+        BM25-only retrieval for many queries at once
         
-        return {
-            self.doc_ids[idx]: scores[idx] / max_score
-            for idx in top_indices
-            if scores[idx] > 0
-        }
+        Args:
+            queries: Search queries
+            k: Number of results per query
+            
+        Returns:
+            One list of RetrievalResult per query, sorted by score
+        """
+        return [
+            [self._result(doc_id, score, 'bm25') for doc_id, score in query_hits]
+            for query_hits in self.corpus.search_ids_batch(queries, k)
+        ]
+    
+    def _query(self, query: str, k: int, include: List[str]) -> Dict[str, Any]:
+        """Nearest neighbours of a query (with the shared embeddings when given)"""
+        if self.embeddings is not None:
+            return self.collection.query(
+                query_embeddings=[self.embeddings.embed_query(query)],
+                n_results=k,
+                include=include
+            )
+        return self.collection.query(query_texts=[query], n_results=k, include=include)
     
     def _vector_retrieve(self, query: str, k: int) -> Dict[str, float]:
         """Retrieve using vector similarity"""
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=k,
-            include=['distances']
-        )
+        results = self._query(query, k, ['distances'])
         
         if not results['ids'] or not results['ids'][0]:
             return {}
         
-        # ChromaDB returns distances (lower is better), convert to similarity scores
-        # Using cosine distance: similarity = 1 - distance
+        # ChromaDB returns squared L2 distances (lower is better), convert to
+        # cosine similarity (normalized embeddings)
         return {
-            doc_id: 1 - distance
+            doc_id: distance_to_similarity(distance)
             for doc_id, distance in zip(results['ids'][0], results['distances'][0])
         }
     
@@ -182,20 +246,16 @@ class HybridRetriever:
         min_score: float
     ) -> List[RetrievalResult]:
         """Fallback to vector-only retrieval"""
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=k,
-            include=['documents', 'metadatas', 'distances']
-        )
+        results = self._query(query, k, ['documents', 'metadatas', 'distances'])
         
         if not results['ids'] or not results['ids'][0]:
             return []
         
-        return [
+        results = [
             RetrievalResult(
                 content=doc,
                 source=meta.get('source', 'unknown'),
-                score=1 - distance,  # Convert distance to similarity
+                score=distance_to_similarity(distance),
                 method='vector',
                 metadata=meta
             )
@@ -204,8 +264,8 @@ class HybridRetriever:
                 results['metadatas'][0],
                 results['distances'][0]
             )
-            if (1 - distance) >= min_score
         ]
+        return [result for result in results if result.score >= min_score]
     
     def reindex(self):
         """Rebuild BM25 index (call after adding documents)"""
@@ -1,26 +1,51 @@
 """
 Module de recherche hybride combinant BM25 (lexical) et recherche vectorielle.
 Phase 1.1 du plan d'évolution Ecrituria v2.0
+
+HybridSearcher est le moteur de recherche unique de l'application:
+get_hybrid_searcher() en partage une instance par projet et par version
+d'index (base vectorielle, index BM25 et corpus chargés une seule fois)
+entre RAGEngine, GraphRAG, les agents et link_finder.
 """
-from typing import List, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from langchain_core.documents import Document
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 try:
     from langchain.retrievers import EnsembleRetriever
 except ImportError:
     try:
         from langchain.retrievers.ensemble import EnsembleRetriever
     except ImportError:
-        from langchain_classic.retrievers.ensemble import EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
-from rank_bm25 import BM25Okapi
+        try:
+            from langchain_classic.retrievers.ensemble import EnsembleRetriever
+        except ImportError:
+            # Seul get_ensemble_retriever en dépend (search fusionne lui-même)
+            EnsembleRetriever = None
 import os
 from dotenv import load_dotenv
 
+from src.bm25_index import (
+    BM25Index,
+    PersistentBM25Retriever,
+    bm25_index_path,
+    load_bm25_index,
+    save_bm25_index,
+)
+from src.fusion import DEFAULT_RRF_K, FUSION_METHODS, FusedResult, fuse_results
+from src.llm_providers import create_query_embeddings, resolve_index_embeddings
+from src.utils.index_versions import get_active_index_path, index_writer_lock
+from src.vector_store import open_vector_store
+
 load_dotenv()
 
+# Recherches vectorielles lancées pendant le BM25 de la même requête.
+# Partagé par tous les rechercheurs du processus (HybridSearcher,
+# HybridRetriever): pas de création de thread à chaque requête
+search_executor = ThreadPoolExecutor(thread_name_prefix="hybrid-search")
+
 
 class HybridSearcher:
     """
@@ -38,7 +63,12 @@ class HybridSearcher:
         project_name: str,
         vector_weight: float = 0.6,
         bm25_weight: float = 0.4,
-        use_openrouter: bool = True
+        use_openrouter: bool = True,
+        embeddings: Optional[Embeddings] = None,
+        embedding_backend: str = None,
+        embedding_model: str = None,
+        fusion: str = "rrf",
+        rrf_k: int = DEFAULT_RRF_K
     ):
         """
         Initialise le rechercheur hybride.
@@ -47,11 +77,23 @@ class HybridSearcher:
             project_name: Nom du projet (dossier dans data/)
             vector_weight: Poids de la recherche vectorielle (0-1)
             bm25_weight: Poids de la recherche BM25 (0-1)
-            use_openrouter: Utiliser OpenRouter pour les embeddings
+            use_openrouter: Conservé pour compatibilité: les requêtes sont
+                embeddées avec le backend enregistré par l'indexeur
+            embeddings: Client d'embeddings déjà créé (partagé avec RAGEngine)
+            embedding_backend: Backend d'embeddings (défaut: celui de l'index)
+            embedding_model: Modèle d'embeddings (défaut: celui de l'index)
+            fusion: Fusion des deux recherches, "rrf" (rangs) ou "minmax"
+                (scores normalisés), voir src/fusion.py
+            rrf_k: Constante de lissage du RRF
         """
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Méthode de fusion inconnue: {fusion} (choix: {', '.join(FUSION_METHODS)})")
+        
         self.project_name = project_name
         self.vector_weight = vector_weight
         self.bm25_weight = bm25_weight
+        self.fusion = fusion
+        self.rrf_k = rrf_k
         self.db_path = Path("db") / project_name
         
         if not self.db_path.exists():
@@ -60,62 +102,55 @@ class HybridSearcher:
                 f"Lancez d'abord: python -m src.indexer {project_name}"
             )
         
-        # Configuration des embeddings
-        if use_openrouter:
-            self.embeddings = OpenAIEmbeddings(
-                base_url="https://openrouter.ai/api/v1",
-                default_headers={
-                    "HTTP-Referer": "https://github.com/fiction-assistant",
-                    "X-Title": "Fiction Assistant RAG"
-                }
+        # Embeddings des requêtes: même backend que l'indexeur, cache du processus
+        if embeddings is None:
+            embeddings = create_query_embeddings(
+                *resolve_index_embeddings(project_name, embedding_backend, embedding_model)
             )
-        else:
-            self.embeddings = OpenAIEmbeddings()
-        
-        # Charger la base vectorielle
-        self.vectordb = Chroma(
-            embedding_function=self.embeddings,
-            persist_directory=str(self.db_path),
-            collection_name=project_name
-        )
+        self.embeddings = embeddings
+        
+        # Version d'index active, fixée pour la durée de vie de l'instance
+        self.index_path = get_active_index_path(self.db_path)
         
-        # Récupérer tous les documents pour BM25
-        self._documents: Optional[List[Document]] = None
-        self._bm25_retriever: Optional[BM25Retriever] = None
-        self._ensemble_retriever: Optional[EnsembleRetriever] = None
+        # Charger la base vectorielle (ChromaDB, numpy ou hnsw)
+        self.vectordb = open_vector_store(self.index_path, project_name, self.embeddings, read_only=True)
+        
+        # Index BM25 persistant (partagé entre instances, voir load_bm25_index)
+        self._bm25_index: Optional[BM25Index] = None
     
-    def _load_documents_for_bm25(self) -> List[Document]:
-        """Charge tous les documents de la base vectorielle pour BM25."""
-        if self._documents is None:
-            # Récupérer tous les documents de ChromaDB
-            collection = self.vectordb._collection
-            results = collection.get(include=["documents", "metadatas"])
-            
-            self._documents = []
-            for i, (doc_text, metadata) in enumerate(zip(
-                results.get("documents", []),
-                results.get("metadatas", [])
-            )):
-                if doc_text:
-                    self._documents.append(Document(
-                        page_content=doc_text,
-                        metadata=metadata or {}
-                    ))
-        
-        return self._documents
+    def _load_bm25_index(self) -> BM25Index:
+        """
+        Charge l'index BM25 construit par l'indexeur.
+        
+        Si le projet a été indexé avant l'introduction de l'index
+        persistant, il est construit une fois depuis ChromaDB puis
+        sauvegardé pour les prochains chargements (sous le verrou
+        d'écriture du projet, comme les écritures de l'indexeur).
+        
+        Le fichier est re-vérifié à chaque appel (simple stat) pour
+        suivre les mises à jour faites par l'indexeur.
+        """
+        index = load_bm25_index(self.index_path)
+        
+        if index is None:
+            print("   ℹ️  Index BM25 absent, construction depuis ChromaDB...")
+            index = BM25Index.from_collection(self.vectordb._collection)
+            with index_writer_lock(self.db_path):
+                # Un indexeur a pu écrire l'index entre-temps
+                if bm25_index_path(self.index_path) is None:
+                    save_bm25_index(index, self.index_path)
+        
+        self._bm25_index = index
+        return index
     
-    def _get_bm25_retriever(self, k: int = 5) -> BM25Retriever:
-        """Crée ou récupère le retriever BM25."""
-        docs = self._load_documents_for_bm25()
+    def _get_bm25_retriever(self, k: int = 5) -> PersistentBM25Retriever:
+        """Crée un retriever BM25 sur l'index persistant."""
+        index = self._load_bm25_index()
         
-        if not docs:
+        if not len(index):
             raise ValueError("Aucun document trouvé dans la base vectorielle")
         
-        # Créer le retriever BM25
-        bm25_retriever = BM25Retriever.from_documents(docs)
-        bm25_retriever.k = k
-        
-        return bm25_retriever
+        return PersistentBM25Retriever(index=index, k=k)
     
     def _get_vector_retriever(self, k: int = 5):
         """Crée le retriever vectoriel."""
@@ -124,23 +159,36 @@ class HybridSearcher:
             search_kwargs={"k": k}
         )
     
-    def get_ensemble_retriever(self, k: int = 5) -> EnsembleRetriever:
+    def get_ensemble_retriever(
+        self,
+        k: int = 5,
+        vector_weight: float = None,
+        bm25_weight: float = None
+    ) -> EnsembleRetriever:
         """
         Crée un retriever ensemble combinant BM25 et vecteurs.
         
         Args:
             k: Nombre de documents à récupérer par retriever
+            vector_weight: Poids vectoriel de ce retriever (défaut: self.vector_weight)
+            bm25_weight: Poids BM25 de ce retriever (défaut: self.bm25_weight)
             
         Returns:
             EnsembleRetriever configuré
         """
+        if EnsembleRetriever is None:
+            raise ImportError("EnsembleRetriever de LangChain non disponible")
+        
         bm25_retriever = self._get_bm25_retriever(k)
         vector_retriever = self._get_vector_retriever(k)
         
         # Créer l'ensemble avec les poids configurés
         ensemble_retriever = EnsembleRetriever(
             retrievers=[bm25_retriever, vector_retriever],
-            weights=[self.bm25_weight, self.vector_weight]
+            weights=[
+                self.bm25_weight if bm25_weight is None else bm25_weight,
+                self.vector_weight if vector_weight is None else vector_weight
+            ]
         )
         
         return ensemble_retriever
@@ -149,24 +197,51 @@ class HybridSearcher:
         self,
         query: str,
         k: int = 5,
-        return_scores: bool = False
-    ) -> List[Document]:
+        return_scores: bool = False,
+        fusion: str = None,
+        vector_weight: float = None,
+        bm25_weight: float = None
+    ) -> List[Document] | List[FusedResult]:
         """
         Effectue une recherche hybride.
         
+        Les deux recherches tournent en parallèle: la recherche
+        vectorielle (dominée par l'embedding réseau de la requête) dans
+        un thread, BM25 dans le thread appelant. La latence est celle de
+        la plus lente des deux, pas leur somme.
+        
         Args:
             query: Requête de recherche
-            k: Nombre de résultats à retourner
-            return_scores: Retourner les scores (non supporté avec ensemble)
+            k: Nombre de résultats à retourner (et de candidats par recherche)
+            return_scores: Retourner des FusedResult (score fusionné,
+                scores et rangs BM25 / vectoriels) au lieu des documents
+            fusion: Méthode de fusion pour cet appel (défaut: self.fusion)
+            vector_weight: Poids vectoriel pour cet appel (défaut: self.vector_weight)
+            bm25_weight: Poids BM25 pour cet appel (défaut: self.bm25_weight)
             
         Returns:
-            Liste de documents triés par pertinence combinée
+            Liste de documents (ou de FusedResult) triés par pertinence combinée
         """
-        ensemble = self.get_ensemble_retriever(k)
-        results = ensemble.invoke(query)
+        index = self._load_bm25_index()
+        if not len(index):
+            raise ValueError("Aucun document trouvé dans la base vectorielle")
+        
+        vector_future = search_executor.submit(self.vectordb.similarity_search_with_score, query, k)
+        bm25_hits = index.search(query, k=k)
+        vector_hits = vector_future.result()
+        
+        results = fuse_results(
+            bm25_hits,
+            vector_hits,
+            bm25_weight=self.bm25_weight if bm25_weight is None else bm25_weight,
+            vector_weight=self.vector_weight if vector_weight is None else vector_weight,
+            method=fusion or self.fusion,
+            rrf_k=self.rrf_k
+        )[:k]
         
-        # Limiter au nombre demandé (l'ensemble peut retourner plus)
-        return results[:k]
+        if return_scores:
+            return results
+        return [result.document for result in results]
     
     def search_vector_only(self, query: str, k: int = 5) -> List[Document]:
         """Recherche vectorielle pure (pour comparaison)."""
@@ -199,6 +274,61 @@ class HybridSearcher:
         }
 
 
+# Moteurs partagés: (projet, backend, modèle) -> (version d'index, moteur)
+_shared_searchers: Dict[Tuple[str, str, str], Tuple[Path, HybridSearcher]] = {}
+_shared_lock = threading.Lock()
+
+
+def get_hybrid_searcher(
+    project_name: str,
+    embeddings: Optional[Embeddings] = None,
+    embedding_backend: str = None,
+    embedding_model: str = None
+) -> HybridSearcher:
+    """
+    Retourne le moteur de recherche partagé d'un projet.
+    
+    Un seul HybridSearcher par projet et par modèle d'embeddings est
+    gardé pour tout le processus: chaque RAGEngine (agents, GraphRAG,
+    appels de link_finder...) réutilise sa base vectorielle et son index
+    BM25 au lieu de les rouvrir. Après une réindexation (nouvelle version
+    d'index active), le moteur est recréé et l'ancien libéré.
+    
+    Les poids et la méthode de fusion restent ceux par défaut; ils
+    peuvent être choisis à chaque appel de search().
+    
+    Args:
+        project_name: Nom du projet
+        embeddings: Client d'embeddings à utiliser si le moteur est créé
+        embedding_backend: Backend d'embeddings (défaut: celui de l'index)
+        embedding_model: Modèle d'embeddings (défaut: celui de l'index)
+        
+    Returns:
+        HybridSearcher partagé
+    """
+    backend, model, dimensions = resolve_index_embeddings(
+        project_name, embedding_backend, embedding_model
+    )
+    index_path = get_active_index_path(Path("db") / project_name)
+    key = (project_name, backend, model)
+    
+    with _shared_lock:
+        cached = _shared_searchers.get(key)
+        if cached and cached[0] == index_path:
+            return cached[1]
+        
+        if embeddings is None:
+            embeddings = create_query_embeddings(backend, model, dimensions)
+        searcher = HybridSearcher(
+            project_name,
+            embeddings=embeddings,
+            embedding_backend=backend,
+            embedding_model=model
+        )
+        _shared_searchers[key] = (searcher.index_path, searcher)
+        return searcher
+
+
 def get_hybrid_retriever(
     project_name: str,
     k: int = 5,
@@ -217,12 +347,8 @@ def get_hybrid_retriever(
     Returns:
         EnsembleRetriever configuré
     """
-    searcher = HybridSearcher(
-        project_name,
-        vector_weight=vector_weight,
-        bm25_weight=bm25_weight
-    )
-    return searcher.get_ensemble_retriever(k)
+    searcher = get_hybrid_searcher(project_name)
+    return searcher.get_ensemble_retriever(k, vector_weight=vector_weight, bm25_weight=bm25_weight)
 
 
 def hybrid_search(
@@ -245,12 +371,8 @@ def hybrid_search(
     Returns:
         Liste de documents pertinents
     """
-    searcher = HybridSearcher(
-        project_name,
-        vector_weight=vector_weight,
-        bm25_weight=bm25_weight
-    )
-    return searcher.search(query, k)
+    searcher = get_hybrid_searcher(project_name)
+    return searcher.search(query, k, vector_weight=vector_weight, bm25_weight=bm25_weight)
 
 
 # Test du module
@@ -270,6 +392,14 @@ if __name__ == "__main__":
         print("📊 Comparaison des méthodes de recherche")
         print("=" * 60)
         
+        for fusion in ("rrf", "minmax"):
+            print(f"\n🧮 Scores fusionnés ({fusion})")
+            for result in searcher.search(query, k=3, return_scores=True, fusion=fusion):
+                bm25 = f"{result.bm25_score:.2f} (#{result.bm25_rank})" if result.bm25_rank else "-"
+                vector = f"{result.vector_score:.3f} (#{result.vector_rank})" if result.vector_rank else "-"
+                source = result.document.metadata.get('relative_path', 'inconnu')
+                print(f"  {result.score:.4f}  bm25 {bm25:14s} vecteur {vector:14s} [{source}]")
+        
         results = searcher.compare_methods(query, k=3)
         
         for method, docs in results.items():
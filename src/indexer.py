@@ -5,12 +5,12 @@ Version 2.0 avec support de l'indexation incrémentale.
 import sys
 import os
 import io
-import shutil
+import functools
+from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
+from typing import Dict, List, Optional, Tuple
 from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
 from dotenv import load_dotenv
 
 # Permet d'exécuter le fichier directement avec `python src/indexer.py ...`
@@ -40,8 +40,75 @@ if openai_key:
 else:
     print("⚠️  Aucune clé API détectée dans OPENAI_API_KEY")
 
-from src.loaders import load_project_documents, split_documents
-from src.utils.file_hash import FileHashTracker, get_file_hash
+from src.bm25_index import BM25Index, bm25_index_path, save_bm25_index
+from src.dedup import DEDUP_INDEX_FILENAME, DEFAULT_DEDUP_THRESHOLD, NearDuplicateIndex
+from src.embedding_pipeline import DEFAULT_STREAM_WINDOW, EmbeddingPipeline
+from src.llm_providers import (
+    create_backend_embeddings,
+    default_embedding_backend,
+    embedding_cache_key,
+    get_embedding_backend
+)
+from src.loaders import (
+    CHUNKING_MODES,
+    add_file_metadata,
+    iter_project_documents,
+    iter_split_documents,
+    list_project_files,
+    load_document,
+    split_documents
+)
+from src.utils.embedding_cache import CachedEmbeddings
+from src.utils.file_hash import FileHashTracker, FileInfo, get_chunk_id, get_file_hash
+from src.utils.index_versions import (
+    cleanup_index_versions,
+    create_index_version,
+    discard_index_version,
+    get_active_index_path,
+    index_exists,
+    index_writer_lock,
+    publish_index_version
+)
+from src.vector_quantization import check_quantization
+from src.vector_store import (
+    DEFAULT_HNSW_M,
+    flush_vector_store,
+    get_vector_backend,
+    open_vector_store
+)
+
+
+def compute_chunk_ids(chunks: List[Document]) -> List[str]:
+    """
+    Calcule les IDs déterministes d'une liste de chunks.
+    
+    Les chunks identiques d'un même fichier sont distingués par leur
+    rang d'apparition.
+    
+    Args:
+        chunks: Chunks avec la métadonnée relative_path
+        
+    Returns:
+        Liste d'IDs, dans l'ordre des chunks
+    """
+    seen = {}
+    ids = []
+    for chunk in chunks:
+        rel_path = chunk.metadata.get("relative_path", "")
+        key = (rel_path, chunk.page_content)
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        ids.append(get_chunk_id(rel_path, chunk.page_content, occurrence))
+    return ids
+
+
+def _holds_writer_lock(method):
+    """Exécute une méthode de ProjectIndexer sous le verrou d'écriture du projet."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with index_writer_lock(self.db_path):
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class ProjectIndexer:
@@ -58,7 +125,23 @@ class ProjectIndexer:
         project_name: str,
         chunk_size: int = 1000,
         chunk_overlap: int = 150,
-        use_openrouter: bool = None
+        use_openrouter: bool = None,
+        embedding_workers: int = 4,
+        embedding_batch_tokens: int = 50000,
+        hash_algorithm: str = None,
+        stream_window: int = DEFAULT_STREAM_WINDOW,
+        parallel_loading: bool = False,
+        loading_workers: int = None,
+        chunking: str = None,
+        deduplicate: bool = None,
+        dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD,
+        embedding_backend: str = None,
+        embedding_model: str = None,
+        embedding_dimensions: int = None,
+        vector_quantization: str = None,
+        vector_backend: str = None,
+        hnsw_m: int = None,
+        hnsw_ef_search: int = None
     ):
         """
         Initialise l'indexeur.
@@ -67,7 +150,42 @@ class ProjectIndexer:
             project_name: Nom du projet (dossier dans data/)
             chunk_size: Taille des chunks en caractères
             chunk_overlap: Chevauchement entre chunks
-            use_openrouter: Utiliser OpenRouter pour les embeddings (None = auto-détection)
+            use_openrouter: Raccourci pour embedding_backend="openrouter" / "openai"
+            embedding_workers: Nombre d'appels d'embeddings simultanés
+            embedding_batch_tokens: Budget de tokens par appel d'embeddings
+            hash_algorithm: Hash des fichiers ("md5", "blake2b", "xxhash")
+            stream_window: Nombre maximum de chunks en mémoire lors d'une
+                construction complète
+            parallel_loading: Charger les fichiers dans plusieurs processus
+                lors d'une construction complète (PDF, DOCX)
+            loading_workers: Nombre de processus de chargement (défaut: nombre de cœurs)
+            chunking: Découpage "recursive" ou "markdown" (par titres, voir
+                src/loaders.py). Défaut: celui de l'index existant
+            deduplicate: Fusionner les chunks quasi identiques avant
+                l'embedding (voir src/dedup.py). Défaut: le choix de
+                l'index existant, activé pour un nouvel index
+            dedup_threshold: Similarité minimale pour fusionner deux chunks
+            embedding_backend: Backend d'embeddings ("openrouter", "openai",
+                "local", "local-onnx", voir src/llm_providers.py). Défaut:
+                celui de l'index existant, sinon selon la clé API
+            embedding_model: Modèle d'embeddings (défaut: celui du backend)
+            embedding_dimensions: Embeddings raccourcis (Matryoshka, ex. 512
+                pour text-embedding-3-small). Défaut: ceux de l'index
+                existant; 0 = taille native du modèle
+            vector_quantization: Codes "float16" ou "int8" des vecteurs
+                (stores numpy uniquement): présélection sur les codes puis
+                rescoring exact des candidats (voir
+                src/vector_quantization.py), ou "none". Défaut: celle de
+                l'index existant
+            vector_backend: Stockage des vecteurs: "chroma", "numpy" /
+                "numpy-float16" (matrice mappée en mémoire) ou "hnsw"
+                (graphe approché, voir src/vector_store.py). Défaut: celui
+                de l'index existant
+            hnsw_m: Voisins par nœud du graphe HNSW (fixé à la
+                construction). Défaut: celui de l'index existant, ou 16
+            hnsw_ef_search: Largeur de recherche HNSW des requêtes
+                (rappel / latence), modifiable sans reconstruction.
+                Défaut: celle de l'index existant, ou 64
         """
         self.project_name = project_name
         self.chunk_size = chunk_size
@@ -78,37 +196,303 @@ class ProjectIndexer:
         self.db_path = Path("db") / project_name
         
         # Tracker de fichiers pour l'indexation incrémentale
-        self.tracker = FileHashTracker(project_name)
-        
-        # Détection automatique d'OpenRouter si non spécifié
-        if use_openrouter is None:
-            use_openrouter = is_openrouter_key
-        
-        # Configuration des embeddings
-        if use_openrouter:
-            self.embeddings = OpenAIEmbeddings(
-                model="text-embedding-ada-002",
-                base_url="https://openrouter.ai/api/v1",
-                default_headers={
-                    "HTTP-Referer": "https://github.com/fiction-assistant",
-                    "X-Title": "Fiction Assistant RAG"
-                }
+        self.tracker = FileHashTracker(project_name, hash_algorithm=hash_algorithm)
+        
+        # Mode de découpage: celui de l'index existant sauf choix explicite
+        stored_chunking = self.tracker.get_metadata("chunking") or "recursive"
+        self.chunking = chunking or stored_chunking
+        if self.chunking not in CHUNKING_MODES:
+            raise ValueError(
+                f"Mode de découpage inconnu: {self.chunking} (choix: {', '.join(CHUNKING_MODES)})"
             )
-        else:
-            self.embeddings = OpenAIEmbeddings()
+        if self.chunking != stored_chunking and self.tracker.get_stats()["file_count"]:
+            print(
+                f"   ℹ️  Index existant découpé en mode {stored_chunking}: "
+                f"reconstruisez-le (--full) pour passer au mode {self.chunking}"
+            )
+        
+        # Backend d'embeddings: celui de l'index existant sauf choix explicite
+        if embedding_backend is None and use_openrouter is not None:
+            embedding_backend = "openrouter" if use_openrouter else "openai"
+        stored_backend = self.tracker.get_metadata("embedding_backend")
+        self.embedding_backend = embedding_backend or stored_backend or default_embedding_backend()
+        if embedding_model is None and self.embedding_backend == stored_backend:
+            embedding_model = self.tracker.get_metadata("embedding_model")
+        self.embedding_model = embedding_model or get_embedding_backend(self.embedding_backend).model
+        if embedding_dimensions is None and (self.embedding_backend, self.embedding_model) == (
+            stored_backend, self.tracker.get_metadata("embedding_model")
+        ):
+            embedding_dimensions = self.tracker.get_metadata("embedding_dimensions")
+        self.embedding_dimensions = embedding_dimensions or None
+        
+        embeddings = create_backend_embeddings(
+            self.embedding_backend, self.embedding_model, self.embedding_dimensions
+        )
+        
+        # Cache des embeddings partagé par tous les chemins d'indexation
+        self.embeddings = CachedEmbeddings(
+            embeddings,
+            model_name=embedding_cache_key(
+                self.embedding_backend, self.embedding_model, self.embedding_dimensions
+            )
+        )
+        self.embedding_workers = embedding_workers
+        self.embedding_batch_tokens = embedding_batch_tokens
+        self.stream_window = stream_window
+        self.parallel_loading = parallel_loading
+        self.loading_workers = loading_workers
+        if deduplicate is None:
+            deduplicate = self.tracker.get_metadata("deduplicate", True)
+        self.deduplicate = deduplicate
+        self.dedup_threshold = dedup_threshold
+        
+        # Stockage des vecteurs: celui de l'index existant sauf choix explicite
+        stored_vector_backend = self.tracker.get_metadata("vector_backend") or "chroma"
+        self.vector_backend = get_vector_backend(vector_backend or stored_vector_backend).name
+        if self.vector_backend != stored_vector_backend and self.tracker.get_stats()["file_count"]:
+            print(
+                f"   ℹ️  Index existant stocké dans {stored_vector_backend}: "
+                f"reconstruisez-le (--full) pour passer à {self.vector_backend}"
+            )
+        
+        # Graphe HNSW: M fixé à la construction, ef_search réglable à tout moment
+        stored_hnsw_m = int(self.tracker.get_metadata("hnsw_m") or DEFAULT_HNSW_M)
+        self.hnsw_m = hnsw_m or stored_hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search or self.tracker.get_metadata("hnsw_ef_search")
+        if (
+            self.vector_backend == "hnsw"
+            and self.hnsw_m != stored_hnsw_m
+            and self.tracker.get_metadata("vector_backend") == "hnsw"
+            and self.tracker.get_stats()["file_count"]
+        ):
+            print(
+                f"   ℹ️  Graphe HNSW existant construit avec M={stored_hnsw_m}: "
+                f"reconstruisez-le (--full) pour passer à M={self.hnsw_m}"
+            )
+        
+        # Codes quantifiés (store numpy): ceux de l'index existant sauf choix explicite
+        stored_quantization = self.tracker.get_metadata("vector_quantization") or "none"
+        if vector_quantization is not None:
+            check_quantization(vector_quantization)
+            if vector_quantization != "none" and get_vector_backend(self.vector_backend).store != "numpy":
+                raise ValueError(
+                    f"Quantification {vector_quantization} disponible avec les "
+                    f"stores numpy uniquement (backend: {self.vector_backend})"
+                )
+        elif get_vector_backend(self.vector_backend).store != "numpy":
+            # Anciens index (copie quantifiée à côté de ChromaDB): ignorée
+            stored_quantization = "none"
+        self.vector_quantization = vector_quantization or stored_quantization
+        if self.vector_quantization != stored_quantization and self.tracker.get_stats()["file_count"]:
+            print(
+                f"   ℹ️  Index existant en quantification {stored_quantization}: "
+                f"reconstruisez-le (--full) pour passer à {self.vector_quantization}"
+            )
+
+    @property
+    def pipeline(self) -> EmbeddingPipeline:
+        """Pipeline d'embedding par lots (suit self.embeddings)."""
+        return EmbeddingPipeline(
+            self.embeddings,
+            max_batch_tokens=self.embedding_batch_tokens,
+            max_workers=self.embedding_workers
+        )
+    
+    @property
+    def index_path(self) -> Path:
+        """Dossier de la version d'index active (ChromaDB + BM25)."""
+        return get_active_index_path(self.db_path)
     
-    def _get_vectordb(self) -> Chroma:
-        """Récupère ou crée la base vectorielle."""
-        return Chroma(
-            embedding_function=self.embeddings,
-            persist_directory=str(self.db_path),
-            collection_name=self.project_name
+    def _get_vectordb(self, index_path: Path = None) -> VectorStore:
+        """
+        Récupère ou crée la base vectorielle.
+        
+        Args:
+            index_path: Dossier de l'index en construction (backend choisi),
+                défaut: version active (backend avec lequel elle a été construite)
+        """
+        return open_vector_store(
+            index_path or self.index_path,
+            self.project_name,
+            self.embeddings,
+            backend=self.vector_backend if index_path else None,
+            hnsw_m=self.hnsw_m,
+            ef_search=self.hnsw_ef_search,
+            quantization=self.vector_quantization
         )
     
-    def build_full_index(self) -> dict:
+    def _report_embedding_cache(self, stats: dict):
+        """Ajoute et affiche les statistiques du cache d'embeddings."""
+        stats["embeddings_cached"] = self.embeddings.hits
+        stats["embeddings_computed"] = self.embeddings.misses
+        print(
+            f"   ♻️  Embeddings: {self.embeddings.hits} depuis le cache, "
+            f"{self.embeddings.misses} calculés"
+        )
+    
+    def _load_bm25_index(self, collection) -> BM25Index:
+        """
+        Charge l'index BM25 du projet pour le modifier.
+        
+        Une copie privée est chargée (pas celle partagée par les
+        rechercheurs du processus) pour ne pas la modifier en cours
+        de requête. Reconstruit depuis ChromaDB si absent.
+        """
+        bm25_path = bm25_index_path(self.index_path)
+        if bm25_path is not None:
+            return BM25Index.load(bm25_path)
+        
+        print("   ℹ️  Index BM25 absent, reconstruction depuis ChromaDB...")
+        return BM25Index.from_collection(collection)
+    
+    def _load_dedup_index(self, collection) -> Optional[NearDuplicateIndex]:
+        """
+        Charge l'index des doublons de la version active.
+        
+        Reconstruit depuis ChromaDB si absent (index créé sans
+        déduplication). None si la déduplication est désactivée.
+        """
+        if not self.deduplicate:
+            return None
+        
+        dedup_path = self.index_path / DEDUP_INDEX_FILENAME
+        if dedup_path.exists():
+            return NearDuplicateIndex.load(dedup_path)
+        
+        print("   ℹ️  Index des doublons absent, reconstruction depuis ChromaDB...")
+        return NearDuplicateIndex.from_collection(collection, self.dedup_threshold)
+    
+    def _write_duplicate_metadata(
+        self,
+        collection,
+        bm25_index: BM25Index,
+        dedup: NearDuplicateIndex
+    ):
+        """Écrit la liste des doublons des représentants modifiés (ChromaDB + BM25)."""
+        metadatas = dedup.take_dirty()
+        if metadatas:
+            collection.update(ids=list(metadatas), metadatas=list(metadatas.values()))
+            bm25_index.update_metadata(metadatas)
+    
+    def _report_duplicates(self, stats: dict, dedup: Optional[NearDuplicateIndex]):
+        """Ajoute et affiche le nombre de chunks fusionnés."""
+        if dedup is None:
+            return
+        stats["duplicates_collapsed"] = dedup.collapsed
+        if dedup.collapsed:
+            print(f"   🧬 {dedup.collapsed} chunks quasi identiques fusionnés (embeddings évités)")
+
+    def _check_embedding_backend(self):
+        """Refuse de mélanger dans un index des vecteurs de deux modèles."""
+        indexed_backend = self.tracker.get_metadata("embedding_backend")
+        if indexed_backend is None:
+            return  # Index construit avant l'enregistrement du backend
+        
+        indexed_model = self.tracker.get_metadata("embedding_model")
+        indexed_dimensions = self.tracker.get_metadata("embedding_dimensions")
+        if (indexed_backend, indexed_model, indexed_dimensions) != (
+            self.embedding_backend, self.embedding_model, self.embedding_dimensions
+        ):
+            raise ValueError(
+                f"L'index a été construit avec les embeddings {indexed_backend} ({indexed_model}"
+                f"{f', {indexed_dimensions} dimensions' if indexed_dimensions else ''}), "
+                f"pas {self.embedding_backend} ({self.embedding_model}"
+                f"{f', {self.embedding_dimensions} dimensions' if self.embedding_dimensions else ''}).\n"
+                f"Reconstruisez-le: python -m src.indexer {self.project_name} --full "
+                f"--embeddings {self.embedding_backend}"
+            )
+    
+    def _build_settings(self) -> dict:
+        """Paramètres qui doivent être identiques pour reprendre une construction."""
+        return {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "chunking": self.chunking,
+            "deduplicate": self.deduplicate,
+            "dedup_threshold": self.dedup_threshold,
+            "embedding_backend": self.embedding_backend,
+            "embedding_model": self.embedding_model,
+            "embedding_dimensions": self.embedding_dimensions,
+            "hash_algorithm": self.tracker.preferred_algorithm,
+            "vector_backend": self.vector_backend,
+            "hnsw_m": self.hnsw_m if self.vector_backend == "hnsw" else None,
+            "vector_quantization": self.vector_quantization
+        }
+    
+    def _resume_build(self) -> Tuple[Optional[Path], Dict[str, FileInfo]]:
+        """
+        Prépare la reprise d'une construction complète interrompue.
+        
+        Les fichiers enregistrés comme écrits et inchangés depuis sont
+        conservés; les chunks des autres (fichier en cours lors de
+        l'interruption, fichiers modifiés ou supprimés) sont retirés de
+        la version en construction.
+        
+        Returns:
+            Tuple (dossier de la version à reprendre, fichiers déjà écrits),
+            ou (None, {}) si aucune reprise n'est possible
+        """
+        pending = self.tracker.get_pending_build()
+        if not pending:
+            print("   ℹ️  Aucune construction interrompue, construction complète...")
+            return None, {}
+        
+        staging_path = self.db_path / pending["version"]
+        settings = self._build_settings()
+        if not staging_path.exists() or any(
+            pending.get(key) != value for key, value in settings.items()
+        ):
+            print("   ⚠️  Construction interrompue incompatible (paramètres modifiés), on repart de zéro")
+            discard_index_version(staging_path)
+            return None, {}
+        
+        # Garder les fichiers écrits qui n'ont pas changé depuis
+        committed = {}
+        for rel_path, info in self.tracker.get_build_files(pending["version"]).items():
+            file_path = self.project_path / rel_path
+            if not file_path.exists():
+                continue
+            stat = file_path.stat()
+            if (stat.st_size == info.size and stat.st_mtime == info.modified) or (
+                get_file_hash(file_path, pending["hash_algorithm"]) == info.hash
+            ):
+                committed[rel_path] = info
+        
+        if not committed:
+            discard_index_version(staging_path)
+            return None, {}
+        
+        vectordb = self._get_vectordb(staging_path)
+        vectordb._collection.delete(where={"relative_path": {"$nin": list(committed)}})
+        flush_vector_store(vectordb)
+        
+        self.tracker.start_build(pending["version"], settings)
+        self.tracker.record_build_files(pending["version"], list(committed.values()))
+        
+        print(f"   ⏯️  Reprise de la version {pending['version']}: {len(committed)} fichiers déjà indexés")
+        return staging_path, committed
+    
+    @_holds_writer_lock
+    def build_full_index(self, resume: bool = False) -> dict:
         """
         Construit l'index complet depuis zéro.
         
+        Le nouvel index est écrit dans une version séparée pendant que
+        l'ancienne continue de servir les requêtes, puis publié d'un coup
+        (voir src/utils/index_versions.py). Une construction qui échoue
+        laisse l'index actif intact.
+        
+        Les fichiers passent en flux du chargement à l'écriture, par
+        fenêtres de `stream_window` chunks: la mémoire utilisée ne dépend
+        pas de la taille du projet (hors index BM25).
+        
+        Chaque fichier entièrement écrit est enregistré dans le tracker:
+        après une interruption (crash, limite du provider), `resume=True`
+        reprend la construction là où elle s'était arrêtée.
+        
+        Args:
+            resume: Reprendre la dernière construction interrompue
+        
         Returns:
             Dict avec les statistiques d'indexation
         """
@@ -120,58 +504,165 @@ class ProjectIndexer:
                 f"Chemin attendu: {self.project_path.absolute()}"
             )
         
-        # Charger tous les documents
-        print(f"\n📚 Chargement des documents depuis {self.project_path}...")
-        docs = load_project_documents(self.project_path)
+        files = list_project_files(self.project_path)
         
-        if not docs:
+        if not files:
             print("⚠️  Aucun document trouvé.")
             return {"status": "empty", "files": 0, "chunks": 0}
         
-        # Découper en chunks
-        print(f"\n✂️  Découpage des documents...")
-        chunks = split_documents(
-            docs,
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
-        )
+        staging_path, committed = self._resume_build() if resume else (None, {})
         
-        # Supprimer l'ancien index
-        if self.db_path.exists():
-            shutil.rmtree(self.db_path)
-            print(f"   ♻️  Ancien index supprimé")
-        
-        # Créer le nouvel index
-        print(f"\n🔮 Création des embeddings...")
-        vectordb = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
-            persist_directory=str(self.db_path),
-            collection_name=self.project_name
-        )
+        if staging_path is None:
+            # Créer le nouvel index à côté de l'index actif
+            staging_path = create_index_version(self.db_path)
+            self.tracker.start_build(staging_path.name, self._build_settings())
+        
+        version = staging_path.name
+        hash_algorithm = self.tracker.preferred_algorithm
+        vectordb = self._get_vectordb(staging_path)
+        collection = vectordb._collection
+        
+        dedup = None
+        if self.deduplicate:
+            dedup = NearDuplicateIndex(self.dedup_threshold)
+        
+        if committed:
+            bm25_index = BM25Index.from_collection(collection)
+            if dedup is not None:
+                dedup = NearDuplicateIndex.from_collection(
+                    collection, self.dedup_threshold, keep_sources=set(committed)
+                )
+            files = [
+                path for path in files
+                if str(path.relative_to(self.project_path)) not in committed
+            ]
+        else:
+            bm25_index = BM25Index()
+        
+        # Pipeline en flux: chargement → découpage → embedding → écriture.
+        # Seuls `stream_window` chunks sont en mémoire à la fois.
+        print(f"\n📚 Indexation en flux de {len(files)} fichiers (version {version})...")
+        progress = {"files": 0, "queued": 0, "chunks": 0}
+        in_flight = []  # (position du dernier chunk, FileInfo) des fichiers non écrits
+        # Un fichier n'est ajouté à in_flight qu'une fois tous ses chunks
+        # lus: ses doublons sont alors rattachés à des chunks déjà écrits.
+        
+        def chunk_stream():
+            doc_stream = iter_project_documents(
+                self.project_path, files, verbose=False,
+                parallel=self.parallel_loading, max_workers=self.loading_workers
+            )
+            for file_path, chunks in iter_split_documents(
+                doc_stream,
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                start_index=collection.count() if committed else 0,
+                chunking=self.chunking
+            ):
+                stat = file_path.stat()
+                progress["files"] += 1
+                info = FileInfo(
+                    path=str(file_path.relative_to(self.project_path)),
+                    hash=get_file_hash(file_path, hash_algorithm),
+                    size=stat.st_size,
+                    modified=stat.st_mtime,
+                    indexed_at=datetime.now().isoformat(),
+                    chunk_count=len(chunks)
+                )
+                for chunk_id, chunk in zip(compute_chunk_ids(chunks), chunks):
+                    if dedup is not None and dedup.collapse(chunk_id, chunk):
+                        continue  # Quasi-doublon d'un chunk déjà lu
+                    progress["queued"] += 1
+                    yield chunk_id, chunk
+                in_flight.append((progress["queued"], info))
+        
+        try:
+            for window in self.pipeline.upsert_stream(
+                collection, chunk_stream(), window=self.stream_window
+            ):
+                bm25_index.add_documents(
+                    [chunk for _, chunk in window],
+                    [chunk_id for chunk_id, _ in window]
+                )
+                progress["chunks"] += len(window)
+                if dedup is not None:
+                    self._write_duplicate_metadata(collection, bm25_index, dedup)
+                
+                # Point de reprise: fichiers dont tous les chunks sont écrits
+                done = [info for end, info in in_flight if end <= progress["chunks"]]
+                del in_flight[:len(done)]
+                self.tracker.record_build_files(version, done)
+                
+                print(
+                    f"   📦 {progress['files']}/{len(files)} fichiers chargés, "
+                    f"{progress['chunks']} chunks écrits"
+                )
+        except Exception:
+            print(f"\n💡 Reprendre avec: python -m src.indexer {self.project_name} --resume")
+            raise
+        
+        # Fichiers sans chunks (vides)
+        self.tracker.record_build_files(version, [info for _, info in in_flight])
+        
+        if not committed and not progress["files"]:
+            # Aucun fichier lisible: garder l'index actif
+            discard_index_version(staging_path)
+            self.tracker.abort_build()
+            print("⚠️  Aucun document trouvé.")
+            return {"status": "empty", "files": 0, "chunks": 0}
         
-        # Mettre à jour le tracker
-        self.tracker.clear()
-        self._update_tracker_from_docs(docs, chunks)
+        # Sauvegarder l'index BM25 persistant
+        print(f"\n🔤 Sauvegarde de l'index BM25...")
+        if dedup is not None:
+            # Doublons rattachés après la dernière fenêtre
+            self._write_duplicate_metadata(collection, bm25_index, dedup)
+            dedup.save(staging_path / DEDUP_INDEX_FILENAME)
+        flush_vector_store(vectordb)
+        save_bm25_index(bm25_index, staging_path)
         
-        # Sauvegarder les métadonnées
-        self.tracker.set_metadata("chunk_size", self.chunk_size)
-        self.tracker.set_metadata("chunk_overlap", self.chunk_overlap)
-        self.tracker.set_metadata("index_type", "full")
+        # Le tracker reprend les fichiers et les métadonnées de la nouvelle
+        # version (une transaction), avant la publication: dès que la
+        # version est servie, ses métadonnées sont lisibles
+        self.tracker.finish_build(version, {
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "chunking": self.chunking,
+            "deduplicate": self.deduplicate,
+            "embedding_backend": self.embedding_backend,
+            "embedding_model": self.embedding_model,
+            "embedding_dimensions": self.embedding_dimensions,
+            "vector_quantization": self.vector_quantization,
+            "vector_backend": self.vector_backend,
+            "hnsw_m": self.hnsw_m if self.vector_backend == "hnsw" else None,
+            "hnsw_ef_search": self.hnsw_ef_search,
+            "index_type": "full"
+        })
         
+        # Bascule atomique vers la nouvelle version
+        publish_index_version(self.db_path, staging_path)
+        removed = cleanup_index_versions(self.db_path)
+        if removed:
+            print(f"   ♻️  {len(removed)} ancienne(s) version(s) supprimée(s)")
+        
+        tracker_stats = self.tracker.get_stats()
         stats = {
             "status": "success",
-            "files": len(docs),
-            "chunks": len(chunks),
-            "db_path": str(self.db_path.absolute())
+            "files": tracker_stats["file_count"],
+            "chunks": tracker_stats["total_chunks"],
+            "resumed_files": len(committed),
+            "db_path": str(staging_path.absolute()),
+            "version": version
         }
         
         print(f"\n✅ Index construit avec succès!")
         print(f"   📊 {stats['files']} fichiers → {stats['chunks']} chunks")
         print(f"   💾 Sauvegardé dans: {stats['db_path']}")
+        self._report_embedding_cache(stats)
+        self._report_duplicates(stats, dedup)
         
         return stats
     
+    @_holds_writer_lock
     def build_incremental_index(self) -> dict:
         """
         Met à jour l'index de façon incrémentale.
@@ -187,16 +678,66 @@ class ProjectIndexer:
             raise FileNotFoundError(f"Le projet {self.project_name} n'existe pas.")
         
         # Si pas d'index existant, faire une construction complète
-        if not self.db_path.exists():
+        if not index_exists(self.db_path):
             print("   ℹ️  Pas d'index existant, construction complète...")
             return self.build_full_index()
         
+        self._check_embedding_backend()
+        
         # Détecter les changements
         new_files, modified_files, deleted_files = self.tracker.detect_changes(
             self.project_path,
             extensions=[".txt", ".md", ".pdf", ".docx"]
         )
         
+        return self._apply_changes(new_files, modified_files, deleted_files)
+    
+    @_holds_writer_lock
+    def index_paths(self, paths: List[Path]) -> dict:
+        """
+        Met à jour l'index pour une liste précise de chemins.
+        
+        Contrairement à `build_incremental_index`, le projet n'est pas
+        reparcouru: seuls les chemins fournis (par exemple ceux signalés
+        par le mode surveillance) sont examinés.
+        
+        Args:
+            paths: Fichiers ou dossiers créés, modifiés, supprimés ou renommés
+            
+        Returns:
+            Dict avec les statistiques de mise à jour
+        """
+        if not index_exists(self.db_path):
+            print("   ℹ️  Pas d'index existant, construction complète...")
+            return self.build_full_index()
+        
+        self._check_embedding_backend()
+        
+        new_files, modified_files, deleted_files = self.tracker.check_paths(
+            self.project_path,
+            paths,
+            extensions=[".txt", ".md", ".pdf", ".docx"]
+        )
+        return self._apply_changes(new_files, modified_files, deleted_files)
+    
+    @_holds_writer_lock
+    def _apply_changes(
+        self,
+        new_files: List[Path],
+        modified_files: List[Path],
+        deleted_files: List[str]
+    ) -> dict:
+        """
+        Applique des changements détectés à l'index actif.
+        
+        Args:
+            new_files: Fichiers ajoutés
+            modified_files: Fichiers modifiés
+            deleted_files: Chemins relatifs des fichiers supprimés
+            
+        Returns:
+            Dict avec les statistiques de mise à jour
+        """
         total_changes = len(new_files) + len(modified_files) + len(deleted_files)
         
         if total_changes == 0:
@@ -216,6 +757,26 @@ class ProjectIndexer:
         # Récupérer la base vectorielle existante
         vectordb = self._get_vectordb()
         collection = vectordb._collection
+        bm25_index = self._load_bm25_index(collection)
+        dedup = self._load_dedup_index(collection)
+        
+        if dedup is not None:
+            # Fichiers dont des doublons sont rattachés aux fichiers modifiés
+            # ou supprimés: réindexés pour ne pas perdre leur contenu
+            changed = deleted_files + [
+                str(path.relative_to(self.project_path)) for path in modified_files
+            ]
+            indexed_paths = set(changed) | {
+                str(path.relative_to(self.project_path)) for path in new_files
+            }
+            dependents = [
+                self.project_path / rel_path
+                for rel_path in sorted(dedup.dependent_files(changed) - indexed_paths)
+                if (self.project_path / rel_path).exists()
+            ]
+            if dependents:
+                print(f"   🧬 {len(dependents)} fichiers partageant des doublons à réindexer")
+                modified_files = modified_files + dependents
         
         # Traiter les suppressions
         if deleted_files:
@@ -223,21 +784,24 @@ class ProjectIndexer:
             for rel_path in deleted_files:
                 # Supprimer les chunks associés
                 self._delete_chunks_for_file(collection, rel_path)
-                self.tracker.remove_file(rel_path)
-        
-        # Traiter les modifications (supprimer puis réajouter)
-        if modified_files:
-            print(f"\n📝 Mise à jour des fichiers modifiés...")
-            for file_path in modified_files:
-                rel_path = str(file_path.relative_to(self.project_path))
-                self._delete_chunks_for_file(collection, rel_path)
+                bm25_index.remove_file(rel_path)
+            self.tracker.remove_files(deleted_files)
+            if dedup is not None:
+                dedup.remove_files(deleted_files)
         
         # Charger et indexer les nouveaux/modifiés
+        # (les fichiers modifiés sont comparés chunk par chunk)
         files_to_index = new_files + modified_files
         if files_to_index:
             print(f"\n🔮 Indexation de {len(files_to_index)} fichiers...")
-            docs, chunks = self._index_files(files_to_index, vectordb)
-            self._update_tracker_from_docs(docs, chunks)
+            indexed = self._index_files(files_to_index, vectordb, bm25_index, dedup)
+            self.tracker.update_files(indexed)
+        
+        if dedup is not None:
+            self._write_duplicate_metadata(collection, bm25_index, dedup)
+            dedup.save(self.index_path / DEDUP_INDEX_FILENAME)
+        flush_vector_store(vectordb)
+        save_bm25_index(bm25_index, self.index_path)
         
         stats = {
             "status": "updated",
@@ -247,6 +811,8 @@ class ProjectIndexer:
         }
         
         print(f"\n✅ Index mis à jour avec succès!")
+        self._report_embedding_cache(stats)
+        self._report_duplicates(stats, dedup)
         
         return stats
     
@@ -265,81 +831,152 @@ class ProjectIndexer:
         except Exception as e:
             print(f"   ⚠️  Erreur suppression {relative_path}: {e}")
     
+    def _plan_file_chunks(
+        self,
+        collection,
+        relative_path: str,
+        chunks: List[Document]
+    ) -> Tuple[List[Tuple[str, Document]], List[str], List[Tuple[str, Document]]]:
+        """
+        Compare les nouveaux chunks d'un fichier avec ceux de l'index.
+        
+        Grâce aux IDs déterministes, seuls les chunks dont le texte a
+        changé sont à supprimer ou à embedder; les chunks inchangés ne
+        voient que leurs métadonnées mises à jour.
+        
+        Args:
+            collection: Collection ChromaDB
+            relative_path: Chemin relatif du fichier
+            chunks: Nouveaux chunks du fichier
+            
+        Returns:
+            Tuple (chunks à ajouter, IDs à supprimer, chunks conservés),
+            les chunks étant des tuples (chunk_id, chunk)
+        """
+        existing = collection.get(where={"relative_path": relative_path}, include=[])
+        existing_ids = set(existing.get("ids") or [])
+        
+        chunk_ids = compute_chunk_ids(chunks)
+        stale_ids = list(existing_ids - set(chunk_ids))
+        
+        added = [(cid, chunk) for cid, chunk in zip(chunk_ids, chunks) if cid not in existing_ids]
+        kept = [(cid, chunk) for cid, chunk in zip(chunk_ids, chunks) if cid in existing_ids]
+        
+        return added, stale_ids, kept
+    
     def _index_files(
         self,
         files: List[Path],
-        vectordb: Chroma
-    ) -> Tuple[List[Document], List[Document]]:
+        vectordb: VectorStore,
+        bm25_index: Optional[BM25Index] = None,
+        dedup: Optional[NearDuplicateIndex] = None
+    ) -> List[FileInfo]:
         """
         Indexe une liste de fichiers.
         
+        Les fichiers sont d'abord chargés et comparés à l'index, puis les
+        chunks à ajouter de tous les fichiers passent ensemble dans le
+        pipeline d'embedding par lots.
+        
+        Args:
+            files: Fichiers à indexer
+            vectordb: Base vectorielle cible
+            bm25_index: Index BM25 à patcher avec les chunks
+            dedup: Index des doublons: les chunks à ajouter quasi
+                identiques à un chunk stocké ne sont pas embeddés
+        
         Returns:
-            Tuple (documents originaux, chunks)
+            Informations des fichiers indexés, pour le tracker
         """
-        from src.loaders import TextLoader
+        collection = vectordb._collection
         
-        all_docs = []
+        indexed = []
         all_chunks = []
+        all_ids = []
+        to_add = []
+        to_delete = []
+        to_update = []
+        
+        if dedup is not None:
+            # Les doublons de ces fichiers sont recalculés ci-dessous
+            dedup.forget_duplicates(
+                str(file_path.relative_to(self.project_path)) for file_path in files
+            )
         
         for file_path in files:
             try:
-                # Charger le document
-                loader = TextLoader(str(file_path), encoding="utf-8")
-                docs = loader.load()
-                
-                # Ajouter les métadonnées
-                for doc in docs:
-                    doc.metadata["relative_path"] = str(
-                        file_path.relative_to(self.project_path)
-                    )
-                    doc.metadata["file_name"] = file_path.name
-                
-                all_docs.extend(docs)
+                # Charger le document (texte, PDF ou DOCX via le cache d'extraction)
+                docs = load_document(file_path)
+                add_file_metadata(docs, file_path, self.project_path)
                 
                 # Découper en chunks
                 chunks = split_documents(
                     docs,
                     chunk_size=self.chunk_size,
-                    chunk_overlap=self.chunk_overlap
+                    chunk_overlap=self.chunk_overlap,
+                    chunking=self.chunking
                 )
-                all_chunks.extend(chunks)
                 
-                # Ajouter à la base vectorielle
-                if chunks:
-                    vectordb.add_documents(chunks)
+                # Comparer avec l'index existant
+                rel_path = str(file_path.relative_to(self.project_path))
+                added, stale_ids, kept = self._plan_file_chunks(
+                    collection, rel_path, chunks
+                )
+                to_add.extend(added)
+                to_delete.extend(stale_ids)
+                to_update.extend(kept)
+                all_chunks.extend(chunks)
+                all_ids.extend(compute_chunk_ids(chunks))
+                indexed.append(self.tracker.make_file_info(file_path, rel_path, len(chunks)))
                 
-                print(f"   ✓ {file_path.name}: {len(chunks)} chunks")
+                print(
+                    f"   ✓ {file_path.name}: {len(chunks)} chunks "
+                    f"(+{len(added)} / -{len(stale_ids)} / ={len(kept)})"
+                )
                 
             except Exception as e:
                 print(f"   ✗ Erreur {file_path.name}: {e}")
         
-        return all_docs, all_chunks
-    
-    def _update_tracker_from_docs(
-        self,
-        docs: List[Document],
-        chunks: List[Document]
-    ):
-        """Met à jour le tracker avec les documents indexés."""
-        # Compter les chunks par fichier
-        chunk_counts = {}
-        for chunk in chunks:
-            rel_path = chunk.metadata.get("relative_path", "")
-            chunk_counts[rel_path] = chunk_counts.get(rel_path, 0) + 1
-        
-        # Mettre à jour le tracker
-        for doc in docs:
-            rel_path = doc.metadata.get("relative_path", "")
-            if rel_path:
-                file_path = self.project_path / rel_path
-                if file_path.exists():
-                    self.tracker.update_file(
-                        file_path=rel_path,
-                        file_hash=get_file_hash(file_path),
-                        size=file_path.stat().st_size,
-                        modified=file_path.stat().st_mtime,
-                        chunk_count=chunk_counts.get(rel_path, 0)
-                    )
+        collapsed_ids = set()
+        if dedup is not None:
+            dedup.remove_ids(to_delete)
+            unique = []
+            for chunk_id, chunk in to_add:
+                if dedup.collapse(chunk_id, chunk):
+                    collapsed_ids.add(chunk_id)
+                else:
+                    unique.append((chunk_id, chunk))
+            to_add = unique
+        
+        # Appliquer les changements en écritures groupées
+        if to_delete:
+            collection.delete(ids=to_delete)
+        
+        if to_update:
+            # Les positions peuvent avoir changé: mise à jour sans ré-embedding
+            collection.update(
+                ids=[cid for cid, _ in to_update],
+                metadatas=[chunk.metadata for _, chunk in to_update]
+            )
+        
+        # Un upsert sur les IDs fournis, par lots concurrents
+        self.pipeline.upsert(collection, to_add)
+        
+        if bm25_index is not None:
+            bm25_index.remove_ids(to_delete)
+            stored = [
+                (chunk_id, chunk) for chunk_id, chunk in zip(all_ids, all_chunks)
+                if chunk_id not in collapsed_ids
+            ]
+            bm25_index.add_documents(
+                [chunk for _, chunk in stored],
+                [chunk_id for chunk_id, _ in stored]
+            )
+            if dedup is not None:
+                # Les chunks réajoutés reprennent leur liste de doublons
+                bm25_index.update_metadata(dedup.representative_metadata(all_ids))
+        
+        return indexed
     
     def get_index_stats(self) -> dict:
         """Retourne les statistiques de l'index."""
@@ -347,10 +984,33 @@ class ProjectIndexer:
         stats["project"] = self.project_name
         stats["chunk_size"] = self.tracker.get_metadata("chunk_size")
         stats["chunk_overlap"] = self.tracker.get_metadata("chunk_overlap")
+        stats["chunking"] = self.tracker.get_metadata("chunking") or "recursive"
+        stats["embedding_backend"] = self.tracker.get_metadata("embedding_backend")
+        stats["embedding_model"] = self.tracker.get_metadata("embedding_model")
+        stats["embedding_dimensions"] = self.tracker.get_metadata("embedding_dimensions")
+        stats["vector_quantization"] = self.tracker.get_metadata("vector_quantization") or "none"
+        stats["vector_backend"] = self.tracker.get_metadata("vector_backend") or "chroma"
+        stats["hnsw_m"] = self.tracker.get_metadata("hnsw_m")
+        stats["hnsw_ef_search"] = self.tracker.get_metadata("hnsw_ef_search")
         return stats
 
 
-def build_index(project_name: str, chunk_size: int = 1000, chunk_overlap: int = 150):
+def build_index(
+    project_name: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+    resume: bool = False,
+    parallel_loading: bool = False,
+    chunking: str = None,
+    deduplicate: bool = None,
+    embedding_backend: str = None,
+    embedding_model: str = None,
+    embedding_dimensions: int = None,
+    vector_quantization: str = None,
+    vector_backend: str = None,
+    hnsw_m: int = None,
+    hnsw_ef_search: int = None
+):
     """
     Construit l'index vectoriel pour un projet (reconstruction complète).
     
@@ -358,23 +1018,50 @@ def build_index(project_name: str, chunk_size: int = 1000, chunk_overlap: int =
         project_name: Nom du projet (dossier dans data/)
         chunk_size: Taille des chunks
         chunk_overlap: Chevauchement entre chunks
+        resume: Reprendre la dernière construction interrompue
+        parallel_loading: Charger les fichiers dans plusieurs processus
+        chunking: Mode de découpage ("recursive" ou "markdown")
+        deduplicate: Fusionner les chunks quasi identiques (None = choix de l'index existant)
+        embedding_backend: Backend d'embeddings (None = celui de l'index existant)
+        embedding_model: Modèle d'embeddings (None = celui du backend)
+        embedding_dimensions: Embeddings raccourcis (None = ceux de l'index existant)
+        vector_quantization: "none", "float16" ou "int8" (None = celle de l'index existant)
+        vector_backend: "chroma", "numpy", "numpy-float16" ou "hnsw" (None = celui de l'index existant)
+        hnsw_m: Voisins par nœud du graphe HNSW (None = celui de l'index existant)
+        hnsw_ef_search: Largeur de recherche HNSW (None = valeur enregistrée)
     """
     indexer = ProjectIndexer(
         project_name,
         chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
+        chunk_overlap=chunk_overlap,
+        parallel_loading=parallel_loading,
+        chunking=chunking,
+        deduplicate=deduplicate,
+        embedding_backend=embedding_backend,
+        embedding_model=embedding_model,
+        embedding_dimensions=embedding_dimensions,
+        vector_quantization=vector_quantization,
+        vector_backend=vector_backend,
+        hnsw_m=hnsw_m,
+        hnsw_ef_search=hnsw_ef_search
     )
-    return indexer.build_full_index()
+    return indexer.build_full_index(resume=resume)
 
 
-def update_index(project_name: str):
+def update_index(project_name: str, hnsw_ef_search: int = None):
     """
     Met à jour un index existant (incrémental).
     
     Args:
         project_name: Nom du projet
+        hnsw_ef_search: Nouvelle largeur de recherche HNSW (None = inchangée)
     """
-    indexer = ProjectIndexer(project_name)
+    indexer = ProjectIndexer(project_name, hnsw_ef_search=hnsw_ef_search)
+    if hnsw_ef_search and indexer.vector_backend == "hnsw" and index_exists(indexer.db_path):
+        # Enregistrée dans l'index actif, même sans fichier modifié
+        indexer._get_vectordb()
+        indexer.tracker.set_metadata("hnsw_ef_search", hnsw_ef_search)
+        print(f"   🎚️  ef_search HNSW: {hnsw_ef_search}")
     return indexer.build_incremental_index()
 
 
@@ -394,19 +1081,54 @@ def get_index_stats(project_name: str) -> dict:
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python -m src.indexer <nom_projet> [--full|--update|--stats]")
+        print("Usage: python -m src.indexer <nom_projet> [--full|--resume|--update|--watch|--stats]")
         print("Exemples:")
         print("  python -m src.indexer anomalie2084          # Incrémental")
         print("  python -m src.indexer anomalie2084 --full   # Reconstruction complète")
+        print("  python -m src.indexer anomalie2084 --resume # Reprendre une reconstruction interrompue")
+        print("  python -m src.indexer anomalie2084 --full --parallel  # Chargement PDF/DOCX sur tous les cœurs")
+        print("  python -m src.indexer anomalie2084 --full --chunking markdown  # Découpage par titres")
+        print("  python -m src.indexer anomalie2084 --full --no-dedup  # Garder les chunks quasi identiques")
+        print("  python -m src.indexer anomalie2084 --full --embeddings local-onnx  # Embeddings locaux (CPU)")
+        print("  python -m src.indexer anomalie2084 --full --embedding-model text-embedding-3-small --dimensions 512")
+        print("  python -m src.indexer anomalie2084 --full --vector-store numpy  # Index exact en mémoire mappée")
+        print("  python -m src.indexer anomalie2084 --full --vector-store numpy --quantization int8  # + codes int8 (+25% disque), présélection puis rescoring")
+        print("  python -m src.indexer anomalie2084 --full --vector-store hnsw --hnsw-m 32  # Index approché (gros corpus)")
+        print("  python -m src.indexer anomalie2084 --ef-search 128  # Régler le rappel HNSW sans reconstruire")
+        print("  python -m src.indexer anomalie2084 --watch  # Indexation continue")
         print("  python -m src.indexer anomalie2084 --stats  # Afficher les stats")
         sys.exit(1)
     
     project = sys.argv[1]
     mode = sys.argv[2] if len(sys.argv) > 2 else "--update"
     
+    def option_value(flag: str) -> Optional[str]:
+        """Valeur d'une option `--flag valeur` (None si absente)."""
+        if flag in sys.argv[3:]:
+            return sys.argv[sys.argv.index(flag) + 1]
+        return None
+    
+    build_options = {
+        "parallel_loading": "--parallel" in sys.argv[3:],
+        "chunking": option_value("--chunking"),
+        "deduplicate": False if "--no-dedup" in sys.argv[3:] else None,
+        "embedding_backend": option_value("--embeddings"),
+        "embedding_model": option_value("--embedding-model"),
+        "embedding_dimensions": int(option_value("--dimensions")) if option_value("--dimensions") else None,
+        "vector_quantization": option_value("--quantization"),
+        "vector_backend": option_value("--vector-store"),
+        "hnsw_m": int(option_value("--hnsw-m")) if option_value("--hnsw-m") else None,
+        "hnsw_ef_search": int(option_value("--ef-search")) if option_value("--ef-search") else None
+    }
+    
     try:
         if mode == "--full":
-            build_index(project)
+            build_index(project, **build_options)
+        elif mode == "--resume":
+            build_index(project, resume=True, **build_options)
+        elif mode == "--watch":
+            from src.watcher import watch_project
+            watch_project(project)
         elif mode == "--stats":
             stats = get_index_stats(project)
             print(f"\n📊 Statistiques de l'index '{project}':")
@@ -414,9 +1136,17 @@ if __name__ == "__main__":
             print(f"   Chunks: {stats.get('total_chunks', 0)}")
             print(f"   Taille totale: {stats.get('total_size', 0) / 1024:.1f} KB")
             print(f"   Chunk size: {stats.get('chunk_size', 'N/A')}")
+            print(f"   Découpage: {stats.get('chunking', 'recursive')}")
+            print(f"   Embeddings: {stats.get('embedding_backend') or 'N/A'} ({stats.get('embedding_model') or 'N/A'})")
+            if stats.get("embedding_dimensions"):
+                print(f"   Dimensions: {stats['embedding_dimensions']}")
+            print(f"   Quantification: {stats.get('vector_quantization', 'none')}")
+            print(f"   Stockage des vecteurs: {stats.get('vector_backend', 'chroma')}")
+            if stats.get("hnsw_m"):
+                print(f"   Graphe HNSW: M={stats['hnsw_m']}, ef_search={stats.get('hnsw_ef_search') or 'défaut'}")
             print(f"   Dernière indexation: {stats.get('last_indexed', 'N/A')}")
         else:  # --update par défaut
-            update_index(project)
+            update_index(project, hnsw_ef_search=build_options["hnsw_ef_search"])
     except Exception as e:
         print(f"\n❌ Erreur: {e}")
         import traceback
@@ -4,6 +4,7 @@ Identifie les connexions entre personnages, lieux, événements, objets, thèmes
 """
 from pathlib import Path
 from typing import List, Dict, Set, Tuple
+from src.fusion import document_key
 from src.rag import get_relevant_passages
 import re
 
@@ -70,6 +71,8 @@ def find_links(project_name: str, concept: str, k: int = 10) -> Dict[str, List[D
         'concepts': [],
         'fichiers': []
     }
+    # (catégorie, nom en minuscules) -> lien, pour retrouver un lien sans parcourir la liste
+    links_by_name = {}
     
     # Extraire les entités de chaque passage
     for doc in passages:
@@ -81,22 +84,20 @@ def find_links(project_name: str, concept: str, k: int = 10) -> Dict[str, List[D
             for item in items:
                 if item.lower() != concept.lower():
                     # Chercher si l'item existe déjà
-                    found = False
-                    for link in links[category]:
-                        if link['nom'].lower() == item.lower():
-                            link['occurrences'] += 1
-                            if source_file not in link['sources']:
-                                link['sources'].append(source_file)
-                            found = True
-                            break
-                    
-                    if not found:
-                        links[category].append({
+                    link = links_by_name.get((category, item.lower()))
+                    if link is not None:
+                        link['occurrences'] += 1
+                        if source_file not in link['sources']:
+                            link['sources'].append(source_file)
+                    else:
+                        link = {
                             'nom': item,
                             'occurrences': 1,
                             'sources': [source_file],
                             'contexte': doc.page_content[:200] + "..."
-                        })
+                        }
+                        links[category].append(link)
+                        links_by_name[(category, item.lower())] = link
     
     # Trier par nombre d'occurrences
     for category in links:
@@ -124,12 +125,12 @@ def suggest_connections(project_name: str, entity1: str, entity2: str) -> Dict:
     passages1 = get_relevant_passages(project_name, entity1, k=5)
     passages2 = get_relevant_passages(project_name, entity2, k=5)
     
-    # Trouver les passages qui mentionnent les deux
+    # Trouver les passages qui mentionnent les deux (même chunk: même source et texte)
     common_passages = []
-    passages1_ids = {id(doc): doc for doc in passages1}
+    passages1_keys = {document_key(doc) for doc in passages1}
     
     for doc in passages2:
-        if id(doc) in passages1_ids:
+        if document_key(doc) in passages1_keys:
             common_passages.append({
                 'contenu': doc.page_content,
                 'source': doc.metadata.get('relative_path', 'source inconnue')
@@ -9,7 +9,7 @@ Supporte:
 - Embeddings locaux (sentence-transformers)
 """
 import os
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from enum import Enum
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
@@ -26,6 +26,22 @@ class ProviderType(Enum):
     LOCAL = "local"
 
 
+@dataclass
+class EmbeddingBackendConfig:
+    """
+    Backend d'embeddings d'un index.
+    
+    Le backend et le modèle sont enregistrés dans les métadonnées de
+    l'index: les requêtes doivent être embeddées avec le même modèle
+    que les chunks.
+    """
+    name: str
+    provider: ProviderType
+    model: str
+    onnx_file: Optional[str] = None  # Modèle ONNX (quantifié int8) pour sentence-transformers
+    description: str = ""
+
+
 @dataclass
 class ModelConfig:
     """Configuration d'un modèle."""
@@ -102,6 +118,36 @@ PRESET_MODELS = {
 }
 
 
+# Backends d'embeddings sélectionnables par projet
+EMBEDDING_BACKENDS = {
+    "openrouter": EmbeddingBackendConfig(
+        name="openrouter",
+        provider=ProviderType.OPENROUTER,
+        model="text-embedding-ada-002",
+        description="OpenAI via OpenRouter - Un appel réseau par requête"
+    ),
+    "openai": EmbeddingBackendConfig(
+        name="openai",
+        provider=ProviderType.OPENAI,
+        model="text-embedding-ada-002",
+        description="OpenAI direct - Un appel réseau par requête"
+    ),
+    "local": EmbeddingBackendConfig(
+        name="local",
+        provider=ProviderType.LOCAL,
+        model="paraphrase-multilingual-MiniLM-L12-v2",
+        description="sentence-transformers sur CPU - Hors ligne, gratuit"
+    ),
+    "local-onnx": EmbeddingBackendConfig(
+        name="local-onnx",
+        provider=ProviderType.LOCAL,
+        model="paraphrase-multilingual-MiniLM-L12-v2",
+        onnx_file="onnx/model_quint8_avx2.onnx",
+        description="sentence-transformers ONNX int8 - Quelques ms par requête sur CPU"
+    ),
+}
+
+
 class LLMProvider(ABC):
     """Interface abstraite pour les providers LLM."""
     
@@ -267,14 +313,38 @@ class LocalEmbeddingsProvider(LLMProvider):
             "Utilisez OllamaProvider pour les LLMs locaux."
         )
     
-    def create_embeddings(self, model: str = None, **kwargs):
+    def create_embeddings(
+        self,
+        model: str = None,
+        onnx_file: str = None,
+        batch_size: int = 64,
+        dimensions: int = None,
+        **kwargs
+    ):
+        """
+        Crée un client sentence-transformers (inférence CPU par lots).
+        
+        Args:
+            model: Modèle sentence-transformers
+            onnx_file: Fichier ONNX du dépôt du modèle (ex. version
+                quantifiée int8); nécessite optimum[onnxruntime]
+            batch_size: Nombre de textes encodés par passe
+            dimensions: Tronquer les vecteurs à ce nombre de dimensions
+                (modèles Matryoshka), avant normalisation
+        """
+        model_kwargs = {"device": "cpu"}
+        if onnx_file:
+            model_kwargs.update({"backend": "onnx", "model_kwargs": {"file_name": onnx_file}})
+        if dimensions:
+            model_kwargs["truncate_dim"] = dimensions
+        
         try:
             from langchain_community.embeddings import HuggingFaceEmbeddings
             
             return HuggingFaceEmbeddings(
                 model_name=model or self.DEFAULT_MODEL,
-                model_kwargs={"device": "cpu"},
-                encode_kwargs={"normalize_embeddings": True},
+                model_kwargs=model_kwargs,
+                encode_kwargs={"normalize_embeddings": True, "batch_size": batch_size},
                 **kwargs
             )
         except ImportError:
@@ -443,6 +513,155 @@ def create_embeddings(prefer_local: bool = False, **kwargs):
     return get_llm_factory().create_embeddings(prefer_local=prefer_local, **kwargs)
 
 
+def default_embedding_backend() -> str:
+    """
+    Backend d'embeddings des index créés sans choix explicite.
+    
+    OpenRouter si la clé API est une clé OpenRouter (sk-or-v1-...),
+    OpenAI sinon: c'est le comportement historique de l'indexeur.
+    """
+    api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENROUTER_API_KEY") or ""
+    return "openrouter" if api_key.startswith("sk-or-v1-") else "openai"
+
+
+def get_embedding_backend(name: str) -> EmbeddingBackendConfig:
+    """
+    Retourne la configuration d'un backend d'embeddings.
+    
+    Args:
+        name: Nom du backend (voir EMBEDDING_BACKENDS)
+    
+    Returns:
+        EmbeddingBackendConfig
+    """
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Backend d'embeddings inconnu: {name} "
+            f"(choix: {', '.join(EMBEDDING_BACKENDS)})"
+        )
+    return EMBEDDING_BACKENDS[name]
+
+
+def create_backend_embeddings(backend: str, model: str = None, dimensions: int = None):
+    """
+    Crée le client d'embeddings d'un backend.
+    
+    Args:
+        backend: Nom du backend (voir EMBEDDING_BACKENDS)
+        model: Modèle (défaut: celui du backend)
+        dimensions: Embeddings raccourcis (Matryoshka): paramètre
+            `dimensions` de l'API OpenAI (modèles text-embedding-3),
+            troncature pour sentence-transformers. None = taille native
+    
+    Returns:
+        Client d'embeddings LangChain
+    """
+    config = get_embedding_backend(backend)
+    provider = get_llm_factory().providers[config.provider]
+    model = model or config.model
+    
+    if config.provider == ProviderType.LOCAL:
+        return provider.create_embeddings(model, onnx_file=config.onnx_file, dimensions=dimensions)
+    if dimensions:
+        if "text-embedding-3" not in model:
+            raise ValueError(
+                f"Le modèle {model} ne fournit pas d'embeddings raccourcis "
+                f"(modèles text-embedding-3 uniquement)"
+            )
+        return provider.create_embeddings(model, dimensions=dimensions)
+    return provider.create_embeddings(model)
+
+
+def create_query_embeddings(backend: str, model: str = None, dimensions: int = None):
+    """
+    Crée le client d'embeddings des chemins de recherche.
+    
+    Les requêtes passent par le cache LRU du processus
+    (src/utils/embedding_cache.py): une même question n'est embeddée
+    qu'une fois, quel que soit le nombre de moteurs qui la posent.
+    
+    Args:
+        backend: Nom du backend (voir EMBEDDING_BACKENDS)
+        model: Modèle (défaut: celui du backend)
+        dimensions: Embeddings raccourcis (None = taille native)
+    
+    Returns:
+        CachedQueryEmbeddings
+    """
+    from src.utils.embedding_cache import CachedQueryEmbeddings
+    
+    return CachedQueryEmbeddings(
+        create_backend_embeddings(backend, model, dimensions),
+        model_name=embedding_cache_key(backend, model, dimensions)
+    )
+
+
+def embedding_cache_key(backend: str, model: str = None, dimensions: int = None) -> str:
+    """
+    Clé du cache d'embeddings d'un backend.
+    
+    Identique à la clé historique (classe + modèle) pour les backends
+    distants; les variantes ONNX sont distinguées car leurs vecteurs
+    diffèrent légèrement, les embeddings raccourcis par leur taille.
+    """
+    config = get_embedding_backend(backend)
+    model = model or config.model
+    if config.provider == ProviderType.LOCAL:
+        key = f"HuggingFaceEmbeddings:{model}"
+        if config.onnx_file:
+            key = f"{key}#{config.onnx_file}"
+    else:
+        key = f"OpenAIEmbeddings:{model}"
+    return f"{key}@{dimensions}" if dimensions else key
+
+
+def resolve_index_embeddings(
+    project_name: str,
+    backend: str = None,
+    model: str = None
+) -> Tuple[str, str, Optional[int]]:
+    """
+    Backend et modèle à utiliser pour interroger l'index d'un projet.
+    
+    Le backend enregistré par l'indexeur est utilisé par défaut; un
+    choix explicite différent est refusé (les vecteurs ne seraient pas
+    comparables).
+    
+    Args:
+        project_name: Nom du projet
+        backend: Backend demandé (None = celui de l'index)
+        model: Modèle demandé (None = celui de l'index)
+    
+    Returns:
+        Tuple (backend, modèle, dimensions des embeddings raccourcis ou None),
+        à passer à create_backend_embeddings
+    """
+    from src.utils.file_hash import read_index_metadata
+    
+    metadata = read_index_metadata(project_name)
+    indexed_backend = metadata.get("embedding_backend")
+    indexed_model = metadata.get("embedding_model")
+    
+    if indexed_backend is None:
+        # Index construit avant l'enregistrement du backend
+        backend = backend or default_embedding_backend()
+        return backend, model or get_embedding_backend(backend).model, None
+    
+    requested_backend = backend or indexed_backend
+    requested_model = model or (
+        indexed_model if requested_backend == indexed_backend
+        else get_embedding_backend(requested_backend).model
+    )
+    if (requested_backend, requested_model) != (indexed_backend, indexed_model):
+        raise ValueError(
+            f"L'index '{project_name}' a été construit avec les embeddings "
+            f"{indexed_backend} ({indexed_model}), pas {requested_backend} ({requested_model}).\n"
+            f"Reconstruisez-le: python -m src.indexer {project_name} --full "
+            f"--embeddings {requested_backend}"
+        )
+    return indexed_backend, indexed_model, metadata.get("embedding_dimensions")
+
+
 def list_available_models() -> Dict[str, List[str]]:
     """
     Liste tous les modèles disponibles par provider.
@@ -2,12 +2,20 @@
 Chargement et découpage des documents pour le RAG fiction.
 Version 2.0 avec support PDF et DOCX.
 """
+import os
+from collections import deque
+from itertools import chain
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+from src.utils.markdown_parser import MarkdownParser, parse_frontmatter
+from src.utils.text_cache import get_text_cache
+
 
 # Extensions supportées par type
 SUPPORTED_EXTENSIONS = {
@@ -18,6 +26,12 @@ SUPPORTED_EXTENSIONS = {
 
 ALL_EXTENSIONS = [ext for exts in SUPPORTED_EXTENSIONS.values() for ext in exts]
 
+# Modes de découpage: "recursive" (caractères) ou "markdown" (par titres)
+CHUNKING_MODES = ("recursive", "markdown")
+
+# Extensions découpées par titres en mode "markdown"
+MARKDOWN_EXTENSIONS = (".md",)
+
 
 def load_text_file(file_path: Path) -> List[Document]:
     """
@@ -109,12 +123,17 @@ def load_docx_file(file_path: Path) -> List[Document]:
             )
 
 
-def load_document(file_path: Path) -> List[Document]:
+def load_document(file_path: Path, use_cache: bool = True) -> List[Document]:
     """
     Charge un document selon son extension.
     
+    Le texte extrait des PDF et DOCX est mis en cache par hash du
+    fichier (voir src/utils/text_cache.py): un fichier déjà analysé
+    n'est pas ré-analysé.
+    
     Args:
         file_path: Chemin vers le fichier
+        use_cache: Utiliser le cache de texte extrait (PDF, DOCX)
         
     Returns:
         Liste de documents LangChain
@@ -124,88 +143,270 @@ def load_document(file_path: Path) -> List[Document]:
     if suffix in SUPPORTED_EXTENSIONS["text"]:
         return load_text_file(file_path)
     elif suffix in SUPPORTED_EXTENSIONS["pdf"]:
-        return load_pdf_file(file_path)
+        loader = load_pdf_file
     elif suffix in SUPPORTED_EXTENSIONS["docx"]:
-        return load_docx_file(file_path)
+        loader = load_docx_file
     else:
         raise ValueError(f"Extension non supportée: {suffix}")
+    
+    if use_cache:
+        return get_text_cache().load(file_path, loader)
+    return loader(file_path)
 
 
-def load_project_documents(
+def add_file_metadata(docs: List[Document], file_path: Path, project_path: Path):
+    """
+    Ajoute les métadonnées de fichier utilisées par l'index.
+    
+    Args:
+        docs: Documents chargés depuis le fichier
+        file_path: Chemin du fichier
+        project_path: Chemin vers le dossier du projet
+    """
+    for doc in docs:
+        doc.metadata["relative_path"] = str(file_path.relative_to(project_path))
+        doc.metadata["file_name"] = file_path.name
+        doc.metadata["file_type"] = file_path.suffix.lower()
+        doc.metadata["folder"] = file_path.parent.name
+
+
+def list_project_files(
     project_path: Path,
-    extensions: Optional[List[str]] = None,
-    verbose: bool = True
-) -> List[Document]:
+    extensions: Optional[List[str]] = None
+) -> List[Path]:
     """
-    Charge tous les fichiers d'un projet.
+    Liste les fichiers supportés d'un projet.
     
     Args:
         project_path: Chemin vers le dossier du projet
         extensions: Liste d'extensions à charger (défaut: toutes supportées)
-        verbose: Afficher la progression
         
     Returns:
-        Liste de documents LangChain
+        Liste des chemins, triée
     """
     if extensions is None:
         extensions = ALL_EXTENSIONS
     
-    docs = []
-    
     if not project_path.exists():
         raise FileNotFoundError(f"Le projet {project_path} n'existe pas")
     
-    # Compter les fichiers d'abord
-    files_to_load = []
-    for path in project_path.rglob("*"):
-        if path.is_file() and path.suffix.lower() in extensions:
-            files_to_load.append(path)
+    return sorted(
+        path for path in project_path.rglob("*")
+        if path.is_file() and path.suffix.lower() in extensions
+    )
+
+
+def _load_document_job(file_path: str) -> Tuple[Optional[List[Document]], Optional[str]]:
+    """
+    Charge un document dans un processus du pool.
     
-    if verbose:
-        print(f"📁 {len(files_to_load)} fichiers trouvés")
+    Les erreurs sont renvoyées plutôt que levées, pour qu'un fichier
+    illisible n'interrompe pas le chargement des autres.
     
-    # Charger chaque fichier
-    for path in files_to_load:
+    Returns:
+        Tuple (documents, None) ou (None, message d'erreur)
+    """
+    try:
+        return load_document(Path(file_path)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _iter_loaded_sequential(
+    files: Iterable[Path]
+) -> Iterator[Tuple[Path, Optional[List[Document]], Optional[str]]]:
+    """Charge les fichiers un par un dans le processus courant."""
+    for path in files:
         try:
-            loaded_docs = load_document(path)
+            yield path, load_document(path), None
+        except Exception as e:
+            yield path, None, str(e)
+
+
+def _iter_loaded_isolated(
+    entries: Iterable[Tuple[Path, Future]]
+) -> Iterator[Tuple[Path, Optional[List[Document]], Optional[str]]]:
+    """
+    Reprend les fichiers d'un pool qui a planté, dans l'ordre.
+    
+    Les fichiers déjà chargés avant l'arrêt gardent leur résultat; les
+    autres sont rechargés un par un dans un processus dédié: seul le
+    fichier qui fait réellement planter ce processus est signalé.
+    """
+    executor = None
+    try:
+        for path, future in entries:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                docs, error = future.result()
+                yield path, docs, error
+                continue
             
-            # Enrichir les métadonnées
-            for doc in loaded_docs:
-                doc.metadata["relative_path"] = str(path.relative_to(project_path))
-                doc.metadata["file_name"] = path.name
-                doc.metadata["file_type"] = path.suffix.lower()
-                doc.metadata["folder"] = path.parent.name
+            if executor is None:
+                executor = ProcessPoolExecutor(max_workers=1)
+            try:
+                docs, error = executor.submit(_load_document_job, str(path)).result()
+            except BrokenProcessPool:
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = None
+                docs, error = None, "arrêt inattendu du processus de chargement"
+            yield path, docs, error
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_loaded_parallel(
+    files: Iterable[Path],
+    max_workers: Optional[int] = None
+) -> Iterator[Tuple[Path, Optional[List[Document]], Optional[str]]]:
+    """
+    Charge les fichiers dans un pool de processus, résultats dans l'ordre.
+    
+    Au plus 2 fichiers par processus sont en cours à la fois, ce qui
+    borne la mémoire quand le consommateur est plus lent (embeddings).
+    Si un processus plante (bibliothèque native sur un PDF corrompu),
+    les fichiers en cours sont rechargés un par un pour trouver le
+    fautif (voir `_iter_loaded_isolated`), puis le chargement reprend
+    dans un nouveau pool.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    window = max_workers * 2
+    remaining = iter(files)
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    
+    try:
+        while True:
+            while len(pending) < window:
+                path = next(remaining, None)
+                if path is None:
+                    break
+                try:
+                    future = executor.submit(_load_document_job, str(path))
+                except BrokenProcessPool:
+                    # Pool planté pendant le remplissage: fichier soumis après la reprise
+                    remaining = chain([path], remaining)
+                    if not pending:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        executor = ProcessPoolExecutor(max_workers=max_workers)
+                        continue
+                    break
+                pending.append((path, future))
             
-            docs.extend(loaded_docs)
+            if not pending:
+                break
             
-            if verbose:
-                print(f"✓ Chargé: {path.relative_to(project_path)}")
-                
-        except Exception as e:
-            if verbose:
-                print(f"✗ Erreur {path.name}: {e}")
+            path, future = pending.popleft()
+            try:
+                docs, error = future.result()
+            except BrokenProcessPool:
+                # Le fichier en tête n'est pas forcément le fautif: tout
+                # fichier en cours a pu faire planter le pool
+                executor.shutdown(wait=False, cancel_futures=True)
+                suspects = [(path, future), *pending]
+                pending.clear()
+                yield from _iter_loaded_isolated(suspects)
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+                continue
+            
+            yield path, docs, error
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_project_documents(
+    project_path: Path,
+    files: Optional[Iterable[Path]] = None,
+    extensions: Optional[List[str]] = None,
+    verbose: bool = True,
+    parallel: bool = False,
+    max_workers: Optional[int] = None
+) -> Iterator[Tuple[Path, List[Document]]]:
+    """
+    Charge les fichiers d'un projet un par un (générateur).
     
-    return docs
+    Un seul fichier est en mémoire à la fois: adapté aux gros projets.
+    Les fichiers illisibles sont signalés et ignorés.
+    
+    Avec `parallel=True`, le chargement (analyse PDF/DOCX, limitée par
+    le CPU) est réparti sur un pool de processus; les documents sont
+    toujours produits dans l'ordre des fichiers.
+    
+    Args:
+        project_path: Chemin vers le dossier du projet
+        files: Fichiers à charger (défaut: tous les fichiers supportés)
+        extensions: Liste d'extensions à charger (défaut: toutes supportées)
+        verbose: Afficher la progression
+        parallel: Charger les fichiers dans plusieurs processus
+        max_workers: Nombre de processus (défaut: nombre de cœurs)
+        
+    Yields:
+        Tuples (chemin du fichier, documents chargés)
+    """
+    if files is None:
+        files = list_project_files(project_path, extensions)
+    
+    if parallel:
+        loaded = _iter_loaded_parallel(files, max_workers)
+    else:
+        loaded = _iter_loaded_sequential(files)
+    
+    for path, loaded_docs, error in loaded:
+        if error is not None:
+            if verbose:
+                print(f"✗ Erreur {path.name}: {error}")
+            continue
+        
+        # Enrichir les métadonnées
+        add_file_metadata(loaded_docs, path, project_path)
+        
+        if verbose:
+            print(f"✓ Chargé: {path.relative_to(project_path)}")
+        
+        yield path, loaded_docs
 
 
-def split_documents(
-    docs: List[Document],
-    chunk_size: int = 1000,
-    chunk_overlap: int = 150,
-    separators: Optional[List[str]] = None
+def load_project_documents(
+    project_path: Path,
+    extensions: Optional[List[str]] = None,
+    verbose: bool = True,
+    parallel: bool = False,
+    max_workers: Optional[int] = None
 ) -> List[Document]:
     """
-    Découpe les documents en chunks pour l'embedding.
+    Charge tous les fichiers d'un projet.
     
     Args:
-        docs: Liste de documents à découper
-        chunk_size: Taille maximale d'un chunk en caractères
-        chunk_overlap: Chevauchement entre chunks
-        separators: Séparateurs personnalisés
+        project_path: Chemin vers le dossier du projet
+        extensions: Liste d'extensions à charger (défaut: toutes supportées)
+        verbose: Afficher la progression
+        parallel: Charger les fichiers dans plusieurs processus (PDF, DOCX)
+        max_workers: Nombre de processus (défaut: nombre de cœurs)
         
     Returns:
-        Liste de chunks
+        Liste de documents LangChain
     """
+    files_to_load = list_project_files(project_path, extensions)
+    
+    if verbose:
+        print(f"📁 {len(files_to_load)} fichiers trouvés")
+    
+    docs = []
+    for _, loaded_docs in iter_project_documents(
+        project_path, files_to_load, verbose=verbose,
+        parallel=parallel, max_workers=max_workers
+    ):
+        docs.extend(loaded_docs)
+    
+    return docs
+
+
+def _create_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: Optional[List[str]] = None
+) -> RecursiveCharacterTextSplitter:
+    """Crée le découpeur utilisé pour la fiction."""
     if separators is None:
         # Séparateurs optimisés pour la fiction
         separators = [
@@ -221,14 +422,126 @@ def split_documents(
             ""         # Caractère
         ]
     
-    splitter = RecursiveCharacterTextSplitter(
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
         separators=separators,
         length_function=len,
     )
+
+
+def _split_markdown_document(
+    doc: Document,
+    splitter: RecursiveCharacterTextSplitter,
+    chunk_size: int,
+    parser: MarkdownParser
+) -> List[Document]:
+    """
+    Découpe un document Markdown aux frontières de ses sections.
+    
+    Les sections consécutives sont regroupées tant que le chunk reste
+    sous `chunk_size`; seules les sections trop longues passent par le
+    découpage récursif. Le frontmatter est retiré du texte, son titre
+    et ses tags vont dans les métadonnées.
+    """
+    frontmatter, body = parse_frontmatter(doc.page_content)
     
-    chunks = splitter.split_documents(docs)
+    metadata = dict(doc.metadata)
+    if isinstance(frontmatter, dict):
+        if isinstance(frontmatter.get("title"), str):
+            metadata["title"] = frontmatter["title"]
+        tags = frontmatter.get("tags")
+        if isinstance(tags, list):
+            metadata["tags"] = ", ".join(str(tag) for tag in tags)
+        elif isinstance(tags, str):
+            metadata["tags"] = tags
+    
+    chunks = []
+    group = []  # Sections en attente de regroupement
+    
+    def flush():
+        if not group:
+            return
+        # Chemin commun des sections regroupées
+        path = group[0]["path"]
+        for section in group[1:]:
+            common = 0
+            while common < min(len(path), len(section["path"])) and path[common] == section["path"][common]:
+                common += 1
+            path = path[:common]
+        chunks.append(Document(
+            page_content="\n\n".join(section["content"] for section in group),
+            metadata={**metadata, "header_path": " > ".join(path)}
+        ))
+        group.clear()
+    
+    for section in parser.split_sections(body):
+        if len(section["content"]) > chunk_size:
+            flush()
+            pieces = splitter.split_text(section["content"])
+            for piece in pieces[:-1]:
+                chunks.append(Document(
+                    page_content=piece,
+                    metadata={**metadata, "header_path": " > ".join(section["path"])}
+                ))
+            # La fin de la section peut être regroupée avec les suivantes
+            section = {**section, "content": pieces[-1]}
+        
+        group_size = sum(len(s["content"]) + 2 for s in group)
+        if group and group_size + len(section["content"]) > chunk_size:
+            flush()
+        group.append(section)
+    
+    flush()
+    return chunks
+
+
+def _split_file_documents(
+    docs: List[Document],
+    splitter: RecursiveCharacterTextSplitter,
+    chunk_size: int,
+    chunking: str
+) -> List[Document]:
+    """Découpe les documents d'un fichier selon le mode de découpage."""
+    if chunking not in CHUNKING_MODES:
+        raise ValueError(f"Mode de découpage inconnu: {chunking} (choix: {', '.join(CHUNKING_MODES)})")
+    
+    if chunking == "recursive":
+        return splitter.split_documents(docs)
+    
+    parser = MarkdownParser()
+    chunks = []
+    for doc in docs:
+        if str(doc.metadata.get("source", "")).lower().endswith(MARKDOWN_EXTENSIONS):
+            chunks.extend(_split_markdown_document(doc, splitter, chunk_size, parser))
+        else:
+            chunks.extend(splitter.split_documents([doc]))
+    return chunks
+
+
+def split_documents(
+    docs: List[Document],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+    separators: Optional[List[str]] = None,
+    chunking: str = "recursive"
+) -> List[Document]:
+    """
+    Découpe les documents en chunks pour l'embedding.
+    
+    Args:
+        docs: Liste de documents à découper
+        chunk_size: Taille maximale d'un chunk en caractères
+        chunk_overlap: Chevauchement entre chunks
+        separators: Séparateurs personnalisés
+        chunking: "recursive" (caractères) ou "markdown" (sections des
+            fichiers .md, métadonnée header_path)
+        
+    Returns:
+        Liste de chunks
+    """
+    splitter = _create_splitter(chunk_size, chunk_overlap, separators)
+    chunks = _split_file_documents(docs, splitter, chunk_size, chunking)
     
     # Ajouter un index de chunk dans les métadonnées
     for i, chunk in enumerate(chunks):
@@ -239,6 +552,42 @@ def split_documents(
     return chunks
 
 
+def iter_split_documents(
+    doc_stream: Iterable[Tuple[Path, List[Document]]],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+    separators: Optional[List[str]] = None,
+    start_index: int = 0,
+    chunking: str = "recursive"
+) -> Iterator[Tuple[Path, List[Document]]]:
+    """
+    Découpe un flux de documents fichier par fichier (générateur).
+    
+    Équivalent en flux de `split_documents`: les chunks d'un fichier
+    sont produits dès qu'il est chargé, avec un chunk_index global.
+    
+    Args:
+        doc_stream: Flux de tuples (chemin, documents), voir iter_project_documents
+        chunk_size: Taille maximale d'un chunk en caractères
+        chunk_overlap: Chevauchement entre chunks
+        separators: Séparateurs personnalisés
+        start_index: Premier chunk_index (reprise d'une construction)
+        chunking: Mode de découpage (voir split_documents)
+        
+    Yields:
+        Tuples (chemin du fichier, chunks du fichier)
+    """
+    splitter = _create_splitter(chunk_size, chunk_overlap, separators)
+    chunk_index = start_index
+    
+    for path, docs in doc_stream:
+        chunks = _split_file_documents(docs, splitter, chunk_size, chunking)
+        for chunk in chunks:
+            chunk.metadata["chunk_index"] = chunk_index
+            chunk_index += 1
+        yield path, chunks
+
+
 def smart_split_documents(
     docs: List[Document],
     min_chunk_size: int = 500,
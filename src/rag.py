@@ -4,12 +4,15 @@ Version 2.0 avec recherche hybride et reranking.
 """
 from pathlib import Path
 from typing import List, Optional, Dict, Any
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
+from langchain_openai import ChatOpenAI
 from langchain_core.documents import Document
 import os
 from dotenv import load_dotenv
 
+from src.fusion import FUSION_METHODS, select_candidates
+from src.hybrid_search import HybridSearcher, get_hybrid_searcher
+from src.llm_providers import create_query_embeddings, resolve_index_embeddings
+
 # Charger les variables d'environnement depuis le bon chemin
 BASE_DIR = Path(__file__).resolve().parent.parent
 ENV_PATH = BASE_DIR / ".env"
@@ -109,7 +112,11 @@ class RAGEngine:
         use_openrouter: bool = True,
         use_hybrid_search: bool = True,
         use_reranking: bool = True,
-        rerank_model: str = "fast"
+        rerank_model: str = "fast",
+        embedding_backend: str = None,
+        embedding_model: str = None,
+        fusion: str = "rrf",
+        candidate_ratio: float = None
     ):
         """
         Initialise le moteur RAG.
@@ -122,7 +129,17 @@ class RAGEngine:
             use_hybrid_search: Activer la recherche hybride BM25+vecteurs
             use_reranking: Activer le reranking par cross-encoder
             rerank_model: Modèle de reranking ("fast", "accurate", "multilingual")
+            embedding_backend: Backend d'embeddings des requêtes (défaut:
+                celui enregistré par l'indexeur; un autre backend est refusé)
+            embedding_model: Modèle d'embeddings (défaut: celui de l'index)
+            fusion: Fusion de la recherche hybride ("rrf" ou "minmax")
+            candidate_ratio: Coupe adaptative des candidats hybrides: ne
+                garder (et reranker) que ceux dont le score fusionné atteint
+                cette part du meilleur (ex. 0.5 avec "minmax"; None = tous)
         """
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Méthode de fusion inconnue: {fusion} (choix: {', '.join(FUSION_METHODS)})")
+        
         self.project_name = project_name
         self.model = model
         self.temperature = temperature
@@ -130,6 +147,10 @@ class RAGEngine:
         self.use_hybrid_search = use_hybrid_search
         self.use_reranking = use_reranking
         self.rerank_model = rerank_model
+        self.embedding_backend = embedding_backend
+        self.embedding_model = embedding_model
+        self.fusion = fusion
+        self.candidate_ratio = candidate_ratio
         
         self.db_path = Path("db") / project_name
         
@@ -142,33 +163,32 @@ class RAGEngine:
         # Configuration des embeddings
         self.embeddings = self._create_embeddings()
         
-        # Charger la base vectorielle
-        self.vectordb = Chroma(
-            embedding_function=self.embeddings,
-            persist_directory=str(self.db_path),
-            collection_name=project_name
+        # Moteur de recherche partagé par le processus (base vectorielle,
+        # index BM25): les autres RAGEngine du projet réutilisent le même
+        self.searcher = get_hybrid_searcher(
+            project_name,
+            embeddings=self.embeddings,
+            embedding_backend=self.embedding_backend,
+            embedding_model=self.embedding_model
         )
         
+        # Version d'index active, fixée pour la durée de vie de l'instance
+        self.index_path = self.searcher.index_path
+        self.vectordb = self.searcher.vectordb
+        
         # Créer le LLM
         self.llm = self._create_llm()
         
         # Composants optionnels (lazy loading)
-        self._hybrid_searcher = None
         self._reranker = None
     
     def _create_embeddings(self):
-        """Crée le client d'embeddings selon la configuration."""
-        if self.use_openrouter:
-            return OpenAIEmbeddings(
-                model="openai/text-embedding-3-small",
-                base_url="https://openrouter.ai/api/v1",
-                default_headers={
-                    "HTTP-Referer": "https://github.com/fiction-assistant",
-                    "X-Title": "Fiction Assistant RAG"
-                }
-            )
-        else:
-            return OpenAIEmbeddings()
+        """Crée le client d'embeddings de l'index (même backend que l'indexeur, requêtes en cache)."""
+        backend, model, dimensions = resolve_index_embeddings(
+            self.project_name, self.embedding_backend, self.embedding_model
+        )
+        self.embedding_backend, self.embedding_model = backend, model
+        return create_query_embeddings(backend, model, dimensions)
     
     def _create_llm(self):
         """Crée le client LLM selon la configuration."""
@@ -189,19 +209,9 @@ class RAGEngine:
             )
     
     @property
-    def hybrid_searcher(self):
-        """Lazy loading du rechercheur hybride."""
-        if self._hybrid_searcher is None and self.use_hybrid_search:
-            try:
-                from src.hybrid_search import HybridSearcher
-                self._hybrid_searcher = HybridSearcher(
-                    self.project_name,
-                    use_openrouter=self.use_openrouter
-                )
-            except ImportError as e:
-                print(f"⚠️ Recherche hybride non disponible: {e}")
-                self.use_hybrid_search = False
-        return self._hybrid_searcher
+    def hybrid_searcher(self) -> Optional[HybridSearcher]:
+        """Rechercheur hybride (le moteur partagé), si la recherche hybride est active."""
+        return self.searcher if self.use_hybrid_search else None
     
     @property
     def reranker(self):
@@ -237,7 +247,14 @@ class RAGEngine:
         if self.use_hybrid_search and self.hybrid_searcher:
             print(f"[RAG]   🔍 Recherche hybride (k={retrieve_k})...")
             start = time.time()
-            docs = self.hybrid_searcher.search(query, k=retrieve_k)
+            results = self.hybrid_searcher.search(
+                query, k=retrieve_k, return_scores=True, fusion=self.fusion
+            )
+            # Candidats trop loin du meilleur écartés avant le reranking
+            results = select_candidates(
+                results, retrieve_k, min_results=k, relative_score=self.candidate_ratio
+            )
+            docs = [result.document for result in results]
             search_time = time.time() - start
             print(f"[RAG]   ✓ Recherche hybride: {search_time:.2f}s ({len(docs)} docs)")
         else:
@@ -711,6 +711,47 @@ async def reindex_project(project: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ===== INDEXATION CONTINUE =====
+
+# Surveillances actives (projets listés dans WATCH_PROJECTS)
+WATCHERS: Dict[str, Any] = {}
+
+
+@app.on_event("startup")
+async def start_watchers():
+    """Démarre l'indexation continue des projets listés dans WATCH_PROJECTS"""
+    projects = [p.strip() for p in os.getenv("WATCH_PROJECTS", "").split(",") if p.strip()]
+    for project in projects:
+        try:
+            from src.watcher import ProjectWatcher
+            
+            watcher = ProjectWatcher(project)
+            watcher.start()
+            WATCHERS[project] = watcher
+        except Exception as e:
+            print(f"[!] Surveillance de '{project}' impossible: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_watchers():
+    """Arrête les surveillances"""
+    for watcher in WATCHERS.values():
+        watcher.stop()
+    WATCHERS.clear()
+
+
+@app.get("/api/watch/status")
+async def get_watch_status():
+    """Statut de l'indexation continue"""
+    return {
+        project: {
+            "updates": watcher.updates,
+            "last_update": watcher.last_update
+        }
+        for project, watcher in WATCHERS.items()
+    }
+
+
 # ===== CONFIGURATION API KEY =====
 
 class ApiKeyUpdate(BaseModel):
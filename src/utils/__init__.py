@@ -1,12 +1,25 @@
 """
 Utilitaires pour Ecrituria.
 """
-from .file_hash import FileHashTracker, get_file_hash
+from .file_hash import FileHashTracker, get_file_hash, get_text_hash
+from .embedding_cache import (
+    CachedEmbeddings,
+    CachedQueryEmbeddings,
+    EmbeddingCache,
+    get_query_cache
+)
 from .markdown_parser import MarkdownParser, parse_frontmatter
+from .text_cache import ExtractedTextCache
 
 __all__ = [
     "FileHashTracker",
     "get_file_hash", 
+    "get_text_hash",
+    "CachedEmbeddings",
+    "CachedQueryEmbeddings",
+    "EmbeddingCache",
+    "get_query_cache",
+    "ExtractedTextCache",
     "MarkdownParser",
     "parse_frontmatter"
 ]
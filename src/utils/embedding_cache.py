@@ -0,0 +1,427 @@
+"""
+Cache persistant des embeddings, adressé par le contenu des chunks.
+
+Les vecteurs sont stockés dans SQLite (db/embedding_cache.db), indexés par
+(modèle d'embeddings, hash SHA-256 du texte). Le cache est partagé entre
+les projets et survit aux reconstructions complètes d'index : un chunk
+dont le texte n'a pas changé n'est jamais ré-envoyé à l'API.
+
+Les embeddings des requêtes passent par un cache LRU en mémoire partagé
+par tout le processus (RAGEngine, HybridSearcher, GraphRAG, agents),
+indexé par (modèle, requête normalisée), et optionnellement persisté
+dans la même base SQLite (QUERY_EMBEDDING_CACHE=disk).
+"""
+import os
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from .file_hash import get_text_hash
+
+
+# Nom du fichier SQLite dans db/
+EMBEDDING_CACHE_FILENAME = "embedding_cache.db"
+
+# Nombre maximum de paramètres par requête SQLite
+_SQLITE_BATCH = 500
+
+# Requêtes gardées en mémoire (surchargeable par QUERY_EMBEDDING_CACHE_SIZE)
+DEFAULT_QUERY_CACHE_SIZE = 1024
+
+# Préfixe des clés de modèle des requêtes dans le cache disque
+# (certains modèles embeddent requêtes et documents différemment)
+_QUERY_MODEL_PREFIX = "query:"
+
+
+def get_embeddings_model_name(embeddings: Embeddings) -> str:
+    """
+    Identifiant stable d'un client d'embeddings (classe + modèle).
+
+    Args:
+        embeddings: Client d'embeddings LangChain
+
+    Returns:
+        Identifiant utilisé comme clé de cache
+    """
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    return f"{type(embeddings).__name__}:{model or 'default'}"
+
+
+class EmbeddingCache:
+    """
+    Stockage SQLite des vecteurs d'embeddings déjà calculés.
+    """
+
+    def __init__(self, db_dir: Path = None):
+        """
+        Initialise le cache.
+
+        Args:
+            db_dir: Répertoire pour la base SQLite (défaut: db/)
+        """
+        self.db_dir = db_dir or Path("db")
+        self.db_path = self.db_dir / EMBEDDING_CACHE_FILENAME
+
+        # Créer le répertoire si nécessaire
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._init_db()
+
+    def _init_db(self):
+        """Crée la table si elle n'existe pas."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+            """)
+            conn.commit()
+
+    def get_many(self, model: str, text_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Récupère les vecteurs connus.
+
+        Args:
+            model: Identifiant du modèle d'embeddings
+            text_hashes: Hash des textes recherchés
+
+        Returns:
+            Dict text_hash -> vecteur (seulement les hash trouvés)
+        """
+        hashes = list(set(text_hashes))
+        found = {}
+
+        with sqlite3.connect(self.db_path) as conn:
+            for start in range(0, len(hashes), _SQLITE_BATCH):
+                batch = hashes[start:start + _SQLITE_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                cursor = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                )
+                for text_hash, blob in cursor:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[text_hash] = vector.tolist()
+
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        """
+        Enregistre des vecteurs (en float32).
+
+        Args:
+            model: Identifiant du modèle d'embeddings
+            vectors: Dict text_hash -> vecteur
+        """
+        now = datetime.now().isoformat()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (model, text_hash, array("f", vector).tobytes(), now)
+                    for text_hash, vector in vectors.items()
+                ]
+            )
+            conn.commit()
+
+    def get_stats(self) -> dict:
+        """
+        Retourne le nombre de vecteurs en cache par modèle.
+
+        Returns:
+            Dict modèle -> nombre de vecteurs
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("SELECT model, COUNT(*) FROM embeddings GROUP BY model")
+            return {model: count for model, count in cursor}
+
+    def clear(self, model: Optional[str] = None):
+        """
+        Vide le cache (entièrement ou pour un modèle).
+
+        Args:
+            model: Modèle à purger (None = tous)
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            if model is None:
+                conn.execute("DELETE FROM embeddings")
+            else:
+                conn.execute("DELETE FROM embeddings WHERE model = ?", (model,))
+            conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Client d'embeddings qui consulte le cache avant d'appeler l'API.
+
+    S'utilise à la place du client d'origine partout où LangChain attend
+    un objet `Embeddings` (Chroma.from_documents, add_documents...).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: Optional[EmbeddingCache] = None,
+        model_name: Optional[str] = None
+    ):
+        """
+        Args:
+            embeddings: Client d'embeddings sous-jacent
+            cache: Cache à utiliser (défaut: db/embedding_cache.db)
+            model_name: Clé de modèle (défaut: déduite du client)
+        """
+        self.embeddings = embeddings
+        self.cache = cache or EmbeddingCache()
+        self.model_name = model_name or get_embeddings_model_name(embeddings)
+
+        # Compteurs pour les statistiques d'indexation
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def lookup(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Cherche les vecteurs déjà calculés, sans appeler l'API.
+
+        Les textes absents (dédupliqués) sont comptés comme manqués: ils
+        doivent être calculés puis enregistrés avec `store`.
+
+        Args:
+            texts: Textes à chercher
+
+        Returns:
+            Vecteur ou None pour chaque texte
+        """
+        hashes = [get_text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, hashes)
+        result = [vectors.get(text_hash) for text_hash in hashes]
+
+        missing = len({h for h, vector in zip(hashes, result) if vector is None})
+        with self._counter_lock:
+            self.hits += len(texts) - missing
+            self.misses += missing
+        return result
+
+    def store(self, texts: List[str], vectors: List[List[float]]):
+        """
+        Enregistre des vecteurs calculés hors de ce client.
+
+        Args:
+            texts: Textes embeddés
+            vectors: Vecteurs correspondants
+        """
+        self.cache.put_many(
+            self.model_name,
+            {get_text_hash(text): vector for text, vector in zip(texts, vectors)}
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Calcule les embeddings en ne payant que les textes inconnus.
+
+        Les textes identiques d'un même lot ne sont envoyés qu'une fois.
+        """
+        hashes = [get_text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, hashes)
+
+        # Textes à calculer, dédupliqués par hash
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in vectors and text_hash not in missing:
+                missing[text_hash] = text
+
+        if missing:
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self.cache.put_many(self.model_name, new_vectors)
+            vectors.update(new_vectors)
+
+        with self._counter_lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        return [vectors[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Les requêtes passent par le cache des requêtes du processus."""
+        return get_query_cache().embed(self.model_name, text, self.embeddings.embed_query)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Forme normalisée d'une requête (clé de cache et texte embeddé).
+
+    Normalisation Unicode NFC et espaces compactés: deux saisies qui ne
+    diffèrent que par ces détails partagent le même vecteur.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class QueryEmbeddingCache:
+    """
+    Cache LRU des embeddings de requêtes, partagé par le processus.
+
+    Une requête en cours de calcul n'est envoyée qu'une fois: les autres
+    threads qui la demandent attendent son résultat.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_QUERY_CACHE_SIZE, disk: Optional[EmbeddingCache] = None):
+        """
+        Args:
+            max_size: Nombre de requêtes gardées en mémoire
+            disk: Cache SQLite de secours (None = mémoire seulement)
+        """
+        self.max_size = max_size
+        self.disk = disk
+        self._entries: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        # Compteurs (voir get_stats)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _get(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        """Lecture mémoire (appelant détenant self._lock)."""
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+        return vector
+
+    def _put(self, key: Tuple[str, str], vector: List[float]):
+        """Insertion mémoire avec éviction LRU (appelant détenant self._lock)."""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def embed(self, model: str, text: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Embedding d'une requête, calculé au plus une fois.
+
+        Args:
+            model: Clé du modèle d'embeddings (voir embedding_cache_key)
+            text: Requête
+            compute: Fonction d'embedding appelée en cas d'absence
+
+        Returns:
+            Vecteur de la requête normalisée
+        """
+        query = normalize_query(text)
+        key = (model, query)
+
+        with self._lock:
+            vector = self._get(key)
+            if vector is not None:
+                self.hits += 1
+                return vector
+            pending = self._pending.setdefault(key, threading.Lock())
+
+        with pending:
+            try:
+                with self._lock:
+                    vector = self._get(key)
+                    if vector is not None:
+                        # Calculée par un autre thread pendant l'attente
+                        self.hits += 1
+                        return vector
+
+                if self.disk is not None:
+                    text_hash = get_text_hash(query)
+                    vector = self.disk.get_many(_QUERY_MODEL_PREFIX + model, [text_hash]).get(text_hash)
+                if vector is not None:
+                    with self._lock:
+                        self.disk_hits += 1
+                else:
+                    vector = list(compute(query))
+                    with self._lock:
+                        self.misses += 1
+                    if self.disk is not None:
+                        self.disk.put_many(_QUERY_MODEL_PREFIX + model, {get_text_hash(query): vector})
+
+                with self._lock:
+                    self._put(key, vector)
+            finally:
+                # Libéré même si le calcul échoue (sinon gardé pour toujours)
+                with self._lock:
+                    if self._pending.get(key) is pending:
+                        del self._pending[key]
+        return vector
+
+    def get_stats(self) -> dict:
+        """Taille et compteurs du cache."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
+
+    def clear(self):
+        """Vide le cache mémoire (le cache disque est conservé)."""
+        with self._lock:
+            self._entries.clear()
+
+
+_query_cache: Optional[QueryEmbeddingCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """
+    Cache des requêtes du processus (créé au premier appel).
+
+    Variables d'environnement:
+        QUERY_EMBEDDING_CACHE_SIZE: Nombre de requêtes en mémoire
+        QUERY_EMBEDDING_CACHE: "disk" pour persister les requêtes dans
+            db/embedding_cache.db (réutilisées après un redémarrage)
+    """
+    global _query_cache
+    with _query_cache_lock:
+        if _query_cache is None:
+            disk = EmbeddingCache() if os.getenv("QUERY_EMBEDDING_CACHE", "").lower() == "disk" else None
+            _query_cache = QueryEmbeddingCache(
+                max_size=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", DEFAULT_QUERY_CACHE_SIZE)),
+                disk=disk
+            )
+        return _query_cache
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Client d'embeddings de recherche: requêtes servies par le cache du processus.
+
+    Les documents (rares côté recherche) sont transmis tels quels.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: Optional[str] = None):
+        """
+        Args:
+            embeddings: Client d'embeddings sous-jacent
+            model_name: Clé de modèle (défaut: déduite du client)
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name or get_embeddings_model_name(embeddings)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return get_query_cache().embed(self.model_name, text, self.embeddings.embed_query)
@@ -3,10 +3,14 @@ Gestion des hash de fichiers pour l'indexation incrémentale.
 Phase 1.3 du plan d'évolution Ecrituria v2.0
 """
 import hashlib
+import os
 import sqlite3
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -22,36 +26,126 @@ class FileInfo:
     chunk_count: int = 0
 
 
-def get_file_hash(file_path: Path) -> str:
+# Algorithmes de hash de fichiers disponibles
+HASH_ALGORITHMS = ("md5", "blake2b", "xxhash")
+
+
+def _create_hasher(algorithm: str):
+    """Crée un objet de hash pour l'algorithme demandé."""
+    if algorithm == "md5":
+        return hashlib.md5()
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == "xxhash":
+        try:
+            import xxhash
+        except ImportError:
+            raise ImportError(
+                "Pour utiliser xxhash, installez-le:\n"
+                "pip install xxhash"
+            )
+        return xxhash.xxh3_128()
+    raise ValueError(f"Algorithme de hash non supporté: {algorithm}")
+
+
+def get_file_hash(file_path: Path, algorithm: str = "md5") -> str:
     """
-    Calcule le hash MD5 d'un fichier.
+    Calcule le hash d'un fichier.
     
     Args:
         file_path: Chemin vers le fichier
+        algorithm: "md5" (défaut), "blake2b" ou "xxhash" (plus rapides)
         
     Returns:
-        Hash MD5 hexadécimal
+        Hash hexadécimal
     """
-    hasher = hashlib.md5()
+    hasher = _create_hasher(algorithm)
     with open(file_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
+        for chunk in iter(lambda: f.read(1 << 20), b''):
             hasher.update(chunk)
     return hasher.hexdigest()
 
 
+def get_text_hash(text: str) -> str:
+    """
+    Calcule le hash SHA-256 d'un texte (contenu d'un chunk).
+    
+    Args:
+        text: Texte à hasher
+        
+    Returns:
+        Hash SHA-256 hexadécimal
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_chunk_id(relative_path: str, text: str, occurrence: int = 0) -> str:
+    """
+    Calcule l'ID déterministe d'un chunk.
+    
+    L'ID ne dépend que du fichier et du contenu du chunk: un chunk
+    inchangé garde le même ID d'une version du fichier à l'autre.
+    
+    Args:
+        relative_path: Chemin relatif du fichier source
+        text: Contenu du chunk
+        occurrence: Rang du chunk parmi les chunks identiques du fichier
+        
+    Returns:
+        ID hexadécimal
+    """
+    chunk_id = get_text_hash(f"{relative_path}\n{get_text_hash(text)}")[:32]
+    if occurrence:
+        chunk_id = f"{chunk_id}-{occurrence}"
+    return chunk_id
+
+
+def read_index_metadata(project_name: str, db_dir: Path = None) -> Dict[str, object]:
+    """
+    Lit les métadonnées d'index d'un projet, en lecture seule.
+    
+    Destiné aux lecteurs (recherche, RAG) qui n'ont pas besoin d'un
+    tracker complet.
+    
+    Args:
+        project_name: Nom du projet
+        db_dir: Répertoire des bases (défaut: db/)
+    
+    Returns:
+        Dict clé -> valeur (vide si le projet n'a jamais été indexé)
+    """
+    db_path = (db_dir or Path("db")) / project_name / "file_index.db"
+    if not db_path.exists():
+        return {}
+    
+    try:
+        with sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True) as conn:
+            rows = conn.execute("SELECT key, value FROM index_metadata").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    
+    return {key: json.loads(value) for key, value in rows}
+
+
 class FileHashTracker:
     """
     Tracker pour suivre les fichiers indexés et détecter les changements.
     Utilise SQLite pour la persistance.
+    
+    Une seule connexion (mode WAL) est ouverte pour toute la durée de vie
+    du tracker et partagée entre threads sous verrou. Les opérations par
+    lots (`update_files`, `remove_files`) tiennent en une transaction.
     """
     
-    def __init__(self, project_name: str, db_dir: Path = None):
+    def __init__(self, project_name: str, db_dir: Path = None, hash_algorithm: str = None):
         """
         Initialise le tracker.
         
         Args:
             project_name: Nom du projet
             db_dir: Répertoire pour la base SQLite (défaut: db/)
+            hash_algorithm: Algorithme de hash des fichiers (défaut: celui
+                de l'index existant, sinon md5)
         """
         self.project_name = project_name
         self.db_dir = db_dir or Path("db")
@@ -60,12 +154,47 @@ class FileHashTracker:
         # Créer le répertoire si nécessaire
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # Connexion unique (WAL: les lecteurs ne bloquent pas l'indexeur)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        
+        # Hash calculés lors de la détection: path -> (taille, date, hash)
+        self._recent_hashes: Dict[str, Tuple[int, float, str]] = {}
+        
         # Initialiser la base de données
         self._init_db()
+        
+        # Algorithme de hash: celui de l'index existant prime, pour que
+        # les hash stockés restent comparables jusqu'à la prochaine
+        # reconstruction complète
+        self.preferred_algorithm = hash_algorithm or "md5"
+        stored_algorithm = self.get_metadata("hash_algorithm")
+        if stored_algorithm is None and self.get_stats()["file_count"]:
+            stored_algorithm = "md5"  # Index créé avant le choix d'algorithme
+        
+        self.hash_algorithm = stored_algorithm or self.preferred_algorithm
+        if self.hash_algorithm != self.preferred_algorithm:
+            print(
+                f"   ℹ️  Index existant hashé en {self.hash_algorithm}, "
+                f"{self.preferred_algorithm} sera utilisé à la prochaine reconstruction complète"
+            )
+    
+    @contextmanager
+    def _transaction(self):
+        """Connexion partagée sous verrou; validée à la sortie, annulée en cas d'erreur."""
+        with self._lock, self._conn:
+            yield self._conn
+    
+    def close(self):
+        """Ferme la connexion SQLite."""
+        with self._lock:
+            self._conn.close()
     
     def _init_db(self):
         """Crée les tables si elles n'existent pas."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS files (
                     path TEXT PRIMARY KEY,
@@ -84,7 +213,19 @@ class FileHashTracker:
                 )
             """)
             
-            conn.commit()
+            # Fichiers déjà écrits par une reconstruction complète en cours
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS build_progress (
+                    version TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    modified REAL NOT NULL,
+                    committed_at TEXT NOT NULL,
+                    chunk_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (version, path)
+                )
+            """)
     
     def get_file_info(self, file_path: str) -> Optional[FileInfo]:
         """
@@ -96,7 +237,7 @@ class FileHashTracker:
         Returns:
             FileInfo ou None si non trouvé
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cursor = conn.execute(
                 "SELECT path, hash, size, modified, indexed_at, chunk_count FROM files WHERE path = ?",
                 (file_path,)
@@ -120,24 +261,35 @@ class FileHashTracker:
         
         Args:
             file_path: Chemin relatif du fichier
-            file_hash: Hash MD5 du fichier
+            file_hash: Hash du fichier
             size: Taille en octets
             modified: Timestamp de modification
             chunk_count: Nombre de chunks créés
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
+        self.update_files([FileInfo(
+            path=file_path,
+            hash=file_hash,
+            size=size,
+            modified=modified,
+            indexed_at=datetime.now().isoformat(),
+            chunk_count=chunk_count
+        )])
+    
+    def update_files(self, files: Iterable[FileInfo]):
+        """
+        Met à jour ou ajoute des fichiers en une seule transaction.
+        
+        Args:
+            files: Informations des fichiers (hash déjà calculés)
+        """
+        with self._transaction() as conn:
+            conn.executemany("""
                 INSERT OR REPLACE INTO files (path, hash, size, modified, indexed_at, chunk_count)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                file_path,
-                file_hash,
-                size,
-                modified,
-                datetime.now().isoformat(),
-                chunk_count
-            ))
-            conn.commit()
+            """, [
+                (info.path, info.hash, info.size, info.modified, info.indexed_at, info.chunk_count)
+                for info in files
+            ])
     
     def remove_file(self, file_path: str):
         """
@@ -146,9 +298,51 @@ class FileHashTracker:
         Args:
             file_path: Chemin relatif du fichier
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM files WHERE path = ?", (file_path,))
-            conn.commit()
+        self.remove_files([file_path])
+    
+    def remove_files(self, file_paths: Iterable[str]):
+        """
+        Supprime des fichiers du tracker en une seule transaction.
+        
+        Args:
+            file_paths: Chemins relatifs des fichiers
+        """
+        with self._transaction() as conn:
+            conn.executemany(
+                "DELETE FROM files WHERE path = ?",
+                [(file_path,) for file_path in file_paths]
+            )
+    
+    def make_file_info(self, file_path: Path, relative_path: str, chunk_count: int = 0) -> FileInfo:
+        """
+        Construit les informations d'un fichier qui vient d'être indexé.
+        
+        Le hash calculé lors de la détection des changements est réutilisé
+        si le fichier n'a pas changé depuis; sinon le fichier est hashé.
+        
+        Args:
+            file_path: Chemin du fichier
+            relative_path: Chemin relatif dans le projet
+            chunk_count: Nombre de chunks créés
+            
+        Returns:
+            FileInfo prêt pour `update_files`
+        """
+        stat = file_path.stat()
+        recent = self._recent_hashes.pop(relative_path, None)
+        if recent and recent[0] == stat.st_size and recent[1] == stat.st_mtime:
+            file_hash = recent[2]
+        else:
+            file_hash = get_file_hash(file_path, self.hash_algorithm)
+        
+        return FileInfo(
+            path=relative_path,
+            hash=file_hash,
+            size=stat.st_size,
+            modified=stat.st_mtime,
+            indexed_at=datetime.now().isoformat(),
+            chunk_count=chunk_count
+        )
     
     def get_all_files(self) -> Dict[str, FileInfo]:
         """
@@ -158,7 +352,7 @@ class FileHashTracker:
             Dict path -> FileInfo
         """
         files = {}
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cursor = conn.execute(
                 "SELECT path, hash, size, modified, indexed_at, chunk_count FROM files"
             )
@@ -173,61 +367,207 @@ class FileHashTracker:
                 )
         return files
     
-    def detect_changes(self, project_path: Path, extensions: List[str] = None) -> Tuple[List[Path], List[Path], List[str]]:
+    def detect_changes(
+        self,
+        project_path: Path,
+        extensions: List[str] = None,
+        max_workers: int = None
+    ) -> Tuple[List[Path], List[Path], List[str]]:
         """
         Détecte les fichiers ajoutés, modifiés et supprimés.
         
+        Le dossier est parcouru une seule fois. Un fichier dont la taille
+        et la date de modification correspondent à celles enregistrées
+        est considéré inchangé sans être lu; seuls les fichiers suspects
+        sont hashés, en parallèle.
+        
         Args:
             project_path: Chemin vers le dossier du projet
-            extensions: Extensions à surveiller (défaut: .txt, .md)
+            extensions: Extensions à surveiller (défaut: .txt, .md, .pdf, .docx)
+            max_workers: Nombre de threads de hash (défaut: automatique)
             
         Returns:
             Tuple (fichiers_nouveaux, fichiers_modifiés, fichiers_supprimés)
         """
         if extensions is None:
             extensions = [".txt", ".md", ".pdf", ".docx"]
+        extensions = {ext.lower() for ext in extensions}
         
         # Récupérer l'état actuel de l'index
         indexed_files = self.get_all_files()
-        indexed_paths = set(indexed_files.keys())
         
-        # Scanner le système de fichiers
+        # Scanner le système de fichiers (un seul parcours)
         current_paths = set()
         new_files = []
-        modified_files = []
+        suspects = []
+        
+        for root, _, filenames in os.walk(project_path):
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in extensions:
+                    continue
+                
+                file_path = Path(root) / filename
+                rel_path = str(file_path.relative_to(project_path))
+                current_paths.add(rel_path)
+                
+                info = indexed_files.get(rel_path)
+                if info is None:
+                    # Nouveau fichier
+                    new_files.append(file_path)
+                    continue
+                
+                # Chemin rapide: même taille et même date => inchangé
+                stat = file_path.stat()
+                if stat.st_size != info.size or stat.st_mtime != info.modified:
+                    suspects.append((file_path, rel_path, stat))
         
-        for ext in extensions:
-            for file_path in project_path.rglob(f"*{ext}"):
-                if file_path.is_file():
-                    rel_path = str(file_path.relative_to(project_path))
-                    current_paths.add(rel_path)
-                    
-                    if rel_path not in indexed_paths:
-                        # Nouveau fichier
-                        new_files.append(file_path)
-                    else:
-                        # Vérifier si modifié
-                        current_hash = get_file_hash(file_path)
-                        if current_hash != indexed_files[rel_path].hash:
-                            modified_files.append(file_path)
+        # Hasher uniquement les fichiers suspects, en parallèle
+        modified_files = self._hash_suspects(suspects, indexed_files, max_workers)
         
         # Fichiers supprimés
-        deleted_files = list(indexed_paths - current_paths)
+        deleted_files = list(set(indexed_files.keys()) - current_paths)
         
         return new_files, modified_files, deleted_files
     
+    def _hash_suspects(
+        self,
+        suspects: List[Tuple[Path, str, os.stat_result]],
+        indexed_files: Dict[str, FileInfo],
+        max_workers: int = None
+    ) -> List[Path]:
+        """
+        Hashe en parallèle les fichiers dont la taille ou la date a changé.
+        
+        Args:
+            suspects: Tuples (chemin, chemin relatif, stat)
+            indexed_files: Fichiers indexés (path -> FileInfo)
+            max_workers: Nombre de threads de hash (défaut: automatique)
+            
+        Returns:
+            Fichiers dont le contenu a réellement changé
+        """
+        modified_files = []
+        if not suspects:
+            return modified_files
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            hashes = executor.map(
+                lambda item: get_file_hash(item[0], self.hash_algorithm),
+                suspects
+            )
+            touched = []
+            for (file_path, rel_path, stat), current_hash in zip(suspects, hashes):
+                info = indexed_files[rel_path]
+                if current_hash != info.hash:
+                    modified_files.append(file_path)
+                    self._recent_hashes[rel_path] = (stat.st_size, stat.st_mtime, current_hash)
+                else:
+                    # Contenu identique (ex: fichier touché): rafraîchir
+                    # les infos pour profiter du chemin rapide la prochaine fois
+                    touched.append(FileInfo(
+                        rel_path, info.hash, stat.st_size, stat.st_mtime,
+                        datetime.now().isoformat(), info.chunk_count
+                    ))
+        
+        if touched:
+            self.update_files(touched)
+        
+        return modified_files
+    
+    def check_paths(
+        self,
+        project_path: Path,
+        paths: List[Path],
+        extensions: List[str] = None
+    ) -> Tuple[List[Path], List[Path], List[str]]:
+        """
+        Classe des chemins précis sans parcourir le projet.
+        
+        Utilisé par le mode surveillance: seuls les chemins signalés par
+        le système de fichiers sont examinés. Un dossier disparu
+        (supprimé ou renommé) entraîne la suppression de tous les
+        fichiers indexés qu'il contenait; le contenu d'un dossier
+        apparu est examiné.
+        
+        Args:
+            project_path: Chemin vers le dossier du projet
+            paths: Chemins modifiés (fichiers ou dossiers)
+            extensions: Extensions à surveiller (défaut: .txt, .md, .pdf, .docx)
+            
+        Returns:
+            Tuple (fichiers_nouveaux, fichiers_modifiés, fichiers_supprimés)
+        """
+        if extensions is None:
+            extensions = [".txt", ".md", ".pdf", ".docx"]
+        extensions = {ext.lower() for ext in extensions}
+        
+        project_path = Path(project_path)
+        paths = list(paths)
+        indexed_files = None
+        known_files = {}
+        new_files = []
+        suspects = []
+        deleted_files = set()
+        seen = set()
+        
+        for path in paths:
+            path = Path(path)
+            try:
+                rel_path = str(path.relative_to(project_path))
+            except ValueError:
+                continue  # Hors du projet
+            if rel_path in seen:
+                continue
+            seen.add(rel_path)
+            
+            if path.is_dir():
+                # Dossier créé ou renommé: examiner son contenu
+                for root, _, filenames in os.walk(path):
+                    for filename in filenames:
+                        child = Path(root) / filename
+                        child_rel = str(child.relative_to(project_path))
+                        if child_rel not in seen:
+                            paths.append(child)
+                continue
+            
+            if not path.exists():
+                # Fichier ou dossier disparu
+                if indexed_files is None:
+                    indexed_files = self.get_all_files()
+                prefix = rel_path + os.sep
+                deleted_files.update(
+                    p for p in indexed_files if p == rel_path or p.startswith(prefix)
+                )
+                continue
+            
+            if path.suffix.lower() not in extensions:
+                continue
+            
+            info = self.get_file_info(rel_path)
+            if info is None:
+                new_files.append(path)
+                continue
+            
+            stat = path.stat()
+            if stat.st_size != info.size or stat.st_mtime != info.modified:
+                known_files[rel_path] = info
+                suspects.append((path, rel_path, stat))
+        
+        modified_files = self._hash_suspects(suspects, known_files)
+        
+        return new_files, modified_files, sorted(deleted_files)
+    
     def set_metadata(self, key: str, value: any):
         """Stocke une métadonnée d'index."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             conn.execute(
                 "INSERT OR REPLACE INTO index_metadata (key, value) VALUES (?, ?)",
                 (key, json.dumps(value))
             )
-            conn.commit()
     
     def get_metadata(self, key: str, default: any = None) -> any:
         """Récupère une métadonnée d'index."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cursor = conn.execute(
                 "SELECT value FROM index_metadata WHERE key = ?",
                 (key,)
@@ -244,7 +584,7 @@ class FileHashTracker:
         Returns:
             Dict avec les statistiques
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             cursor = conn.execute("""
                 SELECT 
                     COUNT(*) as file_count,
@@ -264,14 +604,126 @@ class FileHashTracker:
                 "last_indexed": row[4]
             }
     
+    def start_build(self, version: str, settings: dict):
+        """
+        Enregistre le début d'une reconstruction complète.
+        
+        Remplace toute reconstruction inachevée précédente.
+        
+        Args:
+            version: Nom de la version d'index en construction
+            settings: Paramètres de la construction (chunking, hash...)
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM build_progress")
+            conn.execute(
+                "INSERT OR REPLACE INTO index_metadata (key, value) VALUES (?, ?)",
+                ("pending_build", json.dumps({"version": version, **settings}))
+            )
+    
+    def get_pending_build(self) -> Optional[dict]:
+        """
+        Retourne la reconstruction complète inachevée, s'il y en a une.
+        
+        Returns:
+            Dict avec "version" et les paramètres de la construction, ou None
+        """
+        return self.get_metadata("pending_build")
+    
+    def record_build_files(self, version: str, files: List[FileInfo]):
+        """
+        Marque des fichiers comme entièrement écrits dans la version en construction.
+        
+        Les fichiers d'un même appel sont enregistrés dans une seule transaction.
+        
+        Args:
+            version: Nom de la version d'index en construction
+            files: Fichiers écrits (hash, taille, date et nombre de chunks)
+        """
+        if not files:
+            return
+        
+        with self._transaction() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO build_progress
+                    (version, path, hash, size, modified, committed_at, chunk_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (version, info.path, info.hash, info.size, info.modified,
+                 info.indexed_at, info.chunk_count)
+                for info in files
+            ])
+    
+    def get_build_files(self, version: str) -> Dict[str, FileInfo]:
+        """
+        Récupère les fichiers déjà écrits dans la version en construction.
+        
+        Args:
+            version: Nom de la version d'index en construction
+            
+        Returns:
+            Dict path -> FileInfo
+        """
+        files = {}
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "SELECT path, hash, size, modified, committed_at, chunk_count "
+                "FROM build_progress WHERE version = ?",
+                (version,)
+            )
+            for row in cursor:
+                files[row[0]] = FileInfo(*row)
+        return files
+    
+    def abort_build(self):
+        """Oublie la reconstruction complète en cours."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM build_progress")
+            conn.execute("DELETE FROM index_metadata WHERE key = 'pending_build'")
+    
+    def finish_build(self, version: str, metadata: Optional[dict] = None):
+        """
+        Termine une reconstruction complète.
+        
+        Dans une seule transaction, les fichiers de la version construite
+        remplacent ceux de l'ancien index et les métadonnées sont
+        remplacées par celles de la construction: un lecteur ne voit
+        jamais l'index sans ses métadonnées (backend d'embeddings...).
+        
+        Args:
+            version: Nom de la version d'index construite
+            metadata: Métadonnées de la nouvelle version (clé -> valeur JSON)
+        """
+        pending = self.get_pending_build() or {}
+        hash_algorithm = pending.get("hash_algorithm", self.preferred_algorithm)
+        metadata = {**(metadata or {}), "hash_algorithm": hash_algorithm}
+        
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM files")
+            conn.execute("""
+                INSERT INTO files (path, hash, size, modified, indexed_at, chunk_count)
+                SELECT path, hash, size, modified, committed_at, chunk_count
+                FROM build_progress WHERE version = ?
+            """, (version,))
+            conn.execute("DELETE FROM build_progress")
+            conn.execute("DELETE FROM index_metadata")
+            conn.executemany(
+                "INSERT INTO index_metadata (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in metadata.items()]
+            )
+        
+        # Hash enregistrés avec l'algorithme de la construction
+        self.hash_algorithm = hash_algorithm
+    
     def clear(self):
         """Supprime toutes les données du tracker."""
-        # Réinitialise les tables si le fichier SQLite vient d'être recréé
-        self._init_db()
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             conn.execute("DELETE FROM files")
             conn.execute("DELETE FROM index_metadata")
-            conn.commit()
+            conn.execute("DELETE FROM build_progress")
+        
+        # Index vide: l'algorithme préféré peut être appliqué
+        self.hash_algorithm = self.preferred_algorithm
 
 
 # Test du module
@@ -0,0 +1,291 @@
+"""
+Versions d'index et bascule atomique.
+
+Une reconstruction complète est écrite dans un dossier versionné
+(db/<projet>/index-<horodatage>/) pendant que la version active continue
+de servir les requêtes. La nouvelle version est publiée en remplaçant
+atomiquement le manifeste db/<projet>/index_versions.json, puis les
+anciennes versions sont supprimées.
+
+Les index créés avant le versionnement (ChromaDB directement dans
+db/<projet>/) restent lisibles tant qu'aucune version n'a été publiée.
+
+Un seul écrivain à la fois par projet: `index_writer_lock` (verrou de
+fichier db/<projet>/.writer.lock) sérialise les constructions et mises
+à jour entre threads (mode surveillance du serveur) et processus (CLI).
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+# Manifeste des versions dans db/<projet>/
+VERSIONS_MANIFEST = "index_versions.json"
+
+# Préfixe des dossiers de version
+VERSION_PREFIX = "index-"
+
+# Fichiers et dossiers d'un index non versionné (ChromaDB + BM25)
+_LEGACY_FILES = ("chroma.sqlite3", "bm25_index.json", "bm25_index.bin")
+# Générations BM25 suivantes (bm25_index.<n>.bin, voir src/bm25_index.py)
+_LEGACY_GLOBS = ("bm25_index.*.bin",)
+_UUID_DIR_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+# Verrou d'écriture du projet
+WRITER_LOCK_FILENAME = ".writer.lock"
+
+# Verrous d'écriture du processus: dossier -> (verrou de thread, profondeur, fichier verrouillé)
+_writer_locks: Dict[str, threading.RLock] = {}
+_writer_depth: Dict[str, int] = {}
+_writer_files: Dict[str, object] = {}
+_writer_registry_lock = threading.Lock()
+
+
+def _read_manifest(db_path: Path) -> dict:
+    """Lit le manifeste des versions (vide si absent)."""
+    manifest_path = Path(db_path) / VERSIONS_MANIFEST
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(db_path: Path, manifest: dict):
+    """Remplace atomiquement le manifeste des versions."""
+    manifest_path = Path(db_path) / VERSIONS_MANIFEST
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, manifest_path)
+
+
+def get_active_version(db_path: Path) -> Optional[str]:
+    """
+    Nom de la version publiée.
+
+    Args:
+        db_path: Dossier du projet dans db/
+
+    Returns:
+        Nom du dossier de version, ou None (index non versionné)
+    """
+    return _read_manifest(db_path).get("current")
+
+
+def get_active_index_path(db_path: Path) -> Path:
+    """
+    Dossier de l'index actif (ChromaDB + BM25).
+
+    Args:
+        db_path: Dossier du projet dans db/
+
+    Returns:
+        Dossier de la version publiée, ou db_path pour un index
+        non versionné
+    """
+    version = get_active_version(db_path)
+    if version:
+        return Path(db_path) / version
+    return Path(db_path)
+
+
+def index_exists(db_path: Path) -> bool:
+    """
+    Indique si un index a déjà été publié pour le projet.
+
+    Args:
+        db_path: Dossier du projet dans db/
+
+    Returns:
+        True si une version est publiée ou si un index non versionné existe
+    """
+    return get_active_version(db_path) is not None or (Path(db_path) / _LEGACY_FILES[0]).exists()
+
+
+def create_index_version(db_path: Path) -> Path:
+    """
+    Crée le dossier d'une nouvelle version (non publiée).
+
+    Args:
+        db_path: Dossier du projet dans db/
+
+    Returns:
+        Chemin du dossier de staging
+    """
+    name = f"{VERSION_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+    version_path = Path(db_path) / name
+    version_path.mkdir(parents=True, exist_ok=False)
+    return version_path
+
+
+def publish_index_version(db_path: Path, version_path: Path):
+    """
+    Publie une version: les nouveaux lecteurs l'utilisent immédiatement.
+
+    Args:
+        db_path: Dossier du projet dans db/
+        version_path: Dossier de la version à publier
+    """
+    manifest = _read_manifest(db_path)
+    previous = manifest.get("current")
+
+    history = [v for v in manifest.get("history", []) if v != version_path.name]
+    if previous and previous != version_path.name and previous not in history:
+        history.append(previous)
+
+    _write_manifest(db_path, {
+        "current": version_path.name,
+        "history": history,
+        "published_at": datetime.now().isoformat()
+    })
+
+
+def discard_index_version(version_path: Path):
+    """
+    Supprime une version jamais publiée (construction abandonnée).
+
+    Args:
+        version_path: Dossier de la version
+    """
+    shutil.rmtree(version_path, ignore_errors=True)
+
+
+def list_index_versions(db_path: Path) -> List[str]:
+    """Liste les dossiers de version présents sur disque (du plus ancien au plus récent)."""
+    db_path = Path(db_path)
+    if not db_path.exists():
+        return []
+    return sorted(
+        entry.name for entry in db_path.iterdir()
+        if entry.is_dir() and entry.name.startswith(VERSION_PREFIX)
+    )
+
+
+def cleanup_index_versions(db_path: Path, keep: int = 2) -> List[str]:
+    """
+    Supprime les versions obsolètes.
+
+    Sont conservées la version active et les `keep - 1` versions
+    publiées précédentes, pour ne pas casser les lecteurs encore
+    ouverts sur l'ancienne version. Les versions jamais publiées
+    (reconstructions interrompues) et les fichiers d'un ancien index
+    non versionné sont supprimés.
+
+    Args:
+        db_path: Dossier du projet dans db/
+        keep: Nombre de versions publiées à conserver
+
+    Returns:
+        Noms des versions supprimées
+    """
+    db_path = Path(db_path)
+    manifest = _read_manifest(db_path)
+    current = manifest.get("current")
+    if not current:
+        return []
+
+    kept = {current}
+    kept.update(manifest.get("history", [])[-(keep - 1):] if keep > 1 else [])
+
+    removed = []
+    for name in list_index_versions(db_path):
+        if name not in kept:
+            shutil.rmtree(db_path / name, ignore_errors=True)
+            removed.append(name)
+
+    _write_manifest(db_path, {
+        **manifest,
+        "history": [v for v in manifest.get("history", []) if v in kept]
+    })
+
+    # Ancien index non versionné (ChromaDB à la racine du projet)
+    legacy_paths = [db_path / filename for filename in _LEGACY_FILES]
+    for pattern in _LEGACY_GLOBS:
+        legacy_paths.extend(db_path.glob(pattern))
+    for path in legacy_paths:
+        try:
+            path.unlink()
+        except OSError:
+            pass  # Absent, ou encore ouvert par un lecteur (Windows)
+    for entry in db_path.iterdir():
+        if entry.is_dir() and _UUID_DIR_PATTERN.match(entry.name):
+            shutil.rmtree(entry, ignore_errors=True)
+
+    return removed
+
+
+def _try_lock_file(f) -> bool:
+    """Tente de verrouiller un fichier ouvert (sans attendre)."""
+    try:
+        if os.name == "nt":
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock_file(f):
+    """Libère le verrou d'un fichier ouvert."""
+    if os.name == "nt":
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def index_writer_lock(db_path: Path) -> Iterator[None]:
+    """
+    Verrou exclusif d'écriture de l'index d'un projet.
+
+    Pris par toute construction ou mise à jour: deux écrivains (thread de
+    surveillance, API, CLI) qui chargent, modifient et réécrivent les
+    mêmes fichiers perdraient les changements de l'autre. Réentrant dans
+    un même thread (une mise à jour peut lancer une construction
+    complète); les autres threads et processus attendent.
+
+    Args:
+        db_path: Dossier du projet dans db/
+    """
+    db_path = Path(db_path)
+    db_path.mkdir(parents=True, exist_ok=True)
+    key = str(db_path.resolve())
+
+    with _writer_registry_lock:
+        thread_lock = _writer_locks.setdefault(key, threading.RLock())
+
+    with thread_lock:
+        depth = _writer_depth.get(key, 0)
+        if depth == 0:
+            f = open(db_path / WRITER_LOCK_FILENAME, "a+b")
+            if not _try_lock_file(f):
+                print(f"   ⏳ Index de '{db_path.name}' en cours d'écriture par un autre processus, attente...")
+                while not _try_lock_file(f):
+                    time.sleep(0.5)
+            _writer_files[key] = f
+        _writer_depth[key] = depth + 1
+        try:
+            yield
+        finally:
+            _writer_depth[key] = depth
+            if depth == 0:
+                f = _writer_files.pop(key)
+                _unlock_file(f)
+                f.close()
@@ -200,6 +200,60 @@ class MarkdownParser:
         
         return sections
     
+    def split_sections(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Découpe le document en sections ordonnées, avec leur chemin de titres.
+        
+        Contrairement à `extract_sections`, l'ordre et les titres répétés
+        sont conservés, le texte de chaque section garde sa ligne de titre
+        et les lignes '#' des blocs de code ne sont pas prises pour des titres.
+        
+        Args:
+            content: Contenu Markdown (sans frontmatter)
+        
+        Returns:
+            Liste de dicts avec:
+            - level: niveau du titre (0 pour le texte avant le premier titre)
+            - title: texte du titre
+            - path: titres englobants, du plus haut au titre de la section
+            - content: texte de la section, titre compris
+        """
+        sections = []
+        stack = []  # (niveau, titre) des titres englobants
+        current = {'level': 0, 'title': '', 'path': [], 'lines': []}
+        in_code = False
+        
+        for line in content.split('\n'):
+            if line.lstrip().startswith(('```', '~~~')):
+                in_code = not in_code
+            
+            match = None if in_code else self.HEADER_PATTERN.match(line)
+            if match:
+                sections.append(current)
+                
+                level = len(match.group(1))
+                title = match.group(2).strip()
+                while stack and stack[-1][0] >= level:
+                    stack.pop()
+                stack.append((level, title))
+                
+                current = {
+                    'level': level,
+                    'title': title,
+                    'path': [t for _, t in stack],
+                    'lines': [line]
+                }
+            else:
+                current['lines'].append(line)
+        
+        sections.append(current)
+        
+        for section in sections:
+            section['content'] = '\n'.join(section.pop('lines')).strip()
+        
+        # Le texte avant le premier titre est souvent vide
+        return [section for section in sections if section['content']]
+
     def extract_character_info(self, content: str) -> Dict[str, Any]:
         """
         Extrait les informations d'une fiche personnage.
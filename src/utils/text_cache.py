@@ -0,0 +1,170 @@
+"""
+Cache persistant du texte extrait des sources binaires (PDF, DOCX).
+
+L'analyse d'un PDF ou d'un DOCX est coûteuse; son résultat ne dépend que
+du contenu du fichier. Le texte extrait est donc stocké dans SQLite
+(db/extracted_text.db), indexé par le hash du fichier: chaque version
+d'un document n'est analysée qu'une fois, les chargements suivants
+(reconstruction complète, mise à jour incrémentale, autre projet
+contenant le même fichier) sont de simples lectures.
+"""
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from langchain_core.documents import Document
+
+from .file_hash import get_file_hash
+
+
+# Nom du fichier SQLite dans db/
+EXTRACTED_TEXT_FILENAME = "extracted_text.db"
+
+# Hash des fichiers sources (indépendant de l'algorithme du tracker)
+_HASH_ALGORITHM = "blake2b"
+
+
+class ExtractedTextCache:
+    """
+    Stockage SQLite du texte extrait des documents binaires.
+    """
+
+    def __init__(self, db_dir: Path = None):
+        """
+        Initialise le cache.
+
+        Args:
+            db_dir: Répertoire pour la base SQLite (défaut: db/)
+        """
+        self.db_dir = db_dir or Path("db")
+        self.db_path = self.db_dir / EXTRACTED_TEXT_FILENAME
+
+        # Créer le répertoire si nécessaire
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre une connexion (le cache est partagé entre processus)."""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _init_db(self):
+        """Crée la table si elle n'existe pas."""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS extracted_text (
+                    file_hash TEXT NOT NULL,
+                    file_type TEXT NOT NULL,
+                    documents BLOB NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (file_hash, file_type)
+                )
+            """)
+            conn.commit()
+
+    def get(self, file_hash: str, file_type: str) -> Optional[List[Document]]:
+        """
+        Récupère les documents extraits d'un fichier.
+
+        Args:
+            file_hash: Hash du contenu du fichier
+            file_type: Extension du fichier (".pdf", ".docx"...)
+
+        Returns:
+            Documents extraits, ou None si absents du cache
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT documents FROM extracted_text WHERE file_hash = ? AND file_type = ?",
+                (file_hash, file_type)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return [
+            Document(page_content=item["page_content"], metadata=item["metadata"])
+            for item in json.loads(zlib.decompress(row[0]))
+        ]
+
+    def put(self, file_hash: str, file_type: str, docs: List[Document]):
+        """
+        Enregistre les documents extraits d'un fichier.
+
+        Args:
+            file_hash: Hash du contenu du fichier
+            file_type: Extension du fichier
+            docs: Documents produits par le loader
+        """
+        payload = json.dumps([
+            {"page_content": doc.page_content, "metadata": doc.metadata}
+            for doc in docs
+        ], ensure_ascii=False, default=str)
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extracted_text (file_hash, file_type, documents, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (file_hash, file_type, zlib.compress(payload.encode("utf-8")), datetime.now().isoformat())
+            )
+            conn.commit()
+
+    def load(self, file_path: Path, loader: Callable[[Path], List[Document]]) -> List[Document]:
+        """
+        Charge un fichier via le cache.
+
+        Args:
+            file_path: Chemin vers le fichier
+            loader: Fonction d'extraction appelée si le fichier est inconnu
+
+        Returns:
+            Documents extraits (la métadonnée "source" pointe vers file_path)
+        """
+        file_type = file_path.suffix.lower()
+        file_hash = get_file_hash(file_path, _HASH_ALGORITHM)
+
+        docs = self.get(file_hash, file_type)
+        if docs is None:
+            docs = loader(file_path)
+            self.put(file_hash, file_type, docs)
+
+        # Le même contenu peut se trouver à un autre emplacement
+        for doc in docs:
+            doc.metadata["source"] = str(file_path)
+
+        return docs
+
+    def get_stats(self) -> dict:
+        """
+        Retourne la taille du cache.
+
+        Returns:
+            Dict avec le nombre de fichiers et le volume compressé
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(documents)), 0) FROM extracted_text"
+            ).fetchone()
+        return {"files": row[0], "compressed_bytes": row[1]}
+
+    def clear(self):
+        """Vide le cache."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM extracted_text")
+            conn.commit()
+
+
+# Instance par processus (les pools de chargement en ouvrent une chacun)
+_default_cache: Optional[ExtractedTextCache] = None
+
+
+def get_text_cache() -> ExtractedTextCache:
+    """Retourne le cache de texte extrait du processus (db/extracted_text.db)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ExtractedTextCache()
+    return _default_cache
@@ -0,0 +1,276 @@
+"""
+Vecteurs quantifiés (float16, int8) avec rescoring exact.
+
+Chaque chunk est stocké sous forme d'un vecteur float32 complet (1536
+dimensions pour les modèles OpenAI). Avec l'option `vector_quantization`
+du backend numpy, la collection garde à côté de sa matrice une matrice
+de codes (voir `NumpyCollection` dans src/vector_store.py), mappée en
+mémoire elle aussi et indexée par les mêmes lignes:
+
+- "float16": 2 octets par dimension, erreur négligeable, mais un
+  balayage plus lent que float32 (conversion sans BLAS dans NumPy);
+- "int8": 1 octet par dimension, avec une échelle symétrique par
+  dimension (élargie si de nouveaux vecteurs la dépassent); balayage
+  ~1,5x plus rapide que float32 (4x moins de mémoire lue).
+
+Une requête est d'abord scorée sur les codes (produit matriciel par
+blocs), puis les `rescore_factor * k` meilleurs candidats sont rescorés
+exactement sur leurs lignes de la matrice: l'erreur de quantification
+ne change que l'ensemble des candidats, pas l'ordre final. Seuls les
+codes sont parcourus, la matrice n'est lue que pour les candidats.
+
+Les backends à index approché (ChromaDB, hnsw) ne sont pas quantifiés:
+leur graphe fait déjà la présélection, un balayage des codes serait
+plus lent.
+
+Combiné à des embeddings raccourcis (option `embedding_dimensions`,
+Matryoshka), le coût d'une requête baisse d'autant. Voir
+src/benchmark_vectors.py pour mesurer le compromis rappel / latence /
+mémoire sur un projet (`QuantizedVectors`: copie en mémoire).
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Stockage des vecteurs: "none" = matrice seule
+VECTOR_QUANTIZATIONS = ("none", "float16", "int8")
+
+# Candidats rescorés exactement: rescore_factor * k
+DEFAULT_RESCORE_FACTOR = 4
+
+# Lignes converties en float32 à la fois lors du scoring (bloc tenant en cache)
+SCORE_BLOCK = 256
+
+
+def check_quantization(quantization: str) -> str:
+    """
+    Valide un mode de quantification.
+
+    Args:
+        quantization: "none", "float16" ou "int8"
+
+    Returns:
+        Le mode validé
+    """
+    if quantization not in VECTOR_QUANTIZATIONS:
+        raise ValueError(
+            f"Quantification inconnue: {quantization} "
+            f"(choix: {', '.join(VECTOR_QUANTIZATIONS)})"
+        )
+    return quantization
+
+
+def code_dtype(quantization: str) -> np.dtype:
+    """Type des codes d'une quantification ("float16" ou "int8")."""
+    return np.dtype(np.float16 if quantization == "float16" else np.int8)
+
+
+def int8_scales(vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Échelles int8 par dimension couvrant des vecteurs.
+
+    Args:
+        vectors: Vecteurs float32 (n x d)
+        scales: Échelles actuelles, conservées si elles suffisent
+
+    Returns:
+        Échelles (d,), jamais plus petites que `scales`
+    """
+    peak = np.abs(vectors).max(axis=0) / 127
+    if scales is not None:
+        peak = np.maximum(scales, peak)
+    return np.maximum(peak, 1e-12).astype(np.float32)
+
+
+def encode(vectors: np.ndarray, quantization: str, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Quantifie des vecteurs float32.
+
+    Args:
+        vectors: Vecteurs (n x d)
+        quantization: "float16" ou "int8"
+        scales: Échelles int8 par dimension (voir int8_scales)
+
+    Returns:
+        Codes (n x d)
+    """
+    if quantization == "float16":
+        return vectors.astype(np.float16)
+    return np.clip(np.round(vectors / scales), -127, 127).astype(np.int8)
+
+
+def code_scores(codes: np.ndarray, queries: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Produits scalaires approchés requêtes x codes (par blocs).
+
+    Args:
+        codes: Codes (n x d), éventuellement mappés en mémoire
+        queries: Requêtes float32 (q x d)
+        scales: Échelles int8 (None pour float16)
+
+    Returns:
+        Matrice q x n des produits scalaires
+    """
+    if scales is not None:
+        queries = queries * scales
+    scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+    for start in range(0, len(codes), SCORE_BLOCK):
+        block = np.asarray(codes[start:start + SCORE_BLOCK], dtype=np.float32)
+        scores[:, start:start + len(block)] = queries @ block.T
+    return scores
+
+
+class QuantizedVectors:
+    """
+    Copie quantifiée en mémoire d'un ensemble de vecteurs (banc d'essai).
+    """
+
+    def __init__(self, quantization: str = "int8"):
+        """
+        Args:
+            quantization: "float16" ou "int8"
+        """
+        if quantization not in VECTOR_QUANTIZATIONS[1:]:
+            raise ValueError(
+                f"Quantification inconnue: {quantization} "
+                f"(choix: {', '.join(VECTOR_QUANTIZATIONS[1:])})"
+            )
+
+        self.quantization = quantization
+        self.ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self.codes: Optional[np.ndarray] = None      # (n, d) float16 ou int8
+        self.sq_norms = np.zeros(0, dtype=np.float32)  # |x|² des vecteurs exacts
+        self.scales: Optional[np.ndarray] = None     # (d,) échelles int8
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> Optional[int]:
+        """Dimension des vecteurs (None tant que l'index est vide)."""
+        self._consolidate()
+        return None if self.codes is None else self.codes.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Mémoire occupée par les vecteurs quantifiés."""
+        self._consolidate()
+        total = self.sq_norms.nbytes
+        if self.codes is not None:
+            total += self.codes.nbytes
+        if self.scales is not None:
+            total += self.scales.nbytes
+        return total
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Quantifie des vecteurs float32 (l'échelle int8 peut s'élargir)."""
+        if self.quantization == "int8":
+            scales = int8_scales(vectors, self.scales)
+            if self.scales is not None and (scales > self.scales).any():
+                # Recoder les vecteurs existants sur l'échelle élargie
+                self._consolidate()
+                if self.codes is not None:
+                    self.codes = np.round(self.codes * (self.scales / scales)).astype(np.int8)
+            self.scales = scales
+        return encode(vectors, self.quantization, self.scales)
+
+    def _consolidate(self):
+        """Regroupe les blocs ajoutés depuis la dernière lecture."""
+        if not self._pending:
+            return
+        blocks = [] if self.codes is None else [(self.codes, self.sq_norms)]
+        blocks.extend(self._pending)
+        self.codes = np.concatenate([codes for codes, _ in blocks])
+        self.sq_norms = np.concatenate([norms for _, norms in blocks])
+        self._pending = []
+
+    def add(self, ids: Sequence[str], vectors):
+        """
+        Ajoute (ou remplace) des vecteurs.
+
+        Args:
+            ids: IDs des chunks
+            vectors: Vecteurs float32, dans l'ordre des IDs
+        """
+        if not len(ids):
+            return
+        self.remove_ids([chunk_id for chunk_id in ids if chunk_id in self._positions])
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes = self._encode(vectors)
+        self._pending.append((codes, np.einsum("ij,ij->i", vectors, vectors)))
+
+        for chunk_id in ids:
+            self._positions[chunk_id] = len(self.ids)
+            self.ids.append(chunk_id)
+
+    def remove_ids(self, ids: Iterable[str]):
+        """
+        Retire des vecteurs (IDs inconnus ignorés).
+
+        Recopie les tableaux restants: regrouper les IDs d'une mise à
+        jour en un seul appel.
+
+        Args:
+            ids: IDs des chunks supprimés
+        """
+        positions = [self._positions[chunk_id] for chunk_id in ids if chunk_id in self._positions]
+        if not positions:
+            return
+
+        self._consolidate()
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[positions] = False
+        self.codes = self.codes[keep]
+        self.sq_norms = self.sq_norms[keep]
+        self.ids = [chunk_id for chunk_id, kept in zip(self.ids, keep) if kept]
+        self._positions = {chunk_id: pos for pos, chunk_id in enumerate(self.ids)}
+
+    def candidates(self, query, n: int) -> List[str]:
+        """
+        Présélection: IDs des n vecteurs les plus proches (distance L2 approchée).
+
+        Args:
+            query: Vecteur de la requête
+            n: Nombre de candidats
+
+        Returns:
+            IDs triés du plus proche au plus lointain
+        """
+        self._consolidate()
+        if not self.ids or n <= 0:
+            return []
+
+        # |q - x|² = |q|² - 2 q.x + |x|²: seul -2 q.x + |x|² départage
+        query = np.asarray(query, dtype=np.float32)[None, :]
+        scores = self.sq_norms - 2 * code_scores(self.codes, query, self.scales)[0]
+
+        n = min(n, len(scores))
+        top = np.argpartition(scores, n - 1)[:n]
+        top = top[np.argsort(scores[top], kind="stable")]
+        return [self.ids[i] for i in top]
+
+
+def rescore(query, candidates: Dict[str, Any], k: int) -> List[Tuple[str, float]]:
+    """
+    Classe des candidats par distance L2 exacte (celle de ChromaDB).
+
+    Args:
+        query: Vecteur de la requête
+        candidates: Dict chunk_id -> vecteur float32
+        k: Nombre de résultats
+
+    Returns:
+        Liste de tuples (chunk_id, distance L2²), du plus proche au plus lointain
+    """
+    if not candidates:
+        return []
+    ids = list(candidates)
+    vectors = np.asarray([candidates[chunk_id] for chunk_id in ids], dtype=np.float32)
+    diff = vectors - np.asarray(query, dtype=np.float32)
+    distances = np.einsum("ij,ij->i", diff, diff)
+    order = np.argsort(distances, kind="stable")[:k]
+    return [(ids[i], float(distances[i])) for i in order]
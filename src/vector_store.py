@@ -0,0 +1,1381 @@
+"""
+Backends de stockage des vecteurs d'un index.
+
+- "chroma": ChromaDB (HNSW), le backend historique;
+- "numpy" / "numpy-float16": index exact en processus. Les vecteurs sont
+  rangés dans une matrice .npy mappée en mémoire (vectors.npy) et les
+  IDs, textes et métadonnées dans un fichier SQLite voisin
+  (vectors_meta.db). Une recherche est un produit matriciel sur la
+  matrice (top-k par argpartition, plusieurs requêtes en un seul
+  produit), sans client ni sérialisation. Le fichier mappé est partagé
+  par le cache de pages: plusieurs workers du serveur lisent la même
+  mémoire.
+
+Le balayage est exact (pas de voisins manqués comme avec HNSW) et les
+écritures sont bien plus rapides que celles de ChromaDB. Une requête
+isolée coûte un passage sur toute la matrice (~12 ms pour 50k chunks de
+768 dimensions sur un cœur, contre ~2 ms pour HNSW): le backend convient
+aux corpus de quelques dizaines de milliers de chunks, ou aux requêtes
+groupées.
+
+`NumpyCollection` reproduit la partie de l'API des collections ChromaDB
+utilisée par l'indexeur (get, upsert, update, delete, count, query avec
+filtres `where`): `ProjectIndexer`, l'index BM25 et l'index des
+doublons fonctionnent sans changement sur les deux backends.
+
+Les ajouts écrivent dans des lignes libres de la matrice (lignes
+supprimées réutilisées, capacité doublée si nécessaire); une
+suppression libère des lignes sans réécrire le fichier. Agrandir la
+matrice écrit une nouvelle génération (vectors.1.npy, vectors.2.npy...)
+nommée dans la table `store`: le fichier mappé par les lecteurs n'est
+jamais remplacé (impossible sous Windows), l'ancien est supprimé dès
+qu'il n'est plus ouvert.
+
+Option `quantization` ("float16", "int8", voir src/vector_quantization.py):
+une matrice de codes (codes.npy, mêmes lignes, mêmes générations) est
+balayée à la place de la matrice, dont seules les lignes des meilleurs
+candidats sont relues pour le rescoring exact.
+
+- "hnsw": même stockage, plus un graphe HNSW (hnswlib, optionnel) pour
+  une recherche approchée sous-linéaire sur les gros corpus. Le graphe
+  est sauvegardé dans la version d'index (hnsw_index.bin) à la fin de
+  chaque indexation; ses étiquettes sont les lignes de la matrice, les
+  ajouts et suppressions incrémentaux le patchent (mark_deleted). `M`
+  est fixé à la construction, `ef_search` (rappel / latence) se règle à
+  tout moment.
+"""
+import json
+import os
+import sqlite3
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.vector_quantization import (
+    DEFAULT_RESCORE_FACTOR,
+    check_quantization,
+    code_dtype,
+    code_scores,
+    encode,
+    int8_scales
+)
+
+
+# Fichiers du backend numpy dans le dossier de la version
+# (matrice: première génération, puis vectors.<n>.npy)
+NUMPY_VECTORS_FILENAME = "vectors.npy"
+NUMPY_METADATA_FILENAME = "vectors_meta.db"
+
+# Matrices mappées: clé de `store` -> préfixe des fichiers de génération
+_MAPPED_ARRAYS = {"vectors_file": "vectors", "codes_file": "codes"}
+
+# Capacité initiale de la matrice (lignes)
+_INITIAL_CAPACITY = 1024
+
+# Lignes scorées à la fois (borne la mémoire temporaire)
+_SCORE_BLOCK = 16384
+
+# Paramètres par requête SQLite (limite historique: 999)
+_SQL_BATCH = 900
+
+_INCLUDE_DEFAULT = ("metadatas", "documents")
+
+# Graphe HNSW du backend "hnsw"
+HNSW_INDEX_FILENAME = "hnsw_index.bin"
+DEFAULT_HNSW_M = 16
+DEFAULT_HNSW_EF_CONSTRUCTION = 200
+DEFAULT_HNSW_EF_SEARCH = 64
+
+
+@dataclass
+class VectorBackendConfig:
+    """Backend de stockage des vecteurs d'un index."""
+    name: str
+    store: str  # "chroma", "numpy" ou "hnsw"
+    dtype: Optional[str] = None
+    description: str = ""
+
+
+# Backends sélectionnables par projet
+VECTOR_BACKENDS = {
+    "chroma": VectorBackendConfig(
+        name="chroma",
+        store="chroma",
+        description="ChromaDB (HNSW) - Backend historique"
+    ),
+    "numpy": VectorBackendConfig(
+        name="numpy",
+        store="numpy",
+        dtype="float32",
+        description="Matrice float32 mappée en mémoire - Recherche exacte en processus"
+    ),
+    "numpy-float16": VectorBackendConfig(
+        name="numpy-float16",
+        store="numpy",
+        dtype="float16",
+        description="Matrice float16 mappée en mémoire - Moitié de la mémoire"
+    ),
+    "hnsw": VectorBackendConfig(
+        name="hnsw",
+        store="hnsw",
+        dtype="float32",
+        description="Graphe HNSW (hnswlib) sur la matrice - Recherche approchée, gros corpus"
+    ),
+}
+
+
+def _batched(items: Sequence, size: int = _SQL_BATCH) -> Iterable[Sequence]:
+    """Découpe une liste en tranches (limite de paramètres SQLite)."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _where_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """
+    Traduit un filtre `where` ChromaDB en clause SQL sur les métadonnées JSON.
+
+    Opérateurs: égalité, $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin,
+    $and, $or.
+    """
+    operators = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+    clauses = []
+    params: List[Any] = []
+
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [_where_sql(sub) for sub in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            for _, sub_params in parts:
+                params.extend(sub_params)
+            continue
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        field = "json_extract(metadata, ?)"
+        path = f'$."{key}"'
+
+        for op, value in condition.items():
+            if op in operators:
+                clauses.append(f"{field} {operators[op]} ?")
+                params.extend([path, value])
+            elif op in ("$in", "$nin"):
+                values = list(value)
+                if not values:
+                    clauses.append("0" if op == "$in" else "1")
+                    continue
+                negation = "NOT " if op == "$nin" else ""
+                clauses.append(f"{field} {negation}IN ({', '.join('?' * len(values))})")
+                params.append(path)
+                params.extend(values)
+            else:
+                raise ValueError(f"Opérateur de filtre non supporté: {op}")
+
+    return " AND ".join(clauses) or "1", params
+
+
+class NumpyCollection:
+    """
+    Collection de vecteurs en matrice .npy mappée + SQLite (API ChromaDB).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        dtype: str = "float32",
+        read_only: bool = False,
+        quantization: Optional[str] = None,
+        rescore_factor: int = DEFAULT_RESCORE_FACTOR
+    ):
+        """
+        Args:
+            path: Dossier de la version d'index
+            dtype: "float32" ou "float16" (stores créés; un store existant
+                garde le sien)
+            read_only: Ouverture en lecture seule (recherche)
+            quantization: Codes "float16" ou "int8" pour la recherche, ou
+                "none" (stores créés; un store existant garde les siens)
+            rescore_factor: Candidats rescorés par résultat demandé
+                (stores quantifiés)
+        """
+        self.path = Path(path)
+        self.meta_path = self.path / NUMPY_METADATA_FILENAME
+        self.read_only = read_only
+        self.rescore_factor = rescore_factor
+
+        if not read_only:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._init_db(dtype, check_quantization(quantization or "none"))
+
+        # Clé de `store` -> (fichier de la génération, matrice mappée)
+        self._mapped: Dict[str, Tuple[str, np.memmap]] = {}
+        self._new_generations = False
+        # (fichier des codes, échelles int8)
+        self._scales: Optional[Tuple[str, Optional[np.ndarray]]] = None
+        self._view: Optional[Tuple[int, np.ndarray, np.ndarray]] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre une connexion (lecteurs et indexeur en parallèle)."""
+        if self.read_only:
+            return sqlite3.connect(f"file:{self.meta_path.as_posix()}?mode=ro", uri=True, timeout=30)
+        return sqlite3.connect(self.meta_path, timeout=30)
+
+    def _init_db(self, dtype: str, quantization: str = "none"):
+        """Crée les tables si elles n'existent pas."""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    document TEXT,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY)")
+            conn.execute("CREATE TABLE IF NOT EXISTS store (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            existing = conn.execute("SELECT COUNT(*) FROM store").fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO store (key, value) VALUES (?, ?)",
+                [("dtype", dtype), ("rows", "0"), ("generation", "0")]
+            )
+            # Un store existant sans codes le reste: ses lignes n'en ont pas
+            conn.execute(
+                "INSERT OR IGNORE INTO store (key, value) VALUES ('quantization', ?)",
+                ("none" if existing else quantization,)
+            )
+            conn.commit()
+
+    def _store_values(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        return dict(conn.execute("SELECT key, value FROM store").fetchall())
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Type des vecteurs stockés."""
+        if not self.meta_path.exists():
+            return np.dtype(np.float32)
+        with self._connect() as conn:
+            return np.dtype(self._store_values(conn)["dtype"])
+
+    @property
+    def quantization(self) -> str:
+        """Codes utilisés pour la recherche ("none", "float16" ou "int8")."""
+        if not self.meta_path.exists():
+            return "none"
+        with self._connect() as conn:
+            return self._store_values(conn).get("quantization", "none")
+
+    def _get_mapped(self, key: str, refresh: bool = False) -> Optional[np.ndarray]:
+        """
+        Génération courante d'une matrice mappée en mémoire.
+
+        Args:
+            key: Clé de `store` nommant le fichier ("vectors_file", "codes_file")
+            refresh: Vérifier si la matrice a changé de génération
+                (agrandie par un autre processus) et la rouvrir si besoin
+        """
+        mapped = self._mapped.get(key)
+        if mapped is not None and (not refresh or not self.read_only):
+            # L'instance en écriture (une par indexation, sous le verrou
+            # d'écriture du projet) crée elle-même les générations
+            return mapped[1]
+        if not self.meta_path.exists():
+            return None
+
+        # Une génération peut être supprimée entre la lecture de son nom
+        # et son ouverture: relire le nom
+        default = NUMPY_VECTORS_FILENAME if key == "vectors_file" else None
+        for _ in range(3):
+            with self._connect() as conn:
+                filename = self._store_values(conn).get(key, default)
+            if filename is None:
+                return None
+            if mapped is not None and filename == mapped[0]:
+                return mapped[1]
+            try:
+                array = np.load(self.path / filename, mmap_mode="r" if self.read_only else "r+")
+            except FileNotFoundError:
+                continue
+            self._mapped[key] = (filename, array)
+            return array
+        return None
+
+    def _get_matrix(self, refresh: bool = False) -> Optional[np.ndarray]:
+        """Matrice des vecteurs mappée en mémoire (voir _get_mapped)."""
+        return self._get_mapped("vectors_file", refresh)
+
+    def _get_codes(self, refresh: bool = False) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Codes quantifiés mappés en mémoire et leurs échelles int8.
+
+        Returns:
+            Tuple (codes, échelles), (None, None) si le store n'est pas quantifié
+        """
+        codes = self._get_mapped("codes_file", refresh)
+        if codes is None:
+            return None, None
+        filename = self._mapped["codes_file"][0]
+        if self._scales is None or self._scales[0] != filename:
+            # Échelles changées avec les codes (nouvelle génération)
+            with self._connect() as conn:
+                scales = self._store_values(conn).get("codes_scales")
+            self._scales = (filename, None if scales is None else np.asarray(json.loads(scales), dtype=np.float32))
+        return codes, self._scales[1]
+
+    def _new_generation(
+        self,
+        conn: sqlite3.Connection,
+        key: str,
+        capacity: int,
+        dim: int,
+        dtype: np.dtype,
+        transform: Optional[Callable[[np.ndarray], np.ndarray]] = None
+    ) -> np.ndarray:
+        """
+        Écrit une nouvelle génération d'une matrice mappée.
+
+        Les lignes de la génération courante sont recopiées (converties
+        par `transform`), puis le fichier est nommé dans `store` avec la
+        transaction en cours: les lecteurs passent au nouveau fichier
+        avec les lignes qui l'utilisent.
+
+        Args:
+            conn: Connexion de la transaction en cours
+            key: Clé de `store` nommant le fichier
+            capacity: Lignes de la nouvelle génération
+            dim: Dimension des vecteurs
+            dtype: Type des valeurs
+            transform: Conversion des lignes recopiées
+
+        Returns:
+            Nouvelle matrice, mappée en écriture
+        """
+        prefix = _MAPPED_ARRAYS[key]
+        current = self._mapped.get(key)
+        if current is None:
+            filename = f"{prefix}.npy"
+        else:
+            parts = current[0].split(".")
+            filename = f"{prefix}.{(int(parts[1]) if len(parts) == 3 else 0) + 1}.npy"
+
+        tmp_path = self.path / (filename + ".tmp")
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(capacity, dim))
+        if current is not None:
+            source = current[1]
+            for start in range(0, min(len(source), capacity), _SCORE_BLOCK):
+                stop = min(start + _SCORE_BLOCK, len(source), capacity)
+                block = source[start:stop]
+                grown[start:stop] = transform(block) if transform is not None else block
+        grown.flush()
+        del grown
+        os.replace(tmp_path, self.path / filename)
+
+        conn.execute("INSERT OR REPLACE INTO store (key, value) VALUES (?, ?)", (key, filename))
+        array = np.load(self.path / filename, mmap_mode="r+")
+        self._mapped[key] = (filename, array)
+        self._new_generations = True
+        return array
+
+    def _ensure_capacity(self, conn: sqlite3.Connection, rows: int, dim: int, dtype: np.dtype):
+        """Crée ou agrandit la matrice (doublement, nouvelle génération) pour `rows` lignes."""
+        matrix = self._get_matrix()
+        if matrix is not None:
+            if matrix.shape[1] != dim:
+                raise ValueError(
+                    f"Dimension des vecteurs incompatible avec l'index: {dim} (index: {matrix.shape[1]})"
+                )
+            if matrix.shape[0] >= rows:
+                return
+
+        capacity = max(rows, _INITIAL_CAPACITY, 2 * (0 if matrix is None else matrix.shape[0]))
+        self._new_generation(conn, "vectors_file", capacity, dim, dtype)
+
+    def _remove_old_generations(self):
+        """Supprime les matrices remplacées (celles encore mappées restent, Windows)."""
+        if not self._new_generations:
+            return
+        self._new_generations = False
+        for key, prefix in _MAPPED_ARRAYS.items():
+            current = self._mapped.get(key)
+            if current is None:
+                continue
+            for entry in self.path.glob(f"{prefix}*.npy"):
+                if entry.name != current[0]:
+                    try:
+                        entry.unlink()
+                    except OSError:
+                        pass  # Encore ouverte par un lecteur, supprimée à la prochaine génération
+
+    def _rows_for_ids(self, conn: sqlite3.Connection, ids: Sequence[str]) -> Dict[str, int]:
+        """Lignes des IDs présents."""
+        found = {}
+        for batch in _batched(list(ids)):
+            found.update(conn.execute(
+                f"SELECT id, row FROM chunks WHERE id IN ({', '.join('?' * len(batch))})", batch
+            ).fetchall())
+        return found
+
+    def _bump_generation(self, conn: sqlite3.Connection):
+        conn.execute(
+            "UPDATE store SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation'"
+        )
+
+    def count(self) -> int:
+        """Nombre de chunks stockés."""
+        if not self.meta_path.exists():
+            return 0
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[dict]] = None
+    ):
+        """
+        Ajoute ou remplace des chunks.
+
+        Args:
+            ids: IDs des chunks
+            embeddings: Vecteurs, dans l'ordre des IDs
+            documents: Textes des chunks
+            metadatas: Métadonnées des chunks
+        """
+        if self.read_only:
+            raise PermissionError("Collection ouverte en lecture seule")
+        if not ids:
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+
+        with self._connect() as conn:
+            values = self._store_values(conn)
+            dtype = np.dtype(values["dtype"])
+            existing = self._rows_for_ids(conn, ids)
+
+            # Lignes libres d'abord, puis à la suite
+            needed = sum(1 for chunk_id in set(ids) if chunk_id not in existing)
+            free = iter([row for (row,) in conn.execute(
+                "SELECT row FROM free_rows ORDER BY row LIMIT ?", (needed,)
+            )])
+            next_row = int(values["rows"])
+            rows = []
+            assigned = dict(existing)
+            for chunk_id in ids:
+                if chunk_id not in assigned:
+                    row = next(free, None)
+                    if row is None:
+                        row = next_row
+                        next_row += 1
+                    assigned[chunk_id] = row
+                rows.append(assigned[chunk_id])
+
+            # Vecteurs écrits avant les lignes SQLite: un lecteur ne voit
+            # une ligne qu'une fois son vecteur en place
+            self._ensure_capacity(conn, next_row, vectors.shape[1], dtype)
+            matrix = self._get_matrix()
+            matrix[np.asarray(rows)] = vectors.astype(dtype)
+            matrix.flush()
+            self._rows_written(conn, rows, vectors)
+
+            used = [assigned[chunk_id] for chunk_id in set(ids) if chunk_id not in existing]
+            for batch in _batched(used):
+                conn.execute(f"DELETE FROM free_rows WHERE row IN ({', '.join('?' * len(batch))})", batch)
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (row, chunk_id, document, json.dumps(metadata or {}, ensure_ascii=False))
+                    for row, chunk_id, document, metadata in zip(rows, ids, documents, metadatas)
+                ]
+            )
+            conn.execute("UPDATE store SET value = ? WHERE key = 'rows'", (str(next_row),))
+            self._bump_generation(conn)
+            conn.commit()
+
+        self._remove_old_generations()
+
+    def add(self, ids: List[str], embeddings, documents=None, metadatas=None):
+        """Alias de upsert (API ChromaDB)."""
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def update(
+        self,
+        ids: List[str],
+        embeddings=None,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[dict]] = None
+    ):
+        """
+        Met à jour des chunks existants (métadonnées fusionnées comme ChromaDB).
+
+        Args:
+            ids: IDs des chunks (IDs inconnus ignorés)
+            embeddings: Nouveaux vecteurs
+            documents: Nouveaux textes
+            metadatas: Métadonnées à fusionner (une valeur None retire la clé)
+        """
+        if self.read_only:
+            raise PermissionError("Collection ouverte en lecture seule")
+        if not ids:
+            return
+
+        with self._connect() as conn:
+            stored = {}
+            for batch in _batched(list(ids)):
+                stored.update({
+                    chunk_id: (row, document, json.loads(metadata))
+                    for chunk_id, row, document, metadata in conn.execute(
+                        f"SELECT id, row, document, metadata FROM chunks "
+                        f"WHERE id IN ({', '.join('?' * len(batch))})", batch
+                    )
+                })
+
+            if embeddings is not None:
+                dtype = np.dtype(self._store_values(conn)["dtype"])
+                matrix = self._get_matrix()
+                rows, vectors = [], []
+                for chunk_id, vector in zip(ids, embeddings):
+                    if chunk_id in stored:
+                        rows.append(stored[chunk_id][0])
+                        vectors.append(np.asarray(vector, dtype=np.float32))
+                if rows:
+                    matrix[np.asarray(rows)] = np.stack(vectors).astype(dtype)
+                    matrix.flush()
+                    self._rows_written(conn, rows, np.stack(vectors))
+
+            updates = []
+            for position, chunk_id in enumerate(ids):
+                if chunk_id not in stored:
+                    continue
+                row, document, metadata = stored[chunk_id]
+                if documents is not None:
+                    document = documents[position]
+                if metadatas is not None:
+                    metadata.update(metadatas[position] or {})
+                    metadata = {key: value for key, value in metadata.items() if value is not None}
+                updates.append((document, json.dumps(metadata, ensure_ascii=False), row))
+
+            conn.executemany("UPDATE chunks SET document = ?, metadata = ? WHERE row = ?", updates)
+            self._bump_generation(conn)
+            conn.commit()
+
+        self._remove_old_generations()
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None):
+        """
+        Supprime des chunks (lignes libérées pour les prochains ajouts).
+
+        Args:
+            ids: IDs à supprimer
+            where: Filtre sur les métadonnées
+        """
+        if self.read_only:
+            raise PermissionError("Collection ouverte en lecture seule")
+
+        with self._connect() as conn:
+            rows = []
+            if ids:
+                rows.extend(self._rows_for_ids(conn, ids).values())
+            if where:
+                sql, params = _where_sql(where)
+                rows.extend(row for (row,) in conn.execute(f"SELECT row FROM chunks WHERE {sql}", params))
+            if not rows:
+                return
+
+            for batch in _batched(rows):
+                conn.execute(f"DELETE FROM chunks WHERE row IN ({', '.join('?' * len(batch))})", batch)
+            conn.executemany("INSERT OR IGNORE INTO free_rows (row) VALUES (?)", [(row,) for row in rows])
+            self._rows_deleted(conn, rows)
+            self._bump_generation(conn)
+            conn.commit()
+
+    def _rows_written(self, conn: sqlite3.Connection, rows: List[int], vectors: np.ndarray):
+        """
+        Appelé après l'écriture de vecteurs, avant le commit (index dérivés à patcher).
+
+        Un store quantifié écrit les codes des lignes. Les codes suivent
+        la capacité de la matrice; une échelle int8 élargie recode
+        toutes les lignes dans une nouvelle génération.
+        """
+        quantization = self._store_values(conn).get("quantization", "none")
+        if quantization == "none":
+            return
+
+        matrix = self._get_matrix()
+        codes, scales = self._get_codes()
+        dtype = code_dtype(quantization)
+        new_scales = int8_scales(vectors, scales) if quantization == "int8" else None
+
+        rescale = scales is not None and bool((new_scales > scales).any())
+        if codes is None or len(codes) < len(matrix) or rescale:
+            transform = None
+            if rescale:
+                def transform(block: np.ndarray, old_scales: np.ndarray = scales) -> np.ndarray:
+                    return np.round(block * (old_scales / new_scales)).astype(dtype)
+            codes = self._new_generation(conn, "codes_file", len(matrix), matrix.shape[1], dtype, transform)
+            if new_scales is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO store (key, value) VALUES ('codes_scales', ?)",
+                    (json.dumps(new_scales.tolist()),)
+                )
+            self._scales = (self._mapped["codes_file"][0], new_scales)
+            scales = new_scales
+
+        codes[np.asarray(rows)] = encode(vectors, quantization, scales)
+        codes.flush()
+
+    def _rows_deleted(self, conn: sqlite3.Connection, rows: List[int]):
+        """Appelé à la libération de lignes, avant le commit (index dérivés à patcher)."""
+
+    def flush(self):
+        """Rend les index dérivés durables (la matrice l'est à chaque écriture)."""
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = _INCLUDE_DEFAULT
+    ) -> Dict[str, Any]:
+        """
+        Lit des chunks.
+
+        Args:
+            ids: IDs à lire (tous si None)
+            where: Filtre sur les métadonnées
+            limit: Nombre maximum de résultats
+            offset: Résultats à sauter
+            include: Champs à renvoyer ("documents", "metadatas", "embeddings")
+
+        Returns:
+            Dict au format ChromaDB (ids, documents, metadatas, embeddings)
+        """
+        results: Dict[str, Any] = {"ids": [], "documents": None, "metadatas": None, "embeddings": None}
+        if not self.meta_path.exists():
+            return results
+
+        where_sql, params = _where_sql(where or {})
+
+        with self._connect() as conn:
+            if ids is not None:
+                records = []
+                for batch in _batched(list(ids)):
+                    records.extend(conn.execute(
+                        f"SELECT row, id, document, metadata FROM chunks "
+                        f"WHERE {where_sql} AND id IN ({', '.join('?' * len(batch))})",
+                        params + list(batch)
+                    ).fetchall())
+                order = {chunk_id: position for position, chunk_id in enumerate(ids)}
+                records.sort(key=lambda record: order[record[1]])
+            else:
+                records = conn.execute(
+                    f"SELECT row, id, document, metadata FROM chunks WHERE {where_sql} ORDER BY row",
+                    params
+                ).fetchall()
+
+        records = records[offset or 0:]
+        if limit is not None:
+            records = records[:limit]
+
+        results["ids"] = [record[1] for record in records]
+        if "documents" in include:
+            results["documents"] = [record[2] for record in records]
+        if "metadatas" in include:
+            results["metadatas"] = [json.loads(record[3]) for record in records]
+        if "embeddings" in include:
+            matrix = self._get_matrix(refresh=True)
+            rows = np.asarray([record[0] for record in records], dtype=np.int64)
+            if matrix is None or not len(rows):
+                results["embeddings"] = np.zeros((0, 0), dtype=np.float32)
+            else:
+                results["embeddings"] = np.asarray(matrix[rows], dtype=np.float32)
+        return results
+
+    def _search_view(self) -> Tuple[Optional[np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Matrice et lignes valides à jour (rechargées après une écriture).
+
+        Les normes d'un store quantifié sont celles des vecteurs décodés
+        (présélection sur les codes, sans lire la matrice).
+
+        Returns:
+            Tuple (matrice, lignes valides, normes au carré des lignes)
+        """
+        with self._connect() as conn:
+            values = self._store_values(conn)
+            generation = int(values["generation"])
+            if self._view is not None and self._view[0] == generation:
+                return self._get_matrix(), self._view[1], self._view[2]
+
+            used = [row for (row,) in conn.execute("SELECT row FROM chunks")]
+
+        rows = int(values["rows"])
+        matrix = self._get_matrix(refresh=True)
+        valid = np.zeros(rows, dtype=bool)
+        valid[used] = True
+
+        source, scales = matrix, None
+        if values.get("quantization", "none") != "none":
+            codes, scales = self._get_codes(refresh=True)
+            if codes is not None:
+                source = codes
+
+        sq_norms = np.zeros(rows, dtype=np.float32)
+        if source is not None:
+            for start in range(0, rows, _SCORE_BLOCK):
+                block = np.asarray(source[start:min(start + _SCORE_BLOCK, rows)], dtype=np.float32)
+                if scales is not None:
+                    block *= scales
+                sq_norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+
+        self._view = (generation, valid, sq_norms)
+        return matrix, valid, sq_norms
+
+    def search(
+        self,
+        query_embeddings,
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Recherche des k plus proches voisins (distance L2², comme ChromaDB).
+
+        Exacte, ou présélection sur les codes puis rescoring si le store est
+        quantifié.
+
+        Args:
+            query_embeddings: Vecteurs des requêtes (q x d)
+            k: Nombre de voisins par requête
+            where: Filtre sur les métadonnées
+
+        Returns:
+            Pour chaque requête, liste de tuples (ligne, distance) triés
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        if not self.meta_path.exists():
+            return [[] for _ in queries]
+        matrix, valid, sq_norms = self._search_view()
+        if matrix is None or not valid.any() or k <= 0:
+            return [[] for _ in queries]
+
+        if where:
+            allowed = np.zeros_like(valid)
+            sql, params = _where_sql(where)
+            with self._connect() as conn:
+                allowed[[row for (row,) in conn.execute(f"SELECT row FROM chunks WHERE {sql}", params)]] = True
+            valid = valid & allowed
+
+        codes, scales = self._get_codes()
+        if codes is not None:
+            return self._search_codes(queries, k, matrix, codes, scales, valid, sq_norms)
+
+        rows = len(valid)
+        distances = np.empty((len(queries), rows), dtype=np.float32)
+        for start in range(0, rows, _SCORE_BLOCK):
+            end = min(start + _SCORE_BLOCK, rows)
+            block = np.asarray(matrix[start:end], dtype=np.float32)
+            distances[:, start:end] = sq_norms[start:end] - 2 * (queries @ block.T)
+        distances += np.einsum("ij,ij->i", queries, queries)[:, None]
+        distances[:, ~valid] = np.inf
+
+        k = min(k, int(valid.sum()))
+        if k <= 0:
+            return [[] for _ in queries]
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+
+        return [
+            [(int(row), max(float(distance), 0.0)) for row, distance in zip(query_rows, query_distances)]
+            for query_rows, query_distances in zip(top, top_distances)
+        ]
+
+    def _search_codes(
+        self,
+        queries: np.ndarray,
+        k: int,
+        matrix: np.ndarray,
+        codes: np.ndarray,
+        scales: Optional[np.ndarray],
+        valid: np.ndarray,
+        sq_norms: np.ndarray
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Présélection sur les codes, puis rescoring exact des candidats.
+
+        Seules les `rescore_factor * k` lignes retenues par requête sont
+        lues dans la matrice.
+        """
+        rows = len(valid)
+        approx = sq_norms - 2 * code_scores(codes[:rows], queries, scales)
+        approx[:, ~valid] = np.inf
+
+        available = int(valid.sum())
+        k = min(k, available)
+        if k <= 0:
+            return [[] for _ in queries]
+        n = min(k * self.rescore_factor, available)
+        candidates = np.argpartition(approx, n - 1, axis=1)[:, :n]
+
+        results = []
+        for query, query_rows in zip(queries, candidates):
+            query_rows = np.sort(query_rows)  # Lecture du fichier dans l'ordre
+            vectors = np.asarray(matrix[query_rows], dtype=np.float32)
+            distances = np.einsum("ij,ij->i", vectors - query, vectors - query)
+            order = np.argsort(distances, kind="stable")[:k]
+            results.append([(int(query_rows[i]), float(distances[i])) for i in order])
+        return results
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("metadatas", "documents", "distances")
+    ) -> Dict[str, Any]:
+        """
+        Recherche par lots (API ChromaDB).
+
+        Args:
+            query_embeddings: Vecteurs des requêtes
+            n_results: Nombre de résultats par requête
+            where: Filtre sur les métadonnées
+            include: Champs à renvoyer ("documents", "metadatas", "distances", "embeddings")
+
+        Returns:
+            Dict au format ChromaDB (une liste par requête pour chaque champ)
+        """
+        hits = self.search(query_embeddings, n_results, where)
+
+        records = {}
+        wanted = sorted({row for query_hits in hits for row, _ in query_hits})
+        if wanted:
+            with self._connect() as conn:
+                for batch in _batched(wanted):
+                    for row, chunk_id, document, metadata in conn.execute(
+                        f"SELECT row, id, document, metadata FROM chunks "
+                        f"WHERE row IN ({', '.join('?' * len(batch))})", batch
+                    ):
+                        records[row] = (chunk_id, document, metadata)
+
+        # Lignes supprimées entre le scoring et la lecture: ignorées
+        hits = [[(row, distance) for row, distance in query_hits if row in records] for query_hits in hits]
+        results: Dict[str, Any] = {"ids": [[records[row][0] for row, _ in query_hits] for query_hits in hits]}
+        results["distances"] = [[distance for _, distance in query_hits] for query_hits in hits] \
+            if "distances" in include else None
+        results["documents"] = [[records[row][1] for row, _ in query_hits] for query_hits in hits] \
+            if "documents" in include else None
+        results["metadatas"] = [[json.loads(records[row][2]) for row, _ in query_hits] for query_hits in hits] \
+            if "metadatas" in include else None
+        if "embeddings" in include:
+            matrix = self._get_matrix()
+            results["embeddings"] = [
+                np.asarray(matrix[[row for row, _ in query_hits]], dtype=np.float32) for query_hits in hits
+            ]
+        else:
+            results["embeddings"] = None
+        return results
+
+
+def _import_hnswlib():
+    """Importe hnswlib (dépendance optionnelle du backend "hnsw")."""
+    try:
+        import hnswlib
+    except ImportError:
+        raise ImportError(
+            "hnswlib n'est pas installé.\n"
+            "Installez-le avec: pip install hnswlib"
+        )
+    return hnswlib
+
+
+class HnswCollection(NumpyCollection):
+    """
+    NumpyCollection avec un graphe HNSW (hnswlib) pour la recherche.
+
+    La matrice et le SQLite restent la référence: le graphe indexe les
+    lignes de la matrice et peut toujours en être reconstruit (version
+    reprise après un arrêt, fichier absent).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        read_only: bool = False,
+        m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+        ef_search: Optional[int] = None
+    ):
+        """
+        Args:
+            path: Dossier de la version d'index
+            read_only: Ouverture en lecture seule (recherche)
+            m: Voisins par nœud du graphe (nouvel index uniquement)
+            ef_construction: Largeur de recherche à la construction (nouvel index)
+            ef_search: Largeur de recherche des requêtes (None = valeur
+                enregistrée; enregistrée si la collection est ouverte en écriture)
+        """
+        _import_hnswlib()
+        super().__init__(path, dtype="float32", read_only=read_only)
+        self.hnsw_path = self.path / HNSW_INDEX_FILENAME
+
+        if not read_only:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO store (key, value) VALUES (?, ?)",
+                    [
+                        ("hnsw_m", str(m or DEFAULT_HNSW_M)),
+                        ("hnsw_ef_construction", str(ef_construction or DEFAULT_HNSW_EF_CONSTRUCTION)),
+                        ("hnsw_ef_search", str(ef_search or DEFAULT_HNSW_EF_SEARCH)),
+                        ("hnsw_saved", "-1"),
+                        ("vector_generation", "0")
+                    ]
+                )
+                if ef_search:
+                    conn.execute("UPDATE store SET value = ? WHERE key = 'hnsw_ef_search'", (str(ef_search),))
+                conn.commit()
+
+        self._ef_search = ef_search
+        self._graph_index = None
+        self._graph_generation: Optional[str] = None
+        self._dirty = False
+
+    @property
+    def ef_search(self) -> int:
+        """Largeur de recherche des requêtes (compromis rappel / latence)."""
+        if self._ef_search:
+            return self._ef_search
+        if not self.meta_path.exists():
+            return DEFAULT_HNSW_EF_SEARCH
+        with self._connect() as conn:
+            return int(self._store_values(conn).get("hnsw_ef_search", DEFAULT_HNSW_EF_SEARCH))
+
+    @ef_search.setter
+    def ef_search(self, value: int):
+        self._ef_search = value
+
+    def _new_graph(self, dim: int, capacity: int, values: Dict[str, str]):
+        """Crée un graphe vide."""
+        hnswlib = _import_hnswlib()
+        graph = hnswlib.Index(space="l2", dim=dim)
+        graph.init_index(
+            max_elements=max(capacity, _INITIAL_CAPACITY),
+            ef_construction=int(values.get("hnsw_ef_construction", DEFAULT_HNSW_EF_CONSTRUCTION)),
+            M=int(values.get("hnsw_m", DEFAULT_HNSW_M))
+        )
+        return graph
+
+    def _build_graph(self, conn: sqlite3.Connection, values: Dict[str, str]):
+        """Reconstruit le graphe depuis les lignes valides de la matrice."""
+        matrix = self._get_matrix(refresh=True)
+        if matrix is None:
+            return None
+        rows = np.asarray([row for (row,) in conn.execute("SELECT row FROM chunks ORDER BY row")], dtype=np.int64)
+        graph = self._new_graph(matrix.shape[1], len(rows), values)
+        for start in range(0, len(rows), _SCORE_BLOCK):
+            batch = rows[start:start + _SCORE_BLOCK]
+            graph.add_items(np.asarray(matrix[batch], dtype=np.float32), batch)
+        return graph
+
+    def _load_graph(self, dim: int):
+        """Charge un graphe sauvegardé."""
+        hnswlib = _import_hnswlib()
+        graph = hnswlib.Index(space="l2", dim=dim)
+        graph.load_index(str(self.hnsw_path))
+        return graph
+
+    def _graph(self, dim: Optional[int] = None):
+        """
+        Graphe à jour pour cette instance.
+
+        En écriture, le graphe est chargé (ou reconstruit s'il ne
+        correspond plus à la matrice) puis patché à chaque écriture. En
+        lecture, c'est la dernière version sauvegardée par l'indexeur.
+
+        Args:
+            dim: Dimension des vecteurs (création d'un graphe vide)
+        """
+        if not self.meta_path.exists():
+            return None
+        with self._connect() as conn:
+            values = self._store_values(conn)
+            saved = values.get("hnsw_saved", "-1")
+
+            if not self.read_only:
+                if self._graph_index is None:
+                    matrix = self._get_matrix()
+                    if values["vector_generation"] == "0":
+                        # Nouvelle collection
+                        dim = matrix.shape[1] if matrix is not None else dim
+                        if dim is not None:
+                            self._graph_index = self._new_graph(dim, _INITIAL_CAPACITY, values)
+                    elif saved == values["vector_generation"] and self.hnsw_path.exists():
+                        self._graph_index = self._load_graph(matrix.shape[1])
+                    else:
+                        print("   ℹ️  Graphe HNSW absent ou en retard, reconstruction depuis la matrice...")
+                        self._graph_index = self._build_graph(conn, values)
+                        self._dirty = True
+                return self._graph_index
+
+            if self._graph_index is None or saved != self._graph_generation:
+                matrix = self._get_matrix(refresh=True)
+                if matrix is None:
+                    return None
+                if saved != "-1" and self.hnsw_path.exists():
+                    self._graph_index = self._load_graph(matrix.shape[1])
+                else:
+                    # Jamais sauvegardé (indexation interrompue): graphe en mémoire
+                    self._graph_index = self._build_graph(conn, values)
+                self._graph_generation = saved
+        return self._graph_index
+
+    def _bump_vector_generation(self, conn: sqlite3.Connection):
+        """Version des vecteurs (les mises à jour de métadonnées n'en changent pas)."""
+        conn.execute(
+            "UPDATE store SET value = CAST(value AS INTEGER) + 1 WHERE key = 'vector_generation'"
+        )
+
+    def _rows_written(self, conn: sqlite3.Connection, rows: List[int], vectors: np.ndarray):
+        graph = self._graph(dim=vectors.shape[1])
+        needed = graph.get_current_count() + len(rows)
+        if needed > graph.get_max_elements():
+            graph.resize_index(max(needed, 2 * graph.get_max_elements()))
+        # Une étiquette supprimée puis réutilisée est remplacée et réactivée
+        graph.add_items(vectors, np.asarray(rows, dtype=np.int64))
+        self._bump_vector_generation(conn)
+        self._dirty = True
+
+    def _rows_deleted(self, conn: sqlite3.Connection, rows: List[int]):
+        self._bump_vector_generation(conn)
+        graph = self._graph()
+        if graph is None:
+            return
+        for row in rows:
+            try:
+                graph.mark_deleted(row)
+            except RuntimeError:
+                pass  # Ligne absente du graphe ou déjà supprimée
+        self._dirty = True
+
+    def flush(self):
+        """Sauvegarde le graphe (remplacement atomique) s'il a changé."""
+        if self.read_only or not self._dirty or self._graph_index is None:
+            return
+        tmp_path = self.hnsw_path.with_name(self.hnsw_path.name + ".tmp")
+        self._graph_index.save_index(str(tmp_path))
+        os.replace(tmp_path, self.hnsw_path)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE store SET value = (SELECT value FROM store WHERE key = 'vector_generation') "
+                "WHERE key = 'hnsw_saved'"
+            )
+            conn.commit()
+        self._dirty = False
+
+    def search(
+        self,
+        query_embeddings,
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Recherche approchée des k plus proches voisins dans le graphe.
+
+        Les distances des voisins trouvés sont recalculées sur la matrice
+        (exactes, même si le graphe d'un lecteur date de la dernière
+        sauvegarde). Si le graphe ne peut pas fournir k voisins (filtre
+        très sélectif), la recherche exacte de NumpyCollection prend le relais.
+
+        Args:
+            query_embeddings: Vecteurs des requêtes (q x d)
+            k: Nombre de voisins par requête
+            where: Filtre sur les métadonnées
+
+        Returns:
+            Pour chaque requête, liste de tuples (ligne, distance) triés
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        graph = self._graph()
+        if graph is None or k <= 0:
+            return [[] for _ in queries]
+
+        allowed = None
+        with self._connect() as conn:
+            if where:
+                sql, params = _where_sql(where)
+                allowed = {row for (row,) in conn.execute(f"SELECT row FROM chunks WHERE {sql}", params)}
+                available = len(allowed)
+            else:
+                available = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        k = min(k, available)
+        if k <= 0:
+            return [[] for _ in queries]
+
+        graph.set_ef(max(self.ef_search, k))
+        try:
+            labels, _ = graph.knn_query(
+                queries, k=k, filter=(lambda row: row in allowed) if allowed is not None else None
+            )
+        except RuntimeError:
+            return super().search(queries, k, where)
+
+        matrix = self._get_matrix(refresh=True)
+        results = []
+        for query, query_rows in zip(queries, labels.astype(np.int64)):
+            vectors = np.asarray(matrix[query_rows], dtype=np.float32)
+            distances = np.einsum("ij,ij->i", vectors - query, vectors - query)
+            order = np.argsort(distances, kind="stable")
+            results.append([(int(query_rows[i]), float(distances[i])) for i in order])
+        return results
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    VectorStore LangChain adossé à une NumpyCollection.
+
+    Même interface que la base Chroma utilisée jusqu'ici (`_collection`,
+    `similarity_search`, `as_retriever`...), mêmes distances (L2²).
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        embedding_function: Optional[Embeddings] = None,
+        dtype: str = "float32",
+        read_only: bool = False,
+        collection: Optional[NumpyCollection] = None,
+        quantization: Optional[str] = None
+    ):
+        """
+        Args:
+            persist_directory: Dossier de la version d'index
+            embedding_function: Client d'embeddings (requêtes et add_texts)
+            dtype: Type des vecteurs d'un nouveau store ("float32", "float16")
+            read_only: Ouverture en lecture seule (recherche)
+            collection: Collection déjà ouverte (ex. HnswCollection)
+            quantization: Codes de présélection d'un nouveau store
+        """
+        self._collection = collection or NumpyCollection(
+            Path(persist_directory), dtype=dtype, read_only=read_only, quantization=quantization
+        )
+        self._embedding_function = embedding_function
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding_function
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self._collection.upsert(
+            ids=ids,
+            embeddings=self._embedding_function.embed_documents(texts),
+            documents=texts,
+            metadatas=metadatas
+        )
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        self._collection.delete(ids=ids)
+        return True
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Recherche les k chunks les plus proches d'un vecteur.
+
+        Args:
+            embedding: Vecteur de la requête
+            k: Nombre de résultats
+            filter: Filtre `where` sur les métadonnées
+
+        Returns:
+            Liste de tuples (document, distance L2²)
+        """
+        results = self._collection.query([embedding], n_results=k, where=filter)
+        return [
+            (Document(page_content=document or "", metadata=metadata or {}), distance)
+            for document, metadata, distance in zip(
+                results["documents"][0], results["metadatas"][0], results["distances"][0]
+            )
+        ]
+
+    # Même nom que la méthode de Chroma (qui renvoie aussi des distances)
+    similarity_search_by_vector_with_relevance_scores = similarity_search_by_vector_with_score
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding_function.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._euclidean_relevance_score_fn
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        **kwargs: Any
+    ) -> "NumpyVectorStore":
+        if persist_directory is None:
+            raise ValueError("persist_directory est requis pour NumpyVectorStore")
+        store = cls(persist_directory, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+
+def get_vector_backend(name: str) -> VectorBackendConfig:
+    """
+    Retourne la configuration d'un backend de vecteurs.
+
+    Args:
+        name: Nom du backend (voir VECTOR_BACKENDS)
+
+    Returns:
+        VectorBackendConfig
+    """
+    if name not in VECTOR_BACKENDS:
+        raise ValueError(
+            f"Backend de vecteurs inconnu: {name} "
+            f"(choix: {', '.join(VECTOR_BACKENDS)})"
+        )
+    return VECTOR_BACKENDS[name]
+
+
+def detect_vector_backend(index_path: Path) -> str:
+    """
+    Backend d'une version d'index existante, d'après ses fichiers.
+
+    Args:
+        index_path: Dossier de la version
+
+    Returns:
+        Nom du backend ("chroma" si aucun autre n'est reconnu)
+    """
+    if (Path(index_path) / NUMPY_METADATA_FILENAME).exists():
+        collection = NumpyCollection(index_path, read_only=True)
+        with collection._connect() as conn:
+            values = collection._store_values(conn)
+        if "hnsw_m" in values:
+            return "hnsw"
+        return "numpy-float16" if values["dtype"] == "float16" else "numpy"
+    return "chroma"
+
+
+def open_vector_store(
+    index_path: Path,
+    collection_name: str,
+    embeddings: Optional[Embeddings] = None,
+    backend: str = None,
+    read_only: bool = False,
+    hnsw_m: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    quantization: Optional[str] = None
+) -> VectorStore:
+    """
+    Ouvre la base vectorielle d'une version d'index.
+
+    Args:
+        index_path: Dossier de la version
+        collection_name: Nom de la collection (ChromaDB)
+        embeddings: Client d'embeddings
+        backend: Backend à créer (None = celui de la version existante)
+        read_only: Lecture seule (backends numpy et hnsw)
+        hnsw_m: Voisins par nœud d'un nouveau graphe HNSW
+        ef_search: Largeur de recherche HNSW (None = valeur enregistrée)
+        quantization: Codes de présélection d'un nouveau store numpy
+            (None = ceux de la version existante)
+
+    Returns:
+        Base vectorielle LangChain (Chroma ou NumpyVectorStore)
+    """
+    config = get_vector_backend(backend or detect_vector_backend(index_path))
+
+    if config.store == "hnsw":
+        return NumpyVectorStore(
+            str(index_path),
+            embedding_function=embeddings,
+            collection=HnswCollection(
+                Path(index_path), read_only=read_only, m=hnsw_m, ef_search=ef_search
+            )
+        )
+
+    if config.store == "numpy":
+        return NumpyVectorStore(
+            str(index_path),
+            embedding_function=embeddings,
+            dtype=config.dtype,
+            read_only=read_only,
+            quantization=quantization
+        )
+
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        embedding_function=embeddings,
+        persist_directory=str(index_path),
+        collection_name=collection_name
+    )
+
+
+def flush_vector_store(vectordb: VectorStore):
+    """
+    Rend durables les index dérivés d'une base vectorielle (graphe HNSW).
+
+    À appeler à la fin d'une indexation; sans effet pour ChromaDB et numpy.
+    """
+    collection = getattr(vectordb, "_collection", None)
+    if isinstance(collection, NumpyCollection):
+        collection.flush()
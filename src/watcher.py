@@ -0,0 +1,232 @@
+"""
+Surveillance d'un projet et indexation continue.
+
+Les événements du système de fichiers (inotify sous Linux, FSEvents sous
+macOS, ReadDirectoryChangesW sous Windows, via watchdog) sur data/<projet>
+sont regroupés: une rafale de sauvegardes (Obsidian enregistre à chaque
+frappe) ne déclenche qu'une mise à jour, une fois le dossier calme pendant
+`debounce` secondes. Seuls les chemins signalés sont réindexés, sans
+reparcourir le projet. Au repos, le thread d'indexation est bloqué sur un
+Event: aucun coût hors des événements.
+
+Usage:
+    python -m src.indexer anomalie2084 --watch
+    python -m src.watcher anomalie2084 [--debounce 2.0]
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Set
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+# Extensions indexées (voir ProjectIndexer)
+WATCHED_EXTENSIONS = {".txt", ".md", ".pdf", ".docx"}
+
+# Dossiers et fichiers temporaires ignorés (Obsidian, git, éditeurs)
+_IGNORED_DIRS = {".obsidian", ".git", ".trash"}
+_IGNORED_SUFFIXES = ("~", ".tmp", ".swp", ".swx", ".crdownload")
+
+
+class _ChangeCollector(FileSystemEventHandler):
+    """Collecte les chemins modifiés signalés par watchdog."""
+
+    def __init__(self, watcher: "ProjectWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return  # Lectures: rien à indexer
+        if event.is_directory and event.event_type == "modified":
+            # Émis pour le dossier parent à chaque sauvegarde: le fichier est
+            # signalé par son propre événement, ne pas reparcourir le dossier
+            return
+
+        paths = [event.src_path]
+        dest_path = getattr(event, "dest_path", "")
+        if dest_path:
+            paths.append(dest_path)
+
+        for path in paths:
+            self.watcher.notify(Path(path), is_directory=event.is_directory)
+
+
+class ProjectWatcher:
+    """
+    Surveille data/<projet> et met l'index à jour au fil des modifications.
+    """
+
+    def __init__(self, project_name: str, debounce: float = 2.0, indexer=None):
+        """
+        Args:
+            project_name: Nom du projet (dossier dans data/)
+            debounce: Délai de calme (secondes) avant de réindexer
+            indexer: ProjectIndexer à utiliser (défaut: créé pour le projet)
+        """
+        if Observer is None:
+            raise ImportError(
+                "Pour le mode surveillance, installez watchdog:\n"
+                "pip install watchdog"
+            )
+
+        if indexer is None:
+            from src.indexer import ProjectIndexer
+            indexer = ProjectIndexer(project_name)
+
+        self.project_name = project_name
+        self.debounce = debounce
+        self.indexer = indexer
+        self.project_path = Path(indexer.project_path)
+
+        self._pending: Set[Path] = set()
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._observer = None
+        self._worker: Optional[threading.Thread] = None
+
+        # Dernières statistiques, pour l'API
+        self.last_update: Optional[dict] = None
+        self.updates = 0
+
+    def _is_relevant(self, path: Path, is_directory: bool) -> bool:
+        """Filtre les fichiers temporaires et les dossiers de configuration."""
+        try:
+            parts = path.relative_to(self.project_path).parts
+        except ValueError:
+            return False
+
+        if any(part in _IGNORED_DIRS or part.startswith(".") for part in parts):
+            return False
+        if is_directory:
+            return True  # Dossier supprimé ou renommé
+        return path.suffix.lower() in WATCHED_EXTENSIONS and not path.name.endswith(_IGNORED_SUFFIXES)
+
+    def notify(self, path: Path, is_directory: bool = False):
+        """
+        Signale un chemin modifié (appelé par watchdog).
+
+        Args:
+            path: Chemin créé, modifié, supprimé ou renommé
+            is_directory: Le chemin est un dossier
+        """
+        if not self._is_relevant(path, is_directory):
+            return
+
+        with self._lock:
+            self._pending.add(path)
+            self._last_event = time.monotonic()
+        self._wakeup.set()
+
+    def _take_batch(self) -> Set[Path]:
+        """Attend la fin d'une rafale puis récupère les chemins accumulés."""
+        while not self._stopping.is_set():
+            with self._lock:
+                quiet_for = time.monotonic() - self._last_event
+                if quiet_for >= self.debounce:
+                    batch, self._pending = self._pending, set()
+                    self._wakeup.clear()
+                    return batch
+            self._stopping.wait(self.debounce - quiet_for)
+        return set()
+
+    def _run(self, catch_up: bool):
+        """Boucle du thread d'indexation."""
+        if catch_up:
+            try:
+                self.last_update = self.indexer.build_incremental_index()
+            except Exception as e:
+                print(f"   ❌ Erreur d'indexation: {e}")
+
+        while not self._stopping.is_set():
+            self._wakeup.wait()
+            batch = self._take_batch()
+            if not batch:
+                continue
+
+            print(f"\n👀 {len(batch)} chemin(s) modifié(s) dans '{self.project_name}'")
+            try:
+                self.last_update = self.indexer.index_paths(sorted(batch))
+                self.updates += 1
+            except Exception as e:
+                print(f"   ❌ Erreur d'indexation: {e}")
+
+    def start(self, catch_up: bool = True):
+        """
+        Démarre la surveillance (threads en arrière-plan, non bloquant).
+
+        Args:
+            catch_up: Rattraper d'abord les modifications faites hors
+                surveillance (un parcours complet, une seule fois). Les
+                événements reçus pendant le rattrapage sont conservés.
+        """
+        if not self.project_path.exists():
+            raise FileNotFoundError(f"Le projet {self.project_name} n'existe pas.")
+
+        self._stopping.clear()
+        self._observer = Observer()
+        self._observer.schedule(_ChangeCollector(self), str(self.project_path), recursive=True)
+        self._observer.start()
+
+        self._worker = threading.Thread(
+            target=self._run, args=(catch_up,), name=f"watch-{self.project_name}", daemon=True
+        )
+        self._worker.start()
+
+        print(f"👀 Surveillance de {self.project_path} (délai {self.debounce}s)")
+
+    def stop(self):
+        """Arrête la surveillance."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def run_forever(self):
+        """Surveille jusqu'à Ctrl+C."""
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("\n👋 Arrêt de la surveillance")
+        finally:
+            self.stop()
+
+
+def watch_project(project_name: str, debounce: float = 2.0):
+    """
+    Surveille un projet et l'indexe en continu (bloquant).
+
+    Args:
+        project_name: Nom du projet
+        debounce: Délai de calme (secondes) avant de réindexer
+    """
+    ProjectWatcher(project_name, debounce=debounce).run_forever()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.watcher <nom_projet> [--debounce SECONDES]")
+        sys.exit(1)
+
+    project = sys.argv[1]
+    debounce = 2.0
+    if "--debounce" in sys.argv:
+        debounce = float(sys.argv[sys.argv.index("--debounce") + 1])
+
+    watch_project(project, debounce=debounce)